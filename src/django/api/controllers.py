@@ -2,15 +2,16 @@ import logging
 import api.exceptions as err
 import api.utils as util
 
+from functools import partial
 from collections import defaultdict, OrderedDict
 from datetime import timedelta, datetime, date, time
-from typing import Union, Dict, List, Dict, Tuple, Union, Any
+from typing import Union, Dict, List, Dict, Tuple, Union, Any, NamedTuple, Optional
 from datetime import timedelta, datetime
 from django.conf import settings
 from django.db import transaction, IntegrityError
 from django.db.models import Prefetch
 from django.db.models.query import QuerySet
-from django.db.models.functions import Coalesce, Concat
+from django.db.models.functions import Coalesce, Concat, Cast, Extract, Floor
 from django.utils.timezone import now, localtime, make_aware
 from django.db.models import (
     Sum,
@@ -27,6 +28,7 @@ from django.db.models import (
 from auth_app.models import (
     User,
     Activity,
+    ActivityDailySummary,
     Store,
     Role,
     Shift,
@@ -34,7 +36,16 @@ from auth_app.models import (
     StoreUserAccess,
     ShiftRequest,
     RepeatingShift,
+    OPEN_ACTIVITY_CONSTRAINT,
+    ACTIVITY_OVERLAP_CONSTRAINT,
 )
+from auth_app.clocked_state import (
+    get_clocked_state,
+    fill_clocked_state,
+    set_clocked_state,
+    set_clocked_states,
+)
+from api.shift_matching import ShiftActivityLink, match_employee_day
 
 
 logger = logging.getLogger("api")
@@ -107,9 +118,124 @@ def get_store_employee_names(
     ]
 
 
+class ClockingState(NamedTuple):
+    """
+    Everything a clock in/out is validated against, loaded (and locked) by `get_locked_clocking_state`.
+    """
+
+    employee: User
+    store: Store
+    is_associated: bool
+    open_activity_id: Optional[int]  # The latest ongoing activity (None if clocked out)
+    open_activity_login: Optional[datetime]  # Its login timestamp
+    last_logout: Optional[datetime]  # The latest clock out in the store
+
+
+def get_locked_clocking_state(employee_id: int, store_id: int) -> ClockingState:
+    """
+    Load the state of an employee in a store for a clock event with ONE joined query: their store access row
+    (with the user and store) and the open/last activity. The access row is locked (FOR UPDATE) until the end
+    of the transaction, so concurrent clock events of an employee in a store are processed one at a time.
+    Must be called within a transaction.
+
+    If the employee isn't associated with the store, the user and store are loaded separately (raising
+    User.DoesNotExist/Store.DoesNotExist) to report the error that applies.
+
+    Args:
+        employee_id (int): The employee's ID.
+        store_id (int): The store's ID.
+
+    Returns:
+        ClockingState: The employee's clocking state in the store.
+    """
+    open_activities = Activity.objects.filter(
+        employee_id=OuterRef("user_id"),
+        store_id=OuterRef("store_id"),
+        logout_time__isnull=True,
+    ).order_by("-login_time")
+    closed_activities = Activity.objects.filter(
+        employee_id=OuterRef("user_id"),
+        store_id=OuterRef("store_id"),
+        logout_timestamp__isnull=False,
+    ).order_by("-logout_timestamp")
+
+    access = (
+        StoreUserAccess.objects.select_for_update(of=("self",))
+        .select_related("user", "store")
+        .filter(user_id=employee_id, store_id=store_id)
+        .annotate(
+            open_activity_id=Subquery(open_activities.values("id")[:1]),
+            open_activity_login=Subquery(open_activities.values("login_timestamp")[:1]),
+            last_logout=Subquery(closed_activities.values("logout_timestamp")[:1]),
+        )
+        .first()
+    )
+
+    if access is not None:
+        return ClockingState(
+            employee=access.user,
+            store=access.store,
+            is_associated=True,
+            open_activity_id=access.open_activity_id,
+            open_activity_login=access.open_activity_login,
+            last_logout=access.last_logout,
+        )
+
+    # Not associated (rare) -> only the checks coming before the association check apply
+    employee = User.objects.get(pk=employee_id)
+    store = Store.objects.get(pk=store_id)
+    activity = employee.get_last_active_activity_for_store(store=store)
+    return ClockingState(
+        employee=employee,
+        store=store,
+        is_associated=False,
+        open_activity_id=activity.id if activity else None,
+        open_activity_login=activity.login_timestamp if activity else None,
+        last_logout=None,
+    )
+
+
+def _create_open_activity(
+    employee: User, store: Store, time: datetime
+) -> Optional[Activity]:
+    """
+    Create the ongoing activity of a clock in. The database only allows one ongoing activity per employee per
+    store (`OPEN_ACTIVITY_CONSTRAINT`), which rejects a clock in committed while waiting for the clocking lock.
+    It also rejects activities conflicting with the employee's other activities of the day (`ACTIVITY_OVERLAP_CONSTRAINT`).
+
+    Returns:
+        Activity | None: The created activity, or None if the employee is already clocked in.
+
+    Raises:
+        err.StartingShiftTooSoonError: If the activity conflicts with another activity (i.e. one entered by a manager).
+    """
+    activity = Activity(
+        employee=employee,
+        store=store,
+        login_timestamp=time,
+        login_time=util.round_datetime_minute(time),  # Default to round to nearest 15m
+        deliveries=0,
+    )
+    activity.work_date = Activity.get_work_date(activity.login_time)
+
+    try:
+        with transaction.atomic():
+            # Skip `save()`'s validation queries, the constraint is the check
+            Activity.objects.bulk_create([activity])
+    except IntegrityError as e:
+        if OPEN_ACTIVITY_CONSTRAINT in str(e):
+            return None
+        elif ACTIVITY_OVERLAP_CONSTRAINT in str(e):
+            raise err.StartingShiftTooSoonError
+        raise e
+
+    return activity
+
+
 def handle_clock_in(employee_id: int, store_id: int, manual: bool = False) -> Activity:
     """
     Handles clocking in an employee by ID.
+    The employee's state is validated with a single (locking) query, see `get_locked_clocking_state`.
 
     Args:
         employee_id (int): The employee's ID.
@@ -122,11 +248,11 @@ def handle_clock_in(employee_id: int, store_id: int, manual: bool = False) -> Ac
     try:
         # Start a database transaction (rolls back on error)
         with transaction.atomic():
-            # Fetch the employee (errors if they dont exist)
-            employee = User.objects.get(pk=employee_id)
-
-            # Get the store
-            store = Store.objects.get(pk=store_id)
+            # Fetch & lock the employee's state in the store (errors if the user/store dont exist)
+            state = get_locked_clocking_state(
+                employee_id=employee_id, store_id=store_id
+            )
+            employee, store = state.employee, state.store
             time = localtime(now())  # Consistent timestamp
 
             # Check if user is inactive
@@ -134,11 +260,11 @@ def handle_clock_in(employee_id: int, store_id: int, manual: bool = False) -> Ac
                 raise err.InactiveUserError
 
             # Check if already clocked in
-            elif employee.is_clocked_in(store=store):
+            elif state.open_activity_id is not None:
                 raise err.AlreadyClockedInError
 
             # Check user is associated with the store
-            elif not employee.is_associated_with_store(store):
+            elif not state.is_associated:
                 raise err.NotAssociatedWithStoreError
 
             # Check the store is active
@@ -146,28 +272,26 @@ def handle_clock_in(employee_id: int, store_id: int, manual: bool = False) -> Ac
                 raise err.InactiveStoreError
 
             # Check if the employee is trying to clock in too soon after their last shift (default=30m)
-            elif check_new_shift_too_soon(employee=employee, store=store):
+            elif state.last_logout and time - state.last_logout < timedelta(
+                minutes=settings.START_NEW_SHIFT_TIME_DELTA_THRESHOLD_MINS
+            ):
                 raise err.StartingShiftTooSoonError
 
-            time = localtime(now())  # Consistent timestamp
+            # Create Activity record (public holiday flag is set AFTER COMMIT to keep it out of the transaction)
+            activity = _create_open_activity(employee=employee, store=store, time=time)
+            if activity is None:
+                raise err.AlreadyClockedInError
 
-            # Create Activity record
-            activity = Activity.objects.create(
-                employee=employee,
-                store=store,
-                login_timestamp=time,
-                login_time=util.round_datetime_minute(
-                    time
-                ),  # Default to round to nearest 15m
-                is_public_holiday=util.is_public_holiday(time),
-                deliveries=0,
+            transaction.on_commit(
+                partial(util.queue_activity_public_holiday_check, activity.id)
             )
+            set_clocked_state(employee.id, store.id, activity)
 
             logger.info(
                 f"Employee ID {employee.id} ({employee.first_name} {employee.last_name}) CLOCKED IN under the store ID {store.id} [{store.code}]{' via MANUAL CLOCKING' if manual else ''}."
             )
             logger.debug(
-                f"[CREATE: ACTIVITY (ID: {activity.id})] [{'MANUAL ' if manual else ''}CLOCK-IN] Employee ID {employee.id} ({employee.first_name} {employee.last_name}) -- Store ID: {store.id} [{store.code}] -- Login: {activity.login_time} ({activity.login_timestamp}) -- PUBLIC HOLIDAY: {activity.is_public_holiday}"
+                f"[CREATE: ACTIVITY (ID: {activity.id})] [{'MANUAL ' if manual else ''}CLOCK-IN] Employee ID {employee.id} ({employee.first_name} {employee.last_name}) -- Store ID: {store.id} [{store.code}] -- Login: {activity.login_time} ({activity.login_timestamp})"
             )
             return activity
 
@@ -199,6 +323,7 @@ def handle_clock_out(
 ) -> Activity:
     """
     Handles clocking out an employee by ID.
+    The employee's state is validated with a single (locking) query, see `get_locked_clocking_state`.
 
     Args:
         employee_id (int): The employee's ID.
@@ -213,11 +338,12 @@ def handle_clock_out(
     try:
         # Start a database transaction (rolls back on error)
         with transaction.atomic():
-            # Fetch the employee (errors if they dont exist)
-            employee = User.objects.get(pk=employee_id)
-
-            # Get the store
-            store = Store.objects.get(pk=store_id)
+            # Fetch & lock the employee's state in the store (errors if the user/store dont exist)
+            state = get_locked_clocking_state(
+                employee_id=employee_id, store_id=store_id
+            )
+            employee, store = state.employee, state.store
+            time = localtime(now())
 
             # Check if user is inactive
             if not employee.is_active and not allow_inactive_edits:
@@ -228,23 +354,30 @@ def handle_clock_out(
                 raise err.InactiveStoreError
 
             # Check if not clocked in
-            elif not employee.is_clocked_in(store=store):
+            elif state.open_activity_id is None:
                 raise err.AlreadyClockedOutError
 
             # Check user is associated with the store
-            elif not employee.is_associated_with_store(store):
+            elif not state.is_associated:
                 raise err.NotAssociatedWithStoreError
 
             # Check if the employee is trying to clock out too soon after their last shift (default=10m)
-            elif check_clocking_out_too_soon(employee=employee, store=store):
+            elif time - state.open_activity_login < timedelta(
+                minutes=settings.FINISH_SHIFT_TIME_DELTA_THRESHOLD_MINS
+            ):
                 raise err.ClockingOutTooSoonError
 
-            # Fetch the last active clock-in record -> PRE-SELECT STORE INFO FOR USE IN EXCEPTIONS
-            activity = employee.get_last_active_activity_for_store(
-                store=store, preselect_store_info=True
+            # Lock the ongoing activity -> PRE-SELECT STORE INFO FOR USE IN EXCEPTIONS
+            # (re-checked as still ongoing, i.e. not closed by the automated forced clock out in the meantime)
+            activity = (
+                Activity.objects.select_for_update(of=("self",))
+                .select_related("store")
+                .filter(pk=state.open_activity_id, logout_time__isnull=True)
+                .first()
             )
+            if activity is None:
+                raise err.AlreadyClockedOutError
 
-            time = localtime(now())
             activity.logout_timestamp = time
             activity.logout_time = util.round_datetime_minute(
                 time
@@ -260,6 +393,8 @@ def handle_clock_out(
                 # Check for exceptions
                 link_activity_to_shift(activity=activity)
 
+            set_clocked_state(employee.id, store.id, None)
+
             logger.info(
                 f"Employee ID {employee.id} ({employee.first_name} {employee.last_name}) CLOCKED OUT under the store ID {store.id} [{store.code}]{' via MANUAL CLOCKING' if manual else ''}."
             )
@@ -286,54 +421,157 @@ def handle_clock_out(
         raise e
 
 
-def get_employee_clocked_info(employee_id: int, store_id: int) -> dict:
+def handle_store_forced_clock_out(store: Store, deliveries: int = 0) -> List[Activity]:
+    """
+    Forcefully clock out EVERY employee still clocked in to a store (ignores HIDDEN accounts) in bulk.
+    Used by the automated end of day task in place of calling `handle_clock_out` per employee, so it skips
+    its per employee checks (i.e. inactive accounts or clocking out too soon).
+
+    All open activities are closed in a single UPDATE (with the same rounded logout time), their daily
+    rollups are rebuilt once and their exceptions are linked in one batch.
+
+    Args:
+        store (Store): The store to clock everyone out of.
+        deliveries (int) = 0: The delivery count to set for every activity.
+
+    Returns:
+        List[Activity]: The clocked out activities (with their employee and store selected).
+    """
+    try:
+        with transaction.atomic():
+            # Lock the open activities (prevents a concurrent clock out from being overwritten)
+            activity_ids = list(
+                Activity.objects.select_for_update(of=("self",))
+                .filter(
+                    store_id=store.id,
+                    logout_time__isnull=True,
+                    employee__is_hidden=False,
+                )
+                .values_list("id", flat=True)
+            )
+            if not activity_ids:
+                return []
+
+            time = localtime(now())  # Consistent timestamp
+            logout_time = util.round_datetime_minute(time)
+
+            Activity.objects.filter(id__in=activity_ids).update(
+                logout_timestamp=time,
+                logout_time=logout_time,
+                deliveries=deliveries,
+                # Same as `util.calculate_shift_length_mins` (truncated)
+                shift_length_mins=Cast(
+                    Floor(
+                        Extract(
+                            ExpressionWrapper(
+                                Value(logout_time) - F("login_time"),
+                                output_field=DurationField(),
+                            ),
+                            "epoch",
+                        )
+                        / 60
+                    ),
+                    output_field=IntegerField(),
+                ),
+                last_updated_at=time,
+            )
+
+            activities = list(
+                Activity.objects.filter(id__in=activity_ids).select_related(
+                    "employee", "store"
+                )
+            )
+
+            # Rollups are skipped by UPDATE -> rebuild every affected day once
+            login_dates = [localtime(a.login_time).date() for a in activities]
+            ActivityDailySummary.rebuild(
+                start_date=min(login_dates),
+                end_date=max(login_dates),
+                store_id=store.id,
+            )
+
+            # Check for exceptions
+            link_activities_to_shifts(activities=activities)
+
+            set_clocked_states({(a.employee_id, store.id): None for a in activities})
+
+            for activity in activities:
+                logger.debug(
+                    f"[UPDATE: ACTIVITY (ID: {activity.id})] [FORCED CLOCK-OUT] Employee ID {activity.employee_id} ({activity.employee.first_name} {activity.employee.last_name}) -- Store ID: {store.id} [{store.code}] -- Login: {activity.login_time} ({activity.login_timestamp}) -- Logout: {activity.logout_time} ({activity.logout_timestamp}) -- Deliveries: {activity.deliveries} -- Shift Length: {activity.shift_length_mins}mins -- PUBLIC HOLIDAY: {activity.is_public_holiday}"
+                )
+            logger.info(
+                f"Forcefully CLOCKED OUT {len(activities)} employees under the store ID {store.id} [{store.code}]."
+            )
+            return activities
+
+    except Exception as e:
+        logger.error(
+            f"Failed to forcefully clock out the employees of store ID {store.id} [{store.code}], resulting in the error: {str(e)}"
+        )
+        raise e
+
+
+def get_employee_clocked_info(
+    employee_id: int, store_id: int, employee: User = None
+) -> dict:
     """
     Get detailed clocked information for an employee for a certain store.
+    Served from the cached clocked state when the employee (with their store access) is given, which doesn't
+    query the database at all. Falls back to the database on a miss (caching the state loaded).
 
     Args:
         employee_id (int): The ID of the employee.
         store_id (int): The ID of the store the employee is associated to.
+        employee (User, optional): The already loaded employee (i.e. the request's authenticated user).
 
     Returns:
         dict: A dictionary containing employee info and clocked-in details if applicable.
     """
     try:
-        employee = User.objects.get(pk=employee_id)
-        store = Store.objects.get(pk=store_id)
+        # Check the state with the employee's (cached) store access -> unknown stores fall back to the database
+        store_access = (
+            employee.get_store_access().get(int(store_id)) if employee else None
+        )
+        state = get_clocked_state(employee_id, store_id) if store_access else None
+
+        if state is None:
+            employee = employee or User.objects.get(pk=employee_id)
+            store = Store.objects.get(pk=store_id)
+            store_is_active = store.is_active
+        else:
+            _, store_is_active = store_access
 
         # Check employee is not inactive
         if not employee.is_active:
             raise err.InactiveUserError
 
         # Check store is not inactive
-        elif not store.is_active:
+        elif not store_is_active:
             raise err.InactiveStoreError
 
         # Check user is associated with the store
-        elif not employee.is_associated_with_store(store=store):
+        elif state is None and not employee.is_associated_with_store(store=store):
             raise err.NotAssociatedWithStoreError
 
+        if state is None:
+            # Fetch the active clock-in record for the employee (if clocked in)
+            activity = employee.get_last_active_activity_for_store(store=store)
+            state = fill_clocked_state(employee_id, store_id, activity)
+
         # Form the basic info
-        clocked_in = employee.is_clocked_in(store=store)
         full_name = f"{employee.first_name} {employee.last_name}"
         info = {
             "employee_id": employee_id,
             "store_id": store_id,
             "name": full_name,
-            "clocked_in": clocked_in,
+            "clocked_in": state["clocked_in"],
         }
 
         # If the employee is logged in, add the activity info
-        if clocked_in:
-            # Fetch the last active clock-in record for the employee
-            activity = employee.get_last_active_activity_for_store(store=store)
-
-            if not activity:
-                raise err.NoActiveClockingRecordError
-
+        if state["clocked_in"]:
             # Add the clock-in time to the info
-            info["login_time"] = activity.login_time
-            info["login_timestamp"] = activity.login_timestamp
+            info["login_time"] = state["login_time"]
+            info["login_timestamp"] = state["login_timestamp"]
 
         return info
 
@@ -345,12 +583,6 @@ def get_employee_clocked_info(employee_id: int, store_id: int) -> dict:
         err.InactiveStoreError,
     ) as e:
         raise e  # Re-raise error to be caught in view
-    except err.NoActiveClockingRecordError:
-        # If the user has no active clocking record (their clock-in activity is missing)
-        logger.warning(
-            f"Failed to get clocked status for employee with ID {employee_id} due to a missing active clocking record (activity)."
-        )
-        raise
     except Exception as e:
         # Catch-all exception
         logger.error(
@@ -389,14 +621,6 @@ def get_user_activities(user_id: int, store_id: int, week: str = None):
         week_start = raw_date - timedelta(days=raw_date.weekday())
         week_end = week_start + timedelta(days=6)
 
-        # Convert week boundaries to datetime
-        start_datetime = make_aware(
-            datetime.combine(week_start, time.min)
-        )  # Monday 00:00
-        end_datetime = make_aware(
-            datetime.combine(week_end, time.max)
-        )  # Sunday 23:59:59.999999
-
         # Get objects
         user = User.objects.get(pk=user_id)
         store = Store.objects.get(pk=store_id)
@@ -415,7 +639,7 @@ def get_user_activities(user_id: int, store_id: int, week: str = None):
             .filter(
                 employee_id=user.id,
                 store_id=store.id,
-                login_time__range=(start_datetime, end_datetime),
+                work_date__range=(week_start, week_end),
             )
             .order_by("-login_time")
         )
@@ -609,9 +833,9 @@ def get_all_shifts(
 
     # Filter dates
     if start_date:
-        qs = qs.filter(login_time__date__gte=start_date)
+        qs = qs.filter(work_date__gte=start_date)
     if end_date:
-        qs = qs.filter(login_time__date__lte=end_date)
+        qs = qs.filter(work_date__lte=end_date)
 
     # Filter by names
     if filter_names:
@@ -753,9 +977,9 @@ def get_account_summaries(
         employees_qs = User.objects.filter(
             Q(store_access__store_id=store.id)
             | Q(
-                activities__store_id=store.id,
-                activities__login_time__date__gte=start_dt.date(),
-                activities__login_time__date__lte=end_dt.date(),
+                daily_summaries__store_id=store.id,
+                daily_summaries__date__gte=start_dt.date(),
+                daily_summaries__date__lte=end_dt.date(),
             ),
             is_hidden=False,
         ).distinct()
@@ -772,34 +996,32 @@ def get_account_summaries(
                 name_filter |= Q(full_name__icontains=name)
             employees_qs = employees_qs.filter(name_filter)
 
-        # Subqueries for total_mins and deliveries per employee
-        activity_base = Activity.objects.filter(
+        # Totals are read from the pre-aggregated daily rollups (day types are already split in local time)
+        summary_base = ActivityDailySummary.objects.filter(
             store_id=store.id,
-            login_time__date__gte=start_dt,
-            login_time__date__lte=end_dt,
+            date__gte=start_dt.date(),
+            date__lte=end_dt.date(),
             employee=OuterRef("pk"),
         )
 
-        # Annotate employees with total mins and deliveries
-        employees_qs = employees_qs.annotate(
-            total_mins=Coalesce(
+        def sum_summary_field(field: str):
+            return Coalesce(
                 Subquery(
-                    activity_base.values("employee")
-                    .annotate(total=Sum("shift_length_mins"))
+                    summary_base.values("employee")
+                    .annotate(total=Sum(field))
                     .values("total")[:1]
                 ),
                 Value(0),
                 output_field=IntegerField(),
-            ),
-            deliveries=Coalesce(
-                Subquery(
-                    activity_base.values("employee")
-                    .annotate(total=Sum("deliveries"))
-                    .values("total")[:1]
-                ),
-                Value(0),
-                output_field=IntegerField(),
-            ),
+            )
+
+        # Annotate employees with total mins, mins per day type and deliveries
+        employees_qs = employees_qs.annotate(
+            total_mins=sum_summary_field("mins_total"),
+            mins_weekday=sum_summary_field("mins_weekday"),
+            mins_weekend=sum_summary_field("mins_weekend"),
+            mins_public_holiday=sum_summary_field("mins_public_holiday"),
+            deliveries=sum_summary_field("deliveries"),
             is_store_manager=Exists(
                 StoreUserAccess.objects.filter(
                     user=OuterRef("pk"), store_id=store.id, is_manager=True
@@ -849,46 +1071,14 @@ def get_account_summaries(
                     )
                 )
 
-            # Get all activities for this employee within the date range
-            emp_activities = Activity.objects.filter(
-                store_id=store.id,
-                employee_id=employee.id,
-                login_time__date__gte=start_dt,
-                login_time__date__lte=end_dt,
-            )
-
-            # Calculate hours for weekdays, weekends, and public holidays
-            mins_weekday = mins_weekend = mins_public_holiday = 0
-
-            # Calculate the hours based on the activity's day type
-            for act in emp_activities:
-                # Skip shift if its not finished
-                if act.logout_time is None:
-                    continue
-
-                # ENSURE TIME IS IN LOCAL TIMEZONE FOR CORRECT DAY ALLOCATION!
-                login_time = localtime(act.login_time)
-                shift_length = act.shift_length_mins or 0
-                day_of_week = login_time.weekday()  # Monday=0, Sunday=6
-
-                # Public Holiday (MUTUALLY EXCLUSIVE TO REGULAR WEEK/WEEKEND DAYS)
-                if act.is_public_holiday:
-                    mins_public_holiday += shift_length
-                # Weekday (Mon-Fri)
-                elif day_of_week < 5:
-                    mins_weekday += shift_length
-                # Weekend (Sat-Sun)
-                else:
-                    mins_weekend += shift_length
-
             summary_list.append(
                 {
                     "employee_id": employee.id,
                     "name": employee.full_name,
                     "hours_total": round(employee.total_mins / 60, 2),
-                    "hours_weekday": round(mins_weekday / 60, 2),
-                    "hours_weekend": round(mins_weekend / 60, 2),
-                    "hours_public_holiday": round(mins_public_holiday / 60, 2),
+                    "hours_weekday": round(employee.mins_weekday / 60, 2),
+                    "hours_weekend": round(employee.mins_weekend / 60, 2),
+                    "hours_public_holiday": round(employee.mins_public_holiday / 60, 2),
                     "deliveries": employee.deliveries,
                     "age": age,  # Integer age or None
                     "acc_resigned": not employee.is_store_associated,
@@ -1630,16 +1820,15 @@ def approve_exception(
                 "end_time": localtime(activity.logout_time).time(),
             }
 
-            # IF IT FAILS TO CREATE SHIFT DUE TO ONE ALREADY EXISTING BUT WITH (is_deleted=True), DELETE IT AND TRY AGAIN
-            existing = Shift.objects.filter(
+            # IT WOULD FAIL TO CREATE THE SHIFT DUE TO CONFLICTING ONES EXISTING BUT WITH (is_deleted=True), DELETE THEM FIRST
+            existing_shifts = Shift.objects.filter(
                 employee_id=shift_data["employee"].id,
                 store_id=shift_data["store"].id,
                 date=shift_data["date"],
-                start_time=shift_data["start_time"],
                 is_deleted=True,
-            ).first()
+            ).overlapping(shift_data["start_time"], shift_data["end_time"])
 
-            if existing:
+            for existing in existing_shifts:
                 logger.debug(
                     f"[DELETE: SHIFT (ID: {existing.id})] Deleted due to it interfering with an exception approval (it was already soft-deleted) -- Employee ID: {existing.employee_id} -- Time: ({existing.date}) {existing.start_time} -> {existing.end_time}"
                 )
@@ -1677,13 +1866,222 @@ def approve_exception(
         exception.save()
 
 
+class _ShiftExceptionDiff:
+    """
+    Applies the matched links of employee-days (see `shift_matching.match_employee_day`) to their existing
+    ShiftExceptions in memory, collecting the exceptions to create/update/delete so they are written in bulk.
+    """
+
+    def __init__(self, exceptions: List[ShiftException]):
+        self.by_shift = {e.shift_id: e for e in exceptions if e.shift_id}
+        self.by_activity = {e.activity_id: e for e in exceptions if e.activity_id}
+        self.claimed = set()  # IDs (python) of the exceptions used by a link
+        self.created = []
+        self.updated = {}  # Exception ID -> exception (in order of first change)
+        self.relinked = set()  # Exception IDs whose shift/activity changed
+
+    def _mark_updated(self, exception: ShiftException, relinked: bool) -> None:
+        if exception.pk is None:
+            return  # Not yet created
+        self.updated.setdefault(exception.pk, exception)
+        if relinked:
+            self.relinked.add(exception.pk)
+
+    def _set_link(self, exception: ShiftException, field_name: str, obj) -> bool:
+        index = self.by_shift if field_name == "shift" else self.by_activity
+        current_id = getattr(exception, f"{field_name}_id")
+        new_id = obj.id if obj else None
+        if current_id == new_id:
+            return False
+
+        if current_id is not None and index.get(current_id) is exception:
+            del index[current_id]
+
+        if obj is not None:
+            # Take the shift/activity from the (unused) exception it was linked to
+            other = index.get(obj.id)
+            if other is not None and other is not exception:
+                setattr(other, field_name, None)
+                self._mark_updated(other, relinked=True)
+            index[obj.id] = exception
+
+        setattr(exception, field_name, obj)
+        return True
+
+    def apply(self, links: List[ShiftActivityLink]) -> List[bool]:
+        """
+        Apply the links of an employee-day. Returns whether an exception was created for each link.
+        """
+        created = []
+        for link in links:
+            exception = next(
+                (
+                    candidate
+                    for candidate in [
+                        (
+                            self.by_activity.get(link.activity.id)
+                            if link.activity
+                            else None
+                        ),
+                        self.by_shift.get(link.shift.id) if link.shift else None,
+                    ]
+                    if candidate is not None and id(candidate) not in self.claimed
+                ),
+                None,
+            )
+
+            if exception is None:
+                if link.reason is not None:
+                    exception = ShiftException(reason=link.reason)
+                    self._set_link(exception, "shift", link.shift)
+                    self._set_link(exception, "activity", link.activity)
+                    self.claimed.add(id(exception))
+                    self.created.append(exception)
+                created.append(exception is not None)
+                continue
+
+            self.claimed.add(id(exception))
+            relinked = self._set_link(exception, "shift", link.shift)
+            relinked = self._set_link(exception, "activity", link.activity) or relinked
+
+            # Perfect link -> automatically approve its exception
+            if link.reason is None:
+                changed = relinked or not exception.is_approved
+                if not exception.is_approved:
+                    exception.is_approved = True
+                    logger.info(
+                        f"Automatically marked EXCEPTION ID {exception.id} as APPROVED due to the activity being manually fixed."
+                    )
+            else:
+                changed = relinked or exception.reason != link.reason
+                if changed:
+                    exception.reason = link.reason
+                    exception.is_approved = False
+
+            if changed:
+                self._mark_updated(exception, relinked=relinked)
+            created.append(False)
+
+        return created
+
+    def write(self) -> None:
+        # Exceptions left without a shift or activity are removed (same as deleting both)
+        deleted = [
+            e for e in self.updated.values() if not e.shift_id and not e.activity_id
+        ]
+        updated = [e for e in self.updated.values() if e.shift_id or e.activity_id]
+
+        with transaction.atomic():
+            if deleted:
+                ShiftException.objects.filter(id__in=[e.id for e in deleted]).delete()
+
+            if updated:
+                # Unlink the relinked exceptions first -> links moved between exceptions never collide within the UPDATE
+                relinked_ids = [e.id for e in updated if e.id in self.relinked]
+                if relinked_ids:
+                    ShiftException.objects.filter(id__in=relinked_ids).update(
+                        shift=None, activity=None
+                    )
+
+                updated_at = now()
+                for exception in updated:
+                    exception.updated_at = updated_at
+                ShiftException.objects.bulk_update(
+                    updated,
+                    fields=["shift", "activity", "reason", "is_approved", "updated_at"],
+                )
+
+            if self.created:
+                ShiftException.objects.bulk_create(self.created)
+
+        if self.created or updated or deleted:
+            logger.info(
+                f"Created {len(self.created)}, updated {len(updated)} and deleted {len(deleted)} ShiftExceptions."
+            )
+        for exception in self.created:
+            logger.debug(
+                f"[CREATE: SHIFTEXCEPTION (ID: {exception.id})] Shift ID: {exception.shift_id or 'N/A'} -- Activity: {exception.activity_id or 'N/A'} -- Reason: {exception.reason.upper()}"
+            )
+
+
+def _reconcile_shift_exceptions(
+    store: Store,
+    start_date: date,
+    end_date: date,
+    employee_ids: Union[List[int], None] = None,
+) -> List[Tuple[ShiftActivityLink, bool]]:
+    """
+    Reconcile the ShiftExceptions of every employee-day of a store within a (local) date range.
+    The shifts, activities and existing exceptions are loaded in 3 queries, each employee-day is matched in memory
+    and the resulting exceptions are written in bulk.
+
+    Returns:
+        List[Tuple[ShiftActivityLink, bool]]: Each resulting link and whether an exception was created for it.
+    """
+    shifts = Shift.objects.filter(
+        store_id=store.id, date__range=(start_date, end_date), is_deleted=False
+    ).defer("comment")
+    activities = Activity.objects.filter(
+        store_id=store.id, work_date__range=(start_date, end_date)
+    )
+    if employee_ids is not None:
+        shifts = shifts.filter(employee_id__in=employee_ids)
+        activities = activities.filter(employee_id__in=employee_ids)
+
+    # Exceptions linked to ANY of the loaded shifts/activities (same filters through the relations)
+    exceptions = ShiftException.objects.filter(
+        Q(shift__in=shifts.values("id")) | Q(activity__in=activities.values("id"))
+    )
+
+    with transaction.atomic():
+        # Group by employee and LOCAL day
+        days = defaultdict(lambda: ([], []))
+        for s in shifts:
+            days[(s.employee_id, s.date)][0].append(s)
+        for a in activities:
+            days[(a.employee_id, a.work_date)][1].append(a)
+
+        diff = _ShiftExceptionDiff(list(exceptions))
+        current_time = localtime(now())
+        results = []
+        for day in sorted(days):
+            day_shifts, day_activities = days[day]
+            links = match_employee_day(
+                shifts=day_shifts, activities=day_activities, now=current_time
+            )
+            results.extend(zip(links, diff.apply(links)))
+
+        diff.write()
+
+    return results
+
+
+def reconcile_employee_day(
+    store: Store, employee_id: int, day: date
+) -> List[Tuple[ShiftActivityLink, bool]]:
+    """
+    Reconcile the ShiftExceptions of an employee's (local) day at a store, i.e. after one of its activities/shifts
+    was deleted or moved to another day. Skipped if the store has is_scheduling_enabled=False.
+
+    Returns:
+        List[Tuple[ShiftActivityLink, bool]]: Each resulting link of the day and whether an exception was created for it.
+    """
+    if not store.is_scheduling_enabled:
+        return []
+
+    return _reconcile_shift_exceptions(
+        store=store, start_date=day, end_date=day, employee_ids=[employee_id]
+    )
+
+
 def link_activity_to_shift(
     activity: Union[Activity, int, str, None] = None,
     shift: Union[Shift, int, str, None] = None,
 ) -> Tuple[Union[ShiftException.Reason, None], bool]:
     """
     Check for a perfect link between an activity (actual shift) and a shift (the roster for the shift).
-    If no perfect link exists (i.e. either doesnt exist, or slightly wrong) then create a ShiftException. Either option MUST be provided.
+    Every shift and activity of the employee's day are matched at once (minimum time distance assignment) and
+    the day's ShiftExceptions are updated to the result (i.e. creating one if no perfect link exists). Either option MUST be provided.
     WARNING: If store has is_scheduling_enabled=False, this function is skipped.
 
     Args:
@@ -1691,13 +2089,13 @@ def link_activity_to_shift(
         shift (shift, int, str): The shift object or ID to start the link from.
 
     Returns:
-        Tuple[Union[ShiftException.Reason, None], bool]: The exception reason if one is created OR None if a perfect link exists AND if an exception is generated or not (alr exists).
+        Tuple[Union[ShiftException.Reason, None], bool]: The exception reason of the given activity/shift OR None if a perfect link exists AND if an exception is generated or not (alr exists).
 
     Raises:
         SyntaxError: If neither activity or shift is provided.
         Activity.DoesNotExist: If the function cannot find the Activity from a provided ID.
         Shift.DoesNotExist: If the function cannot find the Shift from a provided ID.
-        err.IncompleteActivityError: If the activity linking OR linked to is not complete.
+        err.IncompleteActivityError: If the activity linking is not complete.
     """
     # Resolve activity and shift if ID or str is provided
     if activity and not isinstance(activity, Activity):
@@ -1715,331 +2113,98 @@ def link_activity_to_shift(
         except (ValueError, Shift.DoesNotExist):
             raise Shift.DoesNotExist
 
-    # Require a transaction due to multiple concurrent saves in certain cases
-    with transaction.atomic():
-        if activity:
-            if not activity.store.is_scheduling_enabled:
-                return None, False  # Silently skip
-            elif not activity.logout_time:
-                raise err.IncompleteActivityError
-
-            # Check for existing exception (use getattr as it throws errors if it doesnt exist)
-            existing_exception = getattr(activity, "activity_shiftexception", None)
-
-            # Get shifts for same user/store/day (DONT FILTER DB LEVEL, as realistically at most 2 shifts per user per day per store -> more work to filter on DB level)
-            shifts = (
-                Shift.objects.filter(
-                    store_id=activity.store_id,
-                    employee_id=activity.employee_id,
-                    date=activity.login_time.date(),
-                    is_deleted=False,
-                )
-                .defer("comment")
-                .prefetch_related("shift_shiftexception")
-            )
-
-            # Preload other activities ONCE -> Used to check if shift is valid (doesnt already have a perfect match) -> AS PERFECT MATCHES ARENT ALWAYS LINKED TO AN EXCEPTION
-            other_activities = (
-                Activity.objects.filter(
-                    store_id=activity.store_id,
-                    employee_id=activity.employee_id,
-                    login_time__date=activity.login_time.date(),
-                )
-                .exclude(pk=activity.id)
-                .prefetch_related("activity_shiftexception")
-            )
-
-            # Filter shifts that do NOT have an full exception (have both linked shift and activity) — BUT allow the one linked to this activity's exception
-            valid_shifts = [
-                s
-                for s in shifts
-                if util.is_valid_linking_shift_candidate(
-                    possible_shift=s,
-                    existing_exception=existing_exception,
-                    other_activities=other_activities,
-                )
-            ]
-
-            # If no shifts left, treat as NO_SHIFT
-            if not valid_shifts:
-                created = create_shiftexception_link(
-                    activity=activity, reason=ShiftException.Reason.NO_SHIFT
-                )
-                return ShiftException.Reason.NO_SHIFT, created
-
-            # Pick the best match
-            best_shift = min(
-                valid_shifts,
-                key=lambda s: abs(
-                    util.ensure_aware_datetime(datetime.combine(s.date, s.start_time))
-                    - localtime(activity.login_time)
-                ),
-            )
-
-            # If best shift is one with an existing exception WITH NO ACTIVITY -> set to current exsiting_exception (ensures exception gets updated)
-            best_shift_exception = getattr(best_shift, "shift_shiftexception", None)
-            if (
-                not existing_exception
-                and best_shift_exception
-                and not best_shift_exception.activity
-            ):
-                existing_exception = best_shift_exception
-
-            # If it already has a related exception
-            if existing_exception:
-                updated = False
-
-                # If it doesnt have a shift related to exception -> add best_shift
-                if not existing_exception.shift:
-                    existing_exception.shift = best_shift
-                    updated = True
-
-                # Check if the related shift has perfect clocking times
-                if util.check_perfect_shift_activity_timings(
-                    activity=activity, shift=existing_exception.shift
-                ):
-                    # If its an incomplete exception -> add the given activity to exception
-                    if not existing_exception.activity:
-                        existing_exception.activity = activity
-                        updated = True
-
-                    # If its unapproved -> automatically approve it
-                    if not existing_exception.is_approved:
-                        existing_exception.is_approved = True
-                        updated = True
-                        logger.info(
-                            f"Automatically marked EXCEPTION ID {existing_exception.id} as APPROVED due to the activity being manually fixed."
-                        )
-                        logger.debug(
-                            f"[UPDATE: SHIFTEXCEPTION (ID: {existing_exception.id})] Approved: NO → Yes"
-                        )
-
-                    if updated:
-                        existing_exception.save()
-                    return None, False
-
-                else:
-                    if updated:
-                        existing_exception.save()
-                    created = create_shiftexception_link(
-                        activity=activity,
-                        shift=existing_exception.shift,
-                        reason=ShiftException.Reason.INCORRECTLY_CLOCKED,
-                    )
-                    return ShiftException.Reason.INCORRECTLY_CLOCKED, created
-
-            # Has no related exception -> using best_shift, check if it matches clocking times
-            if not util.check_perfect_shift_activity_timings(
-                activity=activity, shift=best_shift
-            ):
-                created = create_shiftexception_link(
-                    activity=activity,
-                    shift=best_shift,
-                    reason=ShiftException.Reason.INCORRECTLY_CLOCKED,
-                )
-                return ShiftException.Reason.INCORRECTLY_CLOCKED, created
-
-            # Else, perfectly clocked all around -> no need to do anything
-            return None, False
-
-        elif shift:
-            if not shift.store.is_scheduling_enabled:
-                return None, False  # Silently skip
-
-            # Check for existing exception (use getattr as it throws errors if it doesnt exist)
-            existing_exception = getattr(shift, "shift_shiftexception", None)
-
-            # Get activities for same user/store/day (DONT FILTER DB LEVEL, as realistically at most 2 activities per user per day per store -> more work to filter on DB level)
-            activities = Activity.objects.filter(
-                store_id=shift.store_id,
-                employee_id=shift.employee_id,
-                login_time__date=shift.date,
-            ).prefetch_related("activity_shiftexception")
-
-            # Preload other shifts ONCE -> Used to check if activity is valid (doesnt already have a perfect match) -> AS PERFECT MATCHES ARENT ALWAYS LINKED TO AN EXCEPTION
-            other_shifts = (
-                Shift.objects.filter(
-                    store_id=shift.store_id,
-                    employee_id=shift.employee_id,
-                    date=shift.date,
-                    is_deleted=False,
-                )
-                .exclude(pk=shift.id)
-                .defer("comment")
-                .prefetch_related("shift_shiftexception")
-            )
-
-            # Filter valid activities using preloaded shifts
-            valid_activities = [
-                a
-                for a in activities
-                if util.is_valid_linking_activity_candidate(
-                    possible_activity=a,
-                    existing_exception=existing_exception,
-                    other_shifts=other_shifts,
-                )
-            ]
-
-            # If no activities left, treat as MISSED_SHIFT
-            if not valid_activities:
-                created = create_shiftexception_link(
-                    shift=shift, reason=ShiftException.Reason.MISSED_SHIFT
-                )
-                return ShiftException.Reason.MISSED_SHIFT, created
-
-            # Pick the best match
-            best_activity = min(
-                valid_activities,
-                key=lambda a: abs(
-                    localtime(a.login_time)
-                    - util.ensure_aware_datetime(
-                        datetime.combine(shift.date, shift.start_time)
-                    )
-                ),
-            )
-
-            # If best activity is one with an existing exception WITH NO SHIFT -> set to current exsiting_exception (ensures exception gets updated)
-            best_activity_exception = getattr(
-                best_activity, "activity_shiftexception", None
-            )
-            if (
-                not existing_exception
-                and best_activity_exception
-                and not best_activity_exception.activity
-            ):
-                existing_exception = best_activity_exception
-
-            # If it already has a related exception
-            if existing_exception:
-                updated = False
-
-                # If it doesnt have a shift related to exception -> add best_shift
-                if not existing_exception.activity:
-                    existing_exception.activity = best_activity
-                    updated = True
-
-                # Check if the related shift has perfect clocking times
-                if util.check_perfect_shift_activity_timings(
-                    shift=shift, activity=existing_exception.activity
-                ):
-                    # If its an incomplete exception -> add the given shift to exception
-                    if not existing_exception.shift:
-                        existing_exception.shift = shift
-                        updated = True
-
-                    # If its unapproved -> automatically approve it
-                    if not existing_exception.is_approved:
-                        existing_exception.is_approved = True
-                        updated = True
-                        logger.info(
-                            f"Automatically marked EXCEPTION ID {existing_exception.id} as APPROVED due to the activity being manually fixed."
-                        )
-                        logger.debug(
-                            f"[UPDATE: SHIFTEXCEPTION (ID: {existing_exception.id})] Approved: NO → Yes"
-                        )
-
-                    if updated:
-                        existing_exception.save()
-                    return None, False
-
-                # Has non-perfect clocking times
-                else:
-                    if updated:
-                        existing_exception.save()
-                    created = create_shiftexception_link(
-                        activity=existing_exception.activity,
-                        shift=shift,
-                        reason=ShiftException.Reason.INCORRECTLY_CLOCKED,
-                    )
-                    return ShiftException.Reason.INCORRECTLY_CLOCKED, created
-
-            # Has no related exception -> using best_shift, check if it matches clocking times
-            if not util.check_perfect_shift_activity_timings(
-                activity=best_activity, shift=shift
-            ):
-                created = create_shiftexception_link(
-                    activity=best_activity,
-                    shift=shift,
-                    reason=ShiftException.Reason.INCORRECTLY_CLOCKED,
-                )
-                return ShiftException.Reason.INCORRECTLY_CLOCKED, created
+    if activity:
+        if not activity.store.is_scheduling_enabled:
+            return None, False  # Silently skip
+        elif not activity.logout_time:
+            raise err.IncompleteActivityError
+        store, employee_id = activity.store, activity.employee_id
+        day = localtime(activity.login_time).date()
+    elif shift:
+        if not shift.store.is_scheduling_enabled:
+            return None, False  # Silently skip
+        store, employee_id, day = shift.store, shift.employee_id, shift.date
+    else:
+        raise SyntaxError("Activity OR Shift object MUST BE PASSED.")
 
-            # Else, perfectly clocked all around -> no need to do anything
-            return None, False
+    for link, created in reconcile_employee_day(
+        store=store, employee_id=employee_id, day=day
+    ):
+        if (activity and link.activity and link.activity.id == activity.id) or (
+            shift and link.shift and link.shift.id == shift.id
+        ):
+            return link.reason, created
 
-        else:
-            raise SyntaxError("Activity OR Shift object MUST BE PASSED.")
+    return None, False
 
 
-def create_shiftexception_link(
-    reason: ShiftException.Reason,
-    activity: Union[Activity, None] = None,
-    shift: Union[Shift, None] = None,
-) -> bool:
+def link_activities_to_shifts(
+    activities: List[Activity],
+) -> Dict[int, Tuple[Union[ShiftException.Reason, None], bool]]:
     """
-    Create a ShiftException based on an activity and/or shift
+    Batch version of `link_activity_to_shift` for many FINISHED activities (i.e. a store's forced clock outs).
+    The employee-days of all the activities are reconciled at once (per store) instead of per activity.
+    WARNING: Activities of stores with is_scheduling_enabled=False are skipped.
 
     Args:
-        activity (Activity, None): The activity object to link.
-        shift (shift, None): The shift object to link.
+        activities (List[Activity]): The activities (with their store selected) to link.
 
     Returns:
-        bool: Whether or not a ShiftException was created
+        Dict[int, Tuple[Union[ShiftException.Reason, None], bool]]: The `link_activity_to_shift` result for each linked activity ID.
 
     Raises:
-        SyntaxError: If neither activity or shift is provided.
+        err.IncompleteActivityError: If an activity to link is not complete.
     """
-    if not activity and not shift:
-        raise SyntaxError("Cannot pass both activity and shift object.")
-
-    # Check an exception doesnt already exist
-    if activity:
-        try:
-            excep = activity.activity_shiftexception  # Reverse FK access
-            excep.is_approved = False
-            excep.reason = reason
-
-            # Check that BOTH ACTIVITY AND SHIFT are assigned IF given both
-            if shift:
-                excep.shift = shift
+    activities = [a for a in activities if a.store.is_scheduling_enabled]
+    if any(not a.logout_time for a in activities):
+        raise err.IncompleteActivityError
+
+    activities_by_store = defaultdict(list)
+    for a in activities:
+        activities_by_store[a.store_id].append(a)
+
+    results = {}
+    for store_activities in activities_by_store.values():
+        dates = [localtime(a.login_time).date() for a in store_activities]
+        activity_ids = {a.id for a in store_activities}
+        for link, created in _reconcile_shift_exceptions(
+            store=store_activities[0].store,
+            start_date=min(dates),
+            end_date=max(dates),
+            employee_ids=list({a.employee_id for a in store_activities}),
+        ):
+            if link.activity and link.activity.id in activity_ids:
+                results[link.activity.id] = (link.reason, created)
 
-            excep.save()
-            return False
-        except ShiftException.DoesNotExist:
-            pass
+    return results
 
-    # Check BOTH if BOTH given (prevents violation of DB unique contraints)
-    if shift:
-        try:
-            excep = shift.shift_shiftexception
-            excep.is_approved = False
-            excep.reason = reason
 
-            # Check that BOTH ACTIVITY AND SHIFT are assigned IF given both
-            if activity:
-                excep.activity = activity
+def reconcile_store_shift_exceptions(
+    store: Store, start_date: date, end_date: date
+) -> Dict[int, Tuple[Union[ShiftException.Reason, None], bool]]:
+    """
+    Batch version of `link_activity_to_shift(shift=...)` for every non-deleted shift of a store within a date range
+    (i.e. the nightly check for missed shifts). The whole range is reconciled in a few queries.
+    WARNING: If store has is_scheduling_enabled=False, this function is skipped.
 
-            excep.save()
-            return False
-        except ShiftException.DoesNotExist:
-            pass
+    Args:
+        store (Store): The store to reconcile.
+        start_date (date): The first shift date to reconcile.
+        end_date (date): The last shift date to reconcile (inclusive).
 
-    # Create exception
-    excep = ShiftException.objects.create(shift=shift, activity=activity, reason=reason)
+    Returns:
+        Dict[int, Tuple[Union[ShiftException.Reason, None], bool]]: The `link_activity_to_shift` result for each shift ID.
+    """
+    if not store.is_scheduling_enabled:
+        return {}
 
-    # Log it
-    if activity:
-        logger.info(
-            f"Created an ShiftException with reason {reason.name} for employee ID {activity.employee_id} in the Store ID {activity.store_id}."
-        )
-    else:
-        logger.info(
-            f"Created an ShiftException with reason {reason.name} for employee ID {shift.employee_id} in the Store ID {shift.store_id}."
+    return {
+        link.shift.id: (link.reason, created)
+        for link, created in _reconcile_shift_exceptions(
+            store=store, start_date=start_date, end_date=end_date
         )
-    logger.debug(
-        f"[CREATE: SHIFTEXCEPTION (ID: {excep.id})] Shift ID: {shift.id if shift else 'N/A'} -- Activity: {activity.id if activity else 'N/A'} -- Reason: {reason.upper()}"
-    )
-    return True
+        if link.shift
+    }
 
 
 def copy_week_schedule(
@@ -2067,9 +2232,8 @@ def copy_week_schedule(
     source_week = util.get_week_start(source_week)
     target_week = util.get_week_start(target_week)
 
-    # Determine week ranges
+    # Determine week range
     source_range = (source_week, source_week + timedelta(days=6))
-    target_range = (target_week, target_week + timedelta(days=6))
 
     # Fetch shifts in source week
     source_shifts = Shift.objects.filter(
@@ -2079,74 +2243,32 @@ def copy_week_schedule(
         date__range=source_range,
     )
 
-    # Prefetch all target week shifts, grouped by (employee_id, date) -> Faster collision checking instead of DB queries
-    target_shifts = Shift.objects.filter(
-        store_id=store.id, date__range=target_range
-    ).defer("comment")
-
-    shift_map = defaultdict(list)
-    for s in target_shifts:
-        shift_map[(s.employee_id, s.date)].append(s)
-
-    count_created = 0
-    count_updated = 0
-    count_skipped = 0
-    new_shifts = []
-
-    for src_shift in source_shifts:
-        dest_date = target_week + timedelta(days=(src_shift.date - source_week).days)
-        shift_start = src_shift.start_time
-        shift_end = src_shift.end_time
-        existing_shifts = shift_map.get((src_shift.employee_id, dest_date), [])
-
-        # Check for any overlaps (within gap threshold)
-        colliding_shifts = [
-            s
-            for s in existing_shifts
-            if util.schedule_copy_do_shifts_collide(
-                datetime.combine(s.date, s.start_time),
-                datetime.combine(s.date, s.end_time),
-                datetime.combine(dest_date, shift_start),
-                datetime.combine(dest_date, shift_end),
-            )
-        ]
-
-        if colliding_shifts:
-            if override_shifts:
-                # Hard delete colliding shifts
-                Shift.objects.filter(id__in=[s.id for s in colliding_shifts]).delete()
-
-                # Create new shift
-                new_shifts.append(
-                    Shift(
-                        store=store,
-                        employee=src_shift.employee,
-                        role=src_shift.role,
-                        date=dest_date,
-                        start_time=shift_start,
-                        end_time=shift_end,
-                    )
-                )
-                count_updated += 1
-            else:
-                count_skipped += 1
-        else:
-            new_shifts.append(
-                Shift(
-                    store=store,
-                    employee=src_shift.employee,
-                    role=src_shift.role,
-                    date=dest_date,
-                    start_time=shift_start,
-                    end_time=shift_end,
-                )
-            )
-            count_created += 1
+    new_shifts = [
+        Shift(
+            store=store,
+            employee_id=src_shift.employee_id,
+            role_id=src_shift.role_id,
+            date=target_week + timedelta(days=(src_shift.date - source_week).days),
+            start_time=src_shift.start_time,
+            end_time=src_shift.end_time,
+        )
+        for src_shift in source_shifts
+    ]
 
     try:
         with transaction.atomic():
-            if new_shifts:
-                Shift.objects.bulk_create(new_shifts)
+            # Insert optimistically, the database rejects the shifts colliding with existing ones (within gap threshold)
+            colliding = Shift.objects.bulk_create_skip_conflicts(new_shifts)
+
+            if override_shifts:
+                for shift in colliding:
+                    # Hard delete colliding shifts and create the new shift instead
+                    Shift.objects.filter(
+                        employee_id=shift.employee_id,
+                        store_id=store.id,
+                        date=shift.date,
+                    ).overlapping(shift.start_time, shift.end_time).delete()
+                    Shift.objects.bulk_create([shift])
 
     except IntegrityError as e:
         logger.error(
@@ -2154,6 +2276,10 @@ def copy_week_schedule(
         )
         raise e
 
+    count_created = len(new_shifts) - len(colliding)
+    count_updated = len(colliding) if override_shifts else 0
+    count_skipped = 0 if override_shifts else len(colliding)
+
     return {
         "created": count_created,
         "updated": count_updated,
@@ -0,0 +1,172 @@
+import logging
+import requests
+import holidays
+
+from datetime import date
+from threading import Lock
+from typing import Dict, List, Tuple
+from django.conf import settings
+from django.db import transaction
+from django.core.cache import caches
+from auth_app.models import PublicHolidayOverride
+
+logger = logging.getLogger("api")
+
+# Per-process index of the offline calendar -> {(country, subdiv, year): {date: holiday name}}
+# (the offline calendar never changes while the process runs, hence it is built once per year)
+_year_index: Dict[Tuple[str, str, int], Dict[date, str]] = {}
+_year_index_lock = Lock()
+
+
+def get_offline_holidays(
+    year: int,
+    country: str = settings.COUNTRY_CODE,
+    subdiv: str = settings.COUNTRY_SUBDIV_CODE,
+) -> Dict[date, str]:
+    """
+    Get the offline calendar's public holidays for a year, building the year's index once per process.
+    Returns an empty dict (without caching it) if the calendar could not be built.
+    """
+    key = (country, subdiv, int(year))
+    index = _year_index.get(key)
+    if index is not None:
+        return index
+
+    with _year_index_lock:
+        index = _year_index.get(key)
+        if index is None:
+            try:
+                index = dict(
+                    holidays.country_holidays(
+                        country=country, subdiv=subdiv, years=int(year)
+                    )
+                )
+            except Exception as e:
+                logger.error(
+                    f"Error building the offline holiday calendar for the year {year} ({country}-{subdiv}): {str(e)}"
+                )
+                return {}
+
+            _year_index[key] = index
+
+    return index
+
+
+def _overrides_cache_key(year: int) -> str:
+    return f"public_holiday_overrides_{int(year)}"
+
+
+def get_holiday_overrides(year: int) -> Dict[date, bool]:
+    """
+    Get the persisted holiday overrides for a year as {date: is_public_holiday}.
+    Shared across processes via the `holiday_checks` cache and invalidated whenever an override changes.
+    """
+    cache = caches["holiday_checks"]
+    key = _overrides_cache_key(year)
+
+    overrides = cache.get(key)
+    if overrides is None:
+        overrides = dict(
+            PublicHolidayOverride.objects.filter(date__year=int(year)).values_list(
+                "date", "is_public_holiday"
+            )
+        )
+        cache.set(key, overrides, timeout=86400)
+
+    return overrides
+
+
+def invalidate_holiday_overrides(year: int):
+    caches["holiday_checks"].delete(_overrides_cache_key(year))
+
+
+def is_public_holiday_date(
+    day: date,
+    country: str = settings.COUNTRY_CODE,
+    subdiv: str = settings.COUNTRY_SUBDIV_CODE,
+) -> bool:
+    """
+    Check if a (local) date is a public holiday. Overrides take priority over the offline calendar.
+    Performs NO network I/O.
+    """
+    overrides = get_holiday_overrides(day.year)
+    if day in overrides:
+        return overrides[day]
+
+    return day in get_offline_holidays(day.year, country=country, subdiv=subdiv)
+
+
+########################## REMOTE API SYNC ##########################
+
+
+def fetch_remote_holidays(
+    year: int,
+    country: str = settings.COUNTRY_CODE,
+    subdiv: str = settings.COUNTRY_SUBDIV_CODE,
+) -> Dict[date, str]:
+    """
+    Fetch the public holidays for a year from the remote API (https://date.nager.at/) that apply to the region.
+    Raises `requests.RequestException` (or `ValueError` for a malformed response) on failure.
+    """
+    url = f"{settings.PUBLIC_HOLIDAY_API_URL.rstrip('/')}/PublicHolidays/{int(year)}/{country}"
+    response = requests.get(url, timeout=settings.PUBLIC_HOLIDAY_API_TIMEOUT_SEC)
+    response.raise_for_status()
+
+    region = f"{country}-{subdiv}" if subdiv else None
+    results = {}
+    for holiday in response.json():
+        # Only keep actual public holidays which apply to the whole country or the region
+        types = holiday.get("types") or ["Public"]
+        counties = holiday.get("counties") or []
+        if "Public" not in types:
+            continue
+        elif not (holiday.get("global") or (region and region in counties)):
+            continue
+
+        results[date.fromisoformat(holiday["date"])] = holiday.get("localName") or ""
+
+    return results
+
+
+def sync_holiday_overrides_from_api(
+    year: int,
+    country: str = settings.COUNTRY_CODE,
+    subdiv: str = settings.COUNTRY_SUBDIV_CODE,
+) -> Tuple[int, int]:
+    """
+    Sync the API sourced overrides for a year with the remote API. Holidays missing from the offline calendar
+    are added as overrides, and previously synced overrides no longer given by the API are removed.
+    MANUAL overrides are never touched.
+
+    Returns:
+        Tuple[int, int]: The number of overrides (created, deleted).
+    """
+    remote = fetch_remote_holidays(year, country=country, subdiv=subdiv)
+    offline = get_offline_holidays(year, country=country, subdiv=subdiv)
+
+    existing = PublicHolidayOverride.objects.filter(date__year=int(year))
+    existing_dates = set(existing.values_list("date", flat=True))
+
+    new_overrides: List[PublicHolidayOverride] = [
+        PublicHolidayOverride(
+            date=day,
+            name=name[:100],
+            is_public_holiday=True,
+            source=PublicHolidayOverride.Source.API,
+        )
+        for day, name in sorted(remote.items())
+        if day not in offline and day not in existing_dates
+    ]
+
+    with transaction.atomic():
+        PublicHolidayOverride.objects.bulk_create(new_overrides)
+        deleted, _ = (
+            existing.filter(source=PublicHolidayOverride.Source.API)
+            .exclude(date__in=[day for day in remote if day not in offline])
+            .delete()
+        )
+
+    # Bulk operations dont send signals -> invalidate manually
+    invalidate_holiday_overrides(year)
+
+    return len(new_overrides), deleted
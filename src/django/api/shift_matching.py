@@ -0,0 +1,164 @@
+import api.utils as util
+
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from django.utils.timezone import localtime
+from auth_app.models import Activity, Shift, ShiftException
+
+
+class ShiftActivityLink(NamedTuple):
+    """
+    A single outcome of matching an employee's day: a linked shift/activity pair (or a lone shift/activity)
+    and the exception reason it requires (None if it is perfectly clocked).
+    """
+
+    shift: Optional[Shift]
+    activity: Optional[Activity]
+    reason: Optional[ShiftException.Reason]
+
+
+def min_cost_assignment(costs: Sequence[Sequence[float]]) -> List[Tuple[int, int]]:
+    """
+    Find the minimum total cost assignment of rows to columns (Hungarian algorithm, O(n^2 * m)).
+    Every row is assigned if there are fewer rows than columns (and vice versa).
+
+    Args:
+        costs (Sequence[Sequence[float]]): The cost matrix, costs[row][col].
+
+    Returns:
+        List[Tuple[int, int]]: The assigned (row, col) pairs, sorted by row.
+    """
+    if not costs or not costs[0]:
+        return []
+
+    # The algorithm requires rows <= columns -> solve the transposed problem otherwise
+    if len(costs) > len(costs[0]):
+        transposed = [list(col) for col in zip(*costs)]
+        return sorted((row, col) for col, row in min_cost_assignment(transposed))
+
+    n, m = len(costs), len(costs[0])
+    u = [0.0] * (n + 1)  # Row potentials
+    v = [0.0] * (m + 1)  # Column potentials
+    col_match = [0] * (m + 1)  # Row (1-indexed) assigned to each column, 0 = none
+    way = [0] * (m + 1)
+
+    for row in range(1, n + 1):
+        col_match[0] = row
+        free_col = 0
+        min_slack = [float("inf")] * (m + 1)
+        used = [False] * (m + 1)
+
+        # Grow an alternating path until it reaches an unassigned column
+        while True:
+            used[free_col] = True
+            current_row = col_match[free_col]
+            delta = float("inf")
+            next_col = 0
+            for col in range(1, m + 1):
+                if used[col]:
+                    continue
+                slack = costs[current_row - 1][col - 1] - u[current_row] - v[col]
+                if slack < min_slack[col]:
+                    min_slack[col] = slack
+                    way[col] = free_col
+                if min_slack[col] < delta:
+                    delta = min_slack[col]
+                    next_col = col
+
+            for col in range(m + 1):
+                if used[col]:
+                    u[col_match[col]] += delta
+                    v[col] -= delta
+                else:
+                    min_slack[col] -= delta
+
+            free_col = next_col
+            if col_match[free_col] == 0:
+                break
+
+        # Flip the path
+        while free_col:
+            prev_col = way[free_col]
+            col_match[free_col] = col_match[prev_col]
+            free_col = prev_col
+
+    return sorted(
+        (col_match[col] - 1, col - 1) for col in range(1, m + 1) if col_match[col]
+    )
+
+
+def _shift_interval(shift: Shift) -> Tuple[datetime, datetime]:
+    start = util.ensure_aware_datetime(datetime.combine(shift.date, shift.start_time))
+    end = util.ensure_aware_datetime(datetime.combine(shift.date, shift.end_time))
+    if end <= start:
+        end += timedelta(days=1)  # Overnight shift
+    return start, end
+
+
+def shift_activity_distance_mins(shift: Shift, activity: Activity) -> float:
+    """
+    The time distance between a shift and a FINISHED activity (start difference + end difference in minutes).
+    """
+    start, end = _shift_interval(shift)
+    return (
+        abs((localtime(activity.login_time) - start).total_seconds())
+        + abs((localtime(activity.logout_time) - end).total_seconds())
+    ) / 60
+
+
+def match_employee_day(
+    shifts: List[Shift], activities: List[Activity], now: datetime
+) -> List[ShiftActivityLink]:
+    """
+    Match ALL the (non-deleted) shifts and activities of an employee's day at a store in one pass, using the
+    minimum total time distance assignment between them. Unfinished activities are ignored.
+
+    Args:
+        shifts (List[Shift]): The non-deleted shifts of the employee-day.
+        activities (List[Activity]): The activities of the employee-day.
+        now (datetime): The current time -> shifts that have not ended yet are never marked as missed.
+
+    Returns:
+        List[ShiftActivityLink]: The linked pairs (in shift order) followed by the lone activities and shifts.
+            Shifts that have not ended without an activity are left out.
+    """
+    shifts = sorted(shifts, key=lambda s: (s.start_time, s.id))
+    activities = sorted(
+        (a for a in activities if a.logout_time), key=lambda a: (a.login_time, a.id)
+    )
+
+    pairs = min_cost_assignment(
+        [[shift_activity_distance_mins(s, a) for a in activities] for s in shifts]
+    )
+
+    links = []
+    for shift_idx, activity_idx in pairs:
+        shift, activity = shifts[shift_idx], activities[activity_idx]
+        perfect = util.check_perfect_shift_activity_timings(
+            activity=activity, shift=shift
+        )
+        links.append(
+            ShiftActivityLink(
+                shift=shift,
+                activity=activity,
+                reason=None if perfect else ShiftException.Reason.INCORRECTLY_CLOCKED,
+            )
+        )
+
+    linked_shifts = {shift_idx for shift_idx, _ in pairs}
+    linked_activities = {activity_idx for _, activity_idx in pairs}
+    links.extend(
+        ShiftActivityLink(
+            shift=None, activity=activity, reason=ShiftException.Reason.NO_SHIFT
+        )
+        for idx, activity in enumerate(activities)
+        if idx not in linked_activities
+    )
+    links.extend(
+        ShiftActivityLink(
+            shift=shift, activity=None, reason=ShiftException.Reason.MISSED_SHIFT
+        )
+        for idx, shift in enumerate(shifts)
+        if idx not in linked_shifts and _shift_interval(shift)[1] <= now
+    )
+    return links
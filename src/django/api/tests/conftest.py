@@ -4,6 +4,7 @@ from datetime import timedelta
 from django.urls import reverse
 from django.utils.timezone import now, localtime
 from rest_framework.test import APIClient
+from clock_in_system.celery import app as celery_app
 from auth_app.models import (
     User,
     Activity,
@@ -167,29 +168,35 @@ def notification_all(employee, inactive_employee, clocked_in_employee, manager):
 
 
 @pytest.fixture
-def store_associate_employee(db, store, employee):
+def store_associate_employee(db, store, employee, django_capture_on_commit_callbacks):
     """
     Creates an association link between store and the employee.
     """
-    StoreUserAccess.objects.create(user=employee, store=store, is_manager=False)
+    # Committed like the other setup data -> invalidates any store access already cached (i.e. by a login)
+    with django_capture_on_commit_callbacks(execute=True):
+        StoreUserAccess.objects.create(user=employee, store=store, is_manager=False)
 
 
 @pytest.fixture
-def store_associate_manager(db, store, manager):
+def store_associate_manager(db, store, manager, django_capture_on_commit_callbacks):
     """
     Creates an association link between store and the manager.
     """
-    StoreUserAccess.objects.create(user=manager, store=store, is_manager=True)
+    with django_capture_on_commit_callbacks(execute=True):
+        StoreUserAccess.objects.create(user=manager, store=store, is_manager=True)
 
 
 @pytest.fixture
-def store_associate_inactive_employee(db, store, inactive_employee):
+def store_associate_inactive_employee(
+    db, store, inactive_employee, django_capture_on_commit_callbacks
+):
     """
     Creates an association link between store and the inactive employee.
     """
-    StoreUserAccess.objects.create(
-        user=inactive_employee, store=store, is_manager=False
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        StoreUserAccess.objects.create(
+            user=inactive_employee, store=store, is_manager=False
+        )
 
 
 @pytest.fixture
@@ -256,3 +263,13 @@ def api_client():
     Return an instance of Django's test client.
     """
     return APIClient()
+
+
+@pytest.fixture
+def celery_eager():
+    """
+    Run Celery tasks (and their groups/chords) in process instead of sending them to the broker.
+    """
+    celery_app.conf.task_always_eager = True
+    yield
+    celery_app.conf.task_always_eager = False
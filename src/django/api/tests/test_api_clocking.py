@@ -299,3 +299,37 @@ def test_clock_in_too_soon_after_clock_out(
         clock_in_response.json()["Error"]
         == "Can't start a shift too soon after your last shift."
     )
+
+
+@pytest.mark.django_db
+def test_clock_in_queues_public_holiday_check_after_commit(
+    logged_in_employee,
+    employee,
+    store,
+    store_associate_employee,
+    mocker,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that clocking in doesn't check the public holiday itself, but queues the check once committed.
+    """
+    api_client = logged_in_employee
+    holiday_check = mocker.patch("api.utils.is_public_holiday")
+    send_task = mocker.patch("api.utils.current_app.send_task")
+
+    url = reverse("api:clock_in")
+    payload = {
+        "location_latitude": store.location_latitude,
+        "location_longitude": store.location_longitude,
+        "store_id": store.id,
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(url, payload)
+
+    assert response.status_code == 201
+    holiday_check.assert_not_called()
+
+    activity = Activity.objects.get(employee=employee, logout_time__isnull=True)
+    send_task.assert_called_once_with(
+        "auth_app.tasks.update_activity_public_holiday", args=[activity.id]
+    )
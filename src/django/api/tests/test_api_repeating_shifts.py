@@ -1,6 +1,9 @@
-from datetime import time
+from datetime import time, date
+from django.db import connection
 from django.urls import reverse
-from auth_app.models import RepeatingShift
+from django.test.utils import CaptureQueriesContext
+from auth_app.models import RepeatingShift, Shift, Notification, User, StoreUserAccess
+from auth_app.tasks import write_out_repeating_shifts_for_week
 import pytest
 
 
@@ -215,3 +218,93 @@ def test_create_repeating_shift_employee_not_associated(
     )
 
     assert response.status_code == 417
+
+
+def _create_repeating_shift(employee, store, weekday, start, end, weeks):
+    return RepeatingShift.objects.create(
+        employee=employee,
+        store=store,
+        start_weekday=weekday,
+        end_weekday=weekday,
+        start_time=time(*start),
+        end_time=time(*end),
+        active_weeks=weeks,
+    )
+
+
+@pytest.mark.django_db
+def test_write_out_repeating_shifts_for_weeks(
+    store, employee, employee_b, manager, store_associate_employee, celery_eager
+):
+    """
+    Writing out a range of weeks creates each week's active shifts, skipping conflicts with existing shifts,
+    with shifts written earlier in the same run and employees no longer associated with the store.
+    """
+    store.is_repeating_shifts_enabled = True
+    store.save()
+
+    _create_repeating_shift(employee, store, 0, (9, 0), (13, 0), [1, 2, 3])
+    _create_repeating_shift(employee, store, 0, (13, 30), (17, 0), [1])  # Too close
+    _create_repeating_shift(employee_b, store, 1, (9, 0), (17, 0), [2, 4])
+    _create_repeating_shift(manager, store, 2, (9, 0), (17, 0), [3])  # Not associated
+    Shift.objects.create(
+        employee=employee,
+        store=store,
+        date=date(2025, 1, 13),
+        start_time=time(12, 0),
+        end_time=time(16, 0),
+    )
+
+    # 2025-01-06 is the start of cycle week 1
+    write_out_repeating_shifts_for_week(
+        week_start_date="2025-01-06", store_id=store.id, weeks=3
+    )
+
+    assert set(
+        Shift.objects.values_list("employee_id", "date", "start_time", "end_time")
+    ) == {
+        (employee.id, date(2025, 1, 6), time(9, 0), time(13, 0)),
+        (employee.id, date(2025, 1, 13), time(12, 0), time(16, 0)),
+        (employee.id, date(2025, 1, 20), time(9, 0), time(13, 0)),
+        (employee_b.id, date(2025, 1, 14), time(9, 0), time(17, 0)),
+    }
+
+    result = Notification.objects.get(store=store)
+    assert "<strong>3 shift(s)</strong> generated" in result.message
+    assert result.message.count("Conflicting Shift") == 2
+    assert result.message.count("Employee Resigned") == 1
+
+
+@pytest.mark.django_db
+def test_write_out_repeating_shifts_constant_query_count(store, celery_eager):
+    """
+    The number of queries to write out a store's repeating shifts does not grow with the number of shifts.
+    """
+    store.is_repeating_shifts_enabled = True
+    store.save()
+
+    def count_writer_queries(count, week_start_date):
+        Shift.objects.all().delete()
+        for i in range(count):
+            emp = User.objects.create(
+                first_name=f"Emp{count}x{i}",
+                last_name="Test",
+                email=f"emp{count}x{i}@example.com",
+                is_active=True,
+                is_setup=True,
+            )
+            StoreUserAccess.objects.create(user=emp, store=store)
+            _create_repeating_shift(emp, store, i % 7, (9, 0), (17, 0), [1, 2, 3, 4])
+
+        with CaptureQueriesContext(connection) as ctx:
+            write_out_repeating_shifts_for_week(
+                week_start_date=week_start_date, store_id=store.id, weeks=3
+            )
+
+        assert Shift.objects.count() == RepeatingShift.objects.count() * 3
+        return len(ctx.captured_queries)
+
+    # Different weeks (the ledger skips weeks that were already written out)
+    assert count_writer_queries(1, "2025-01-06") == count_writer_queries(
+        10, "2025-02-03"
+    )
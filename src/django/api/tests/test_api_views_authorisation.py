@@ -757,3 +757,200 @@ class TestScheduleAuthorisation:
         response = api_client.post(url, {}, format="json")
 
         assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_user_store_access_loaded_once(
+    manager, store, store_associate_manager, django_assert_num_queries
+):
+    """
+    Test that a user's store access is loaded once (then shared via the cache) and answers store checks
+    without further queries.
+    """
+    other_store = Store.objects.get(code="OTHRSTR1")
+    other_store.is_active = False
+    other_store.save()
+    unrelated_store = Store.objects.create(
+        name="Unrelated Store",
+        code="UNRELATD",
+        location_street="1 Side St",
+        location_latitude=1.0,
+        location_longitude=1.0,
+        store_pin="002",
+    )
+
+    # User (1) + store access (1)
+    with django_assert_num_queries(2):
+        user = User.get_with_store_access(manager.id)
+
+    with django_assert_num_queries(0):
+        assert user.is_manager() is True
+        assert user.is_manager(store=store) is True
+        assert user.is_manager(store=str(store.id)) is True
+        assert user.is_manager(store=unrelated_store.id) is False
+        assert user.is_associated_with_store(store=store) is True
+        assert user.is_associated_with_store(store=other_store.id) is True
+        assert user.is_associated_with_store(store=unrelated_store) is False
+
+    # Store access is shared with later requests through the cache
+    with django_assert_num_queries(1):
+        assert User.get_with_store_access(manager.id).is_manager() is True
+
+    # Inactive stores are only listed for their managers
+    assert set(manager.get_associated_stores()) == {store, other_store}
+    assert set(manager.get_associated_stores(show_inactive_for_managers=False)) == {
+        store
+    }
+
+
+@pytest.mark.django_db
+def test_user_store_access_follows_promotions(
+    manager,
+    employee,
+    store,
+    store_associate_manager,
+    store_associate_employee,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that promoting/demoting a user or deactivating a store is reflected by the cached store access.
+    """
+    assert employee.is_manager(store=store) is False
+    assert manager.is_manager_of(employee) is True
+
+    access = StoreUserAccess.objects.get(user=employee, store=store)
+    access.is_manager = True
+    with django_capture_on_commit_callbacks(execute=True):
+        access.save()
+    assert employee.is_manager(store=store) is True
+
+    with django_capture_on_commit_callbacks(execute=True):
+        StoreUserAccess.objects.get(user=manager, store=store).delete()
+    assert manager.is_manager(store=store) is False
+    assert manager.is_associated_with_store(store=store) is False
+    assert manager.is_manager_of(employee) is False
+
+    store.is_active = False
+    with django_capture_on_commit_callbacks(execute=True):
+        store.save()
+    assert list(employee.get_associated_stores(show_inactive_for_managers=False)) == []
+
+    # A request's user keeps its store access until cleared
+    user = User.get_with_store_access(employee.id)
+    access.is_manager = False
+    with django_capture_on_commit_callbacks(execute=True):
+        access.save()
+    assert user.is_manager(store=store) is True
+    user.clear_store_access()
+    assert user.is_manager(store=store) is False
+
+
+@pytest.mark.django_db
+def test_store_access_invalidated_on_commit(
+    employee,
+    store,
+    store_associate_employee,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that a change of store access only invalidates the cached store access once it commits, so a concurrent
+    request can't cache the access being replaced under the new version.
+    """
+    assert employee.is_manager(store=store) is False
+
+    access = StoreUserAccess.objects.get(user=employee, store=store)
+    with django_capture_on_commit_callbacks(execute=True):
+        access.is_manager = True
+        access.save()
+
+        # Not committed yet -> the other requests still read the committed (cached) access
+        assert User.get_cached_store_access(employee.id)[store.id][0] is False
+
+    assert User.get_cached_store_access(employee.id)[store.id][0] is True
+
+
+@pytest.mark.django_db
+def test_user_without_store_access_loaded_once(employee, django_assert_num_queries):
+    """
+    Test that a user without any store access is loaded correctly.
+    """
+    with django_assert_num_queries(2):
+        user = User.get_with_store_access(employee.id)
+
+    with django_assert_num_queries(0):
+        assert user.is_manager() is False
+        assert user.is_associated_with_store(store=1) is False
+
+
+@pytest.mark.django_db
+def test_session_manager_flag_follows_promotions(
+    logged_in_employee,
+    employee,
+    store,
+    store_associate_employee,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that a user promoted to manager after logging in can access manager endpoints (and vice versa).
+    """
+    api_client = logged_in_employee
+    url = reverse("api:list_store_roles", args=[store.id])
+    assert api_client.session["is_some_store_manager"] is False
+
+    access = StoreUserAccess.objects.get(user=employee, store=store)
+    access.is_manager = True
+    with django_capture_on_commit_callbacks(execute=True):
+        access.save()
+
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert api_client.session["is_some_store_manager"] is True
+
+    access.is_manager = False
+    with django_capture_on_commit_callbacks(execute=True):
+        access.save()
+
+    response = api_client.get(url)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+    assert api_client.session["is_some_store_manager"] is False
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url_name, with_store_arg, num_queries",
+    [
+        # User (1) + store (1) + employee list (1) -> store access is cached
+        ("api:list_store_employee_names", False, 3),
+        # User (1) + store (1) + roles (2)
+        ("api:list_store_roles", True, 4),
+        # User (1) + store (1) + exceptions count & page (2)
+        ("api:list_store_exceptions", True, 4),
+    ],
+)
+def test_request_principal_reused_by_view(
+    logged_in_manager,
+    store,
+    store_associate_manager,
+    store_associate_employee,
+    django_assert_num_queries,
+    url_name,
+    with_store_arg,
+    num_queries,
+):
+    """
+    Test that the user (and their store access) loaded by the auth decorator is reused by the view
+    instead of being loaded again for each permission check.
+    """
+    api_client = logged_in_manager
+    if with_store_arg:
+        url, params = reverse(url_name, args=[store.id]), {}
+    else:
+        url, params = reverse(url_name), {"store_id": store.id}
+
+    # Warm the store access cache (invalidated when the fixtures created the store access)
+    api_client.get(url, params)
+
+    with django_assert_num_queries(num_queries):
+        response = api_client.get(url, params)
+
+    assert response.status_code == status.HTTP_200_OK
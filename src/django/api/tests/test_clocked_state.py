@@ -0,0 +1,160 @@
+import pytest
+
+from datetime import timedelta
+from django.urls import reverse
+from django.db import connection
+from django.core.cache import caches
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now, localtime
+from auth_app.models import Activity
+from auth_app.clocked_state import get_clocked_state
+import api.controllers as controllers
+
+
+@pytest.fixture(autouse=True)
+def clear_clocked_state():
+    caches["clocked_state"].clear()
+    yield
+    caches["clocked_state"].clear()
+
+
+def _poll(api_client, store, **headers):
+    url = reverse("api:clocked_state")
+    with CaptureQueriesContext(connection) as ctx:
+        response = api_client.get(f"{url}?store_id={store.id}", **headers)
+    return response, [q["sql"] for q in ctx.captured_queries]
+
+
+@pytest.mark.django_db
+def test_clocked_state_served_from_cache(
+    logged_in_clocked_in_employee, clocked_in_employee, store
+):
+    """
+    Test that the first poll loads the clocked state from the database and later polls only authenticate the user.
+    """
+    api_client = logged_in_clocked_in_employee
+
+    response, _ = _poll(api_client, store)
+    assert response.status_code == 200
+    assert response.json()["clocked_in"] is True
+    assert get_clocked_state(clocked_in_employee.id, store.id)["clocked_in"] is True
+
+    cached_response, queries = _poll(api_client, store)
+    assert cached_response.json() == response.json()
+    assert len(queries) == 1  # The session's user (authentication)
+    assert "auth_app_activity" not in queries[0]
+
+
+@pytest.mark.django_db
+def test_clocked_state_etag(
+    logged_in_clocked_in_employee,
+    clocked_in_employee,
+    store,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that an unchanged clocked state is revalidated with its ETag, which changes after clocking out.
+    """
+    api_client = logged_in_clocked_in_employee
+
+    response, _ = _poll(api_client, store)
+    etag = response["ETag"]
+
+    not_modified, _ = _poll(api_client, store, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == etag
+
+    Activity.objects.filter(employee=clocked_in_employee).update(
+        login_time=localtime(now()) - timedelta(hours=3)
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        controllers.handle_clock_out(
+            employee_id=clocked_in_employee.id, deliveries=0, store_id=store.id
+        )
+
+    response, _ = _poll(api_client, store, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["clocked_in"] is False
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_clock_events_write_through(
+    store, employee, store_associate_employee, django_capture_on_commit_callbacks
+):
+    """
+    Test that clocking in/out and forced clock outs write the clocked state once committed.
+    """
+    with django_capture_on_commit_callbacks(execute=True):
+        activity = controllers.handle_clock_in(
+            employee_id=employee.id, store_id=store.id
+        )
+    assert get_clocked_state(employee.id, store.id) == {
+        "clocked_in": True,
+        "login_time": activity.login_time,
+        "login_timestamp": activity.login_timestamp,
+    }
+
+    Activity.objects.filter(pk=activity.pk).update(
+        login_time=activity.login_time - timedelta(hours=3),
+        login_timestamp=activity.login_timestamp - timedelta(hours=3),
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        controllers.handle_clock_out(
+            employee_id=employee.id, deliveries=0, store_id=store.id
+        )
+    assert get_clocked_state(employee.id, store.id)["clocked_in"] is False
+
+    caches["clocked_state"].clear()
+    Activity.objects.all().delete()
+    login = localtime(now()) - timedelta(hours=8)
+    Activity.objects.create(
+        employee=employee, store=store, login_time=login, login_timestamp=login
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        controllers.handle_store_forced_clock_out(store=store)
+    assert get_clocked_state(employee.id, store.id)["clocked_in"] is False
+
+
+@pytest.mark.django_db
+def test_manager_edits_write_through(
+    logged_in_manager,
+    store,
+    clocked_in_employee,
+    store_associate_manager,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that a manager deleting an employee's ongoing activity clocks them out of the cached state.
+    """
+    activity = Activity.objects.get(employee=clocked_in_employee)
+    controllers.get_employee_clocked_info(clocked_in_employee.id, store.id)
+    assert get_clocked_state(clocked_in_employee.id, store.id)["clocked_in"] is True
+
+    url = reverse("api:update_shift_details", kwargs={"id": activity.id})
+    with django_capture_on_commit_callbacks(execute=True):
+        response = logged_in_manager.delete(url)
+
+    assert response.status_code == 200
+    assert get_clocked_state(clocked_in_employee.id, store.id)["clocked_in"] is False
+
+
+@pytest.mark.django_db
+def test_cached_clocked_state_checks_store(
+    logged_in_clocked_in_employee,
+    clocked_in_employee,
+    store,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that a cached state isn't served for a store that was deactivated.
+    """
+    api_client = logged_in_clocked_in_employee
+    _poll(api_client, store)
+
+    store.is_active = False
+    with django_capture_on_commit_callbacks(execute=True):
+        store.save()
+
+    response, _ = _poll(api_client, store)
+    assert response.status_code == 409
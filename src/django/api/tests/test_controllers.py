@@ -1,11 +1,27 @@
 import pytest
+import threading
 import api.controllers as controllers
 import api.utils as util
 import api.exceptions as err
-from datetime import timedelta
-from django.utils.timezone import now
+from datetime import timedelta, datetime, time, date
+from freezegun import freeze_time
+from django.db import connection, transaction, OperationalError, IntegrityError
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now, make_aware, localtime
 from unittest.mock import patch
-from auth_app.models import User, Activity
+from auth_app.models import (
+    User,
+    Activity,
+    ActivityDailySummary,
+    StoreUserAccess,
+    Shift,
+    ShiftException,
+    Notification,
+    NotificationReceipt,
+    Store,
+)
+from auth_app.tasks import check_clocked_in_users
 
 
 @pytest.mark.django_db
@@ -159,3 +175,824 @@ def test_check_clocking_out_too_soon(employee, store):
         employee=employee, store=store, limit_mins=10
     )
     assert result is False  # Clocking out after adequate time
+
+
+def _run_concurrently(func, count):
+    """
+    Run `func` in `count` threads released at once, returning each call's result (or raised error).
+    """
+    barrier = threading.Barrier(count)
+    results = []
+
+    def run():
+        try:
+            barrier.wait()
+            results.append(func())
+        except Exception as e:
+            results.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("api.utils.queue_activity_public_holiday_check")
+def test_handle_clock_in_concurrent_taps(
+    mock_queue, employee, store, store_associate_employee
+):
+    """
+    Test that concurrent clock ins of an employee (i.e. a double tap) create only one activity.
+    """
+    results = _run_concurrently(
+        lambda: controllers.handle_clock_in(employee_id=employee.id, store_id=store.id),
+        count=5,
+    )
+
+    assert len([r for r in results if isinstance(r, Activity)]) == 1
+    assert all(
+        isinstance(r, (Activity, err.AlreadyClockedInError)) for r in results
+    ), results
+    assert Activity.objects.filter(employee=employee, store=store).count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_handle_clock_out_concurrent_taps(employee, store, store_associate_employee):
+    """
+    Test that concurrent clock outs of an employee close their activity only once.
+    """
+    login = now() - timedelta(hours=2)
+    activity = Activity.objects.create(
+        employee=employee, store=store, login_time=login, login_timestamp=login
+    )
+
+    results = _run_concurrently(
+        lambda: controllers.handle_clock_out(
+            employee_id=employee.id, deliveries=2, store_id=store.id
+        ),
+        count=5,
+    )
+
+    assert len([r for r in results if isinstance(r, Activity)]) == 1
+    assert all(
+        isinstance(r, (Activity, err.AlreadyClockedOutError)) for r in results
+    ), results
+    activity.refresh_from_db()
+    assert activity.logout_timestamp is not None
+    assert activity.deliveries == 2
+
+
+@pytest.mark.django_db
+def test_only_one_open_activity_per_store(employee, store):
+    """
+    Test that the database rejects a second ongoing activity of an employee in a store.
+    """
+    other_store = _create_second_store()
+    time = localtime(now())
+    assert controllers._create_open_activity(employee, store, time) is not None
+    assert controllers._create_open_activity(employee, store, time) is None
+    # Other stores (and finished activities) are unaffected
+    assert controllers._create_open_activity(employee, other_store, time) is not None
+    # Finished (more than the gap before the new clock in -> no overlap conflict)
+    Activity.objects.filter(store=store).update(
+        login_time=time - timedelta(hours=3),
+        logout_time=time - timedelta(hours=2),
+        logout_timestamp=time - timedelta(hours=2),
+    )
+    assert controllers._create_open_activity(employee, store, time) is not None
+
+    with pytest.raises(IntegrityError):
+        with transaction.atomic():
+            Activity.objects.bulk_create(
+                [
+                    Activity(
+                        employee=employee,
+                        store=store,
+                        login_time=time,
+                        work_date=time.date(),
+                    )
+                ]
+            )
+
+
+@pytest.mark.django_db
+def test_handle_clock_in_validates_with_single_query(
+    employee, store, store_associate_employee
+):
+    """
+    Test that a clock in is validated with one query (plus the insert), and rejected with one query.
+    """
+    with CaptureQueriesContext(connection) as ctx:
+        controllers.handle_clock_in(employee_id=employee.id, store_id=store.id)
+    queries = [q["sql"] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]
+    assert len(queries) == 2
+    assert "FOR UPDATE" in queries[0]
+
+    with CaptureQueriesContext(connection) as ctx:
+        with pytest.raises(err.AlreadyClockedInError):
+            controllers.handle_clock_in(employee_id=employee.id, store_id=store.id)
+    assert len([q for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]]) == 1
+
+
+@pytest.mark.django_db
+def test_handle_clock_in_errors(employee, inactive_employee, store):
+    """
+    Test that clocking in reports the errors in the same order of checks.
+    """
+    with pytest.raises(err.NotAssociatedWithStoreError):
+        controllers.handle_clock_in(employee_id=employee.id, store_id=store.id)
+    with pytest.raises(err.InactiveUserError):
+        controllers.handle_clock_in(employee_id=inactive_employee.id, store_id=store.id)
+    with pytest.raises(User.DoesNotExist):
+        controllers.handle_clock_in(employee_id=999999, store_id=store.id)
+    with pytest.raises(Store.DoesNotExist):
+        controllers.handle_clock_in(employee_id=employee.id, store_id=999999)
+
+    StoreUserAccess.objects.create(user=employee, store=store)
+    logout = now() - timedelta(minutes=5)
+    Activity.objects.create(
+        employee=employee,
+        store=store,
+        login_time=logout - timedelta(hours=1),
+        login_timestamp=logout - timedelta(hours=1),
+        logout_time=logout,
+        logout_timestamp=logout,
+    )
+    with pytest.raises(err.StartingShiftTooSoonError):
+        controllers.handle_clock_in(employee_id=employee.id, store_id=store.id)
+
+    with pytest.raises(err.AlreadyClockedOutError):
+        controllers.handle_clock_out(
+            employee_id=employee.id, deliveries=0, store_id=store.id
+        )
+
+
+def _create_finished_activity(
+    employee, store, login, length_mins, is_public_holiday=False
+):
+    logout = login + timedelta(minutes=length_mins)
+    return Activity.objects.create(
+        employee=employee,
+        store=store,
+        login_time=login,
+        login_timestamp=login,
+        logout_time=logout,
+        logout_timestamp=logout,
+        shift_length_mins=length_mins,
+        is_public_holiday=is_public_holiday,
+        deliveries=1,
+    )
+
+
+@pytest.mark.django_db
+def test_get_account_summaries_day_type_breakdown(employee, store):
+    """
+    Test that minutes are split into weekday, weekend and public holiday buckets by the LOCAL weekday.
+    """
+    StoreUserAccess.objects.create(user=employee, store=store)
+
+    # 2025-06-06 is a Friday, 2025-06-07 a Saturday (local time)
+    _create_finished_activity(employee, store, make_aware(datetime(2025, 6, 6, 9)), 120)
+    # Saturday 00:30 local is still Friday in UTC -> must count as weekend
+    _create_finished_activity(
+        employee, store, make_aware(datetime(2025, 6, 7, 0, 30)), 60
+    )
+    # Public holidays are never counted as a weekday/weekend
+    _create_finished_activity(
+        employee, store, make_aware(datetime(2025, 6, 2, 9)), 90, is_public_holiday=True
+    )
+    # Unfinished shifts are ignored for the breakdown
+    Activity.objects.create(
+        employee=employee,
+        store=store,
+        login_time=make_aware(datetime(2025, 6, 3, 9)),
+        login_timestamp=make_aware(datetime(2025, 6, 3, 9)),
+    )
+
+    summaries, total = controllers.get_account_summaries(
+        store_id=store.id,
+        start_date="2025-06-01",
+        end_date="2025-06-08",
+        sort_field="name",
+        filter_names=[],
+    )
+
+    assert total == 1
+    summary = summaries[0]
+    assert summary["hours_total"] == 4.5
+    assert summary["hours_weekday"] == 2.0
+    assert summary["hours_weekend"] == 1.0
+    assert summary["hours_public_holiday"] == 1.5
+    assert summary["deliveries"] == 3
+
+
+@pytest.mark.django_db
+def test_get_account_summaries_constant_query_count(employee, store):
+    """
+    Test that the number of queries for account summaries does not grow with the number of employees.
+    """
+    StoreUserAccess.objects.create(user=employee, store=store)
+    _create_finished_activity(employee, store, make_aware(datetime(2025, 6, 6, 9)), 120)
+
+    def count_summary_queries():
+        with CaptureQueriesContext(connection) as ctx:
+            summaries, _ = controllers.get_account_summaries(
+                store_id=store.id,
+                start_date="2025-06-01",
+                end_date="2025-06-08",
+                sort_field="name",
+                filter_names=[],
+            )
+        return len(ctx.captured_queries), len(summaries)
+
+    single_queries, single_count = count_summary_queries()
+    assert single_count == 1
+
+    for i in range(10):
+        emp = User.objects.create(
+            first_name=f"Extra{i}",
+            last_name="Employee",
+            email=f"extra{i}@example.com",
+            is_active=True,
+            is_setup=True,
+        )
+        StoreUserAccess.objects.create(user=emp, store=store)
+        _create_finished_activity(emp, store, make_aware(datetime(2025, 6, 7, 9)), 60)
+
+    many_queries, many_count = count_summary_queries()
+    assert many_count == 11
+    assert many_queries == single_queries
+
+
+@pytest.mark.django_db
+def test_activity_daily_summary_follows_activity_changes(employee, store):
+    """
+    Test that the daily rollups are kept up to date when activities are saved, moved and deleted.
+    """
+    friday = make_aware(datetime(2025, 6, 6, 9))
+    activity = _create_finished_activity(employee, store, friday, 120)
+
+    summary = ActivityDailySummary.objects.get(employee=employee, store=store)
+    assert summary.date == friday.date()
+    assert summary.mins_total == 120
+    assert summary.mins_weekday == 120
+    assert summary.shift_count == 1
+    assert summary.deliveries == 1
+
+    # Move the activity to the Saturday (as done when a manager edits the activity)
+    saturday = make_aware(datetime(2025, 6, 7, 9))
+    activity.login_time = activity.login_timestamp = saturday
+    activity.logout_time = activity.logout_timestamp = saturday + timedelta(hours=2)
+    activity.save()
+    ActivityDailySummary.rebuild_for_activity(activity, date=friday.date())
+
+    summary = ActivityDailySummary.objects.get(employee=employee, store=store)
+    assert summary.date == saturday.date()
+    assert summary.mins_weekday == 0
+    assert summary.mins_weekend == 120
+
+    # Deleting the activity removes the rollup for the day
+    activity.delete()
+    assert not ActivityDailySummary.objects.filter(employee=employee).exists()
+
+    # As does deleting activities in bulk (i.e. the admin site), keeping the other activities of the day
+    _create_finished_activity(employee, store, friday, 120)
+    evening = _create_finished_activity(
+        employee, store, friday + timedelta(hours=5), 60
+    )
+    _create_finished_activity(employee, store, saturday, 30)
+    Activity.objects.filter(
+        Q(login_time=saturday) | Q(pk=evening.pk), employee=employee
+    ).delete()
+
+    summary = ActivityDailySummary.objects.get(employee=employee, store=store)
+    assert summary.date == friday.date()
+    assert summary.mins_total == 120
+    assert summary.shift_count == 1
+
+
+def _create_clocked_in_employee(store, name, login, is_hidden=False):
+    emp = User.objects.create(
+        first_name=name,
+        last_name="Employee",
+        email=f"{name.lower()}@example.com",
+        is_active=True,
+        is_setup=True,
+        is_hidden=is_hidden,
+    )
+    StoreUserAccess.objects.create(user=emp, store=store)
+    Activity.objects.create(
+        employee=emp, store=store, login_time=login, login_timestamp=login
+    )
+    return emp
+
+
+# 22:50 local -> rounds to a 22:45 logout time
+FORCED_CLOCK_OUT_TIME = datetime(2025, 6, 6, 22, 50)
+
+
+@pytest.mark.django_db
+def test_activity_work_date_is_local_login_date(employee, store):
+    """
+    Test that an activity's work date is the LOCAL date of its login time (not the UTC date), following edits.
+    """
+    # Just after and before midnight (one of them is on another day in UTC)
+    early = Activity.objects.create(
+        employee=employee,
+        store=store,
+        login_time=make_aware(datetime(2025, 3, 4, 0, 30)),
+        login_timestamp=make_aware(datetime(2025, 3, 4, 0, 30)),
+        logout_time=make_aware(datetime(2025, 3, 4, 8, 30)),
+        logout_timestamp=make_aware(datetime(2025, 3, 4, 8, 30)),
+    )
+    late = Activity.objects.create(
+        employee=employee,
+        store=store,
+        login_time=make_aware(datetime(2025, 3, 4, 23, 30)),
+        login_timestamp=make_aware(datetime(2025, 3, 4, 23, 30)),
+        logout_time=make_aware(datetime(2025, 3, 4, 23, 45)),
+        logout_timestamp=make_aware(datetime(2025, 3, 4, 23, 45)),
+    )
+    assert early.work_date == late.work_date == date(2025, 3, 4)
+    assert set(
+        Activity.objects.filter(work_date=date(2025, 3, 4)).values_list("id", flat=True)
+    ) == set(
+        Activity.objects.filter(login_time__date=date(2025, 3, 4)).values_list(
+            "id", flat=True
+        )
+    )
+
+    early.login_time -= timedelta(hours=1)
+    early.save()
+    early.refresh_from_db()
+    assert early.work_date == date(2025, 3, 3)
+
+    StoreUserAccess.objects.create(user=employee, store=store)
+    clocked_in = controllers.handle_clock_in(employee_id=employee.id, store_id=store.id)
+    clocked_in.refresh_from_db()
+    assert clocked_in.work_date == localtime(clocked_in.login_time).date()
+
+
+@pytest.mark.django_db
+def test_handle_store_forced_clock_out(store):
+    """
+    Test that every open activity of the store is closed at once, with its exceptions and rollups.
+    """
+    day = FORCED_CLOCK_OUT_TIME.date()
+    perfect = _create_clocked_in_employee(
+        store, "Perfect", make_aware(datetime(2025, 6, 6, 9))
+    )
+    # Morning clock in (still the previous day in UTC)
+    early = _create_clocked_in_employee(
+        store, "Early", make_aware(datetime(2025, 6, 6, 7))
+    )
+    unrostered = _create_clocked_in_employee(
+        store, "Unrostered", make_aware(datetime(2025, 6, 6, 12))
+    )
+    hidden = _create_clocked_in_employee(
+        store, "Hidden", make_aware(datetime(2025, 6, 6, 12)), is_hidden=True
+    )
+
+    perfect_shift = Shift.objects.create(
+        store=store,
+        employee=perfect,
+        date=day,
+        start_time=time(9, 0),
+        end_time=time(22, 45),
+    )
+    early_shift = Shift.objects.create(
+        store=store,
+        employee=early,
+        date=day,
+        start_time=time(7, 0),
+        end_time=time(15, 0),
+    )
+
+    with freeze_time(make_aware(FORCED_CLOCK_OUT_TIME)):
+        activities = controllers.handle_store_forced_clock_out(store=store)
+
+    assert {a.employee_id for a in activities} == {perfect.id, early.id, unrostered.id}
+    for activity in Activity.objects.filter(id__in=[a.id for a in activities]):
+        assert localtime(activity.logout_time) == make_aware(
+            datetime(2025, 6, 6, 22, 45)
+        )
+        assert activity.deliveries == 0
+        assert (
+            activity.shift_length_mins
+            == (activity.logout_time - activity.login_time).total_seconds() // 60
+        )
+
+    assert Activity.objects.get(employee=hidden).logout_time is None
+    assert Activity.objects.get(employee=perfect).shift_length_mins == 825
+
+    assert not ShiftException.objects.filter(shift=perfect_shift).exists()
+    assert (
+        ShiftException.objects.get(shift=early_shift).reason
+        == ShiftException.Reason.INCORRECTLY_CLOCKED
+    )
+    assert (
+        ShiftException.objects.get(activity__employee=unrostered).reason
+        == ShiftException.Reason.NO_SHIFT
+    )
+
+    summary = ActivityDailySummary.objects.get(employee=perfect, store=store, date=day)
+    assert summary.mins_total == 825 and summary.shift_count == 1
+
+    # Nothing left to clock out
+    assert controllers.handle_store_forced_clock_out(store=store) == []
+
+
+@pytest.mark.django_db
+def test_handle_store_forced_clock_out_constant_query_count(store):
+    """
+    Test that the number of queries to forcefully clock out a store does not grow with the number of employees.
+    """
+    day = FORCED_CLOCK_OUT_TIME.date()
+
+    def count_forced_clock_out_queries(count):
+        for i in range(count):
+            emp = _create_clocked_in_employee(
+                store, f"Emp{count}x{i}", make_aware(datetime(2025, 6, 6, 9))
+            )
+            Shift.objects.create(
+                store=store,
+                employee=emp,
+                date=day,
+                start_time=time(9, 0),
+                end_time=time(22, 45),
+            )
+
+        with freeze_time(make_aware(FORCED_CLOCK_OUT_TIME)), CaptureQueriesContext(
+            connection
+        ) as ctx:
+            assert len(controllers.handle_store_forced_clock_out(store=store)) == count
+        return len(ctx.captured_queries)
+
+    assert count_forced_clock_out_queries(1) == count_forced_clock_out_queries(8)
+    assert not ShiftException.objects.exists()
+
+
+@pytest.mark.django_db
+def test_check_clocked_in_users_sends_single_employee_notification(
+    store, manager, celery_eager
+):
+    """
+    Test that the end of day task clocks everyone out and alerts the employees with ONE notification.
+    """
+    StoreUserAccess.objects.create(user=manager, store=store, is_manager=True)
+    employees = [
+        _create_clocked_in_employee(
+            store, f"Late{i}", make_aware(datetime(2025, 6, 6, 17))
+        )
+        for i in range(3)
+    ]
+
+    with freeze_time(make_aware(FORCED_CLOCK_OUT_TIME)):
+        check_clocked_in_users()
+
+    assert not Activity.objects.filter(logout_time__isnull=True).exists()
+
+    employee_notif = Notification.objects.get(
+        recipient_group=Notification.RecipientType.INDIVIDUAL
+    )
+    assert set(
+        NotificationReceipt.objects.filter(notification=employee_notif).values_list(
+            "user_id", flat=True
+        )
+    ) == {emp.id for emp in employees}
+    assert Notification.objects.filter(
+        recipient_group=Notification.RecipientType.STORE_MANAGERS, store=store
+    ).exists()
+
+
+def _create_second_store():
+    return Store.objects.create(
+        name="Second Store",
+        code="TST002",
+        location_street="456 Main St",
+        location_latitude=1.0,
+        location_longitude=1.0,
+        allowable_clocking_dist_m=500,
+        store_pin="001",
+        is_active=True,
+    )
+
+
+@pytest.mark.django_db
+def test_check_clocked_in_users_reports_failed_store(store, celery_eager):
+    """
+    Test that a store failing to clock out doesn't stop the other stores and is reported to the admins once.
+    """
+    other_store = _create_second_store()
+    failing = _create_clocked_in_employee(
+        store, "Failing", make_aware(datetime(2025, 6, 6, 17))
+    )
+    working = _create_clocked_in_employee(
+        other_store, "Working", make_aware(datetime(2025, 6, 6, 17))
+    )
+
+    def clock_out(store, deliveries=0):
+        if store.code == "TST001":
+            raise ValueError("Store is broken")
+        return controllers.handle_store_forced_clock_out(store, deliveries)
+
+    with freeze_time(make_aware(FORCED_CLOCK_OUT_TIME)), patch(
+        "auth_app.tasks.handle_store_forced_clock_out", side_effect=clock_out
+    ):
+        check_clocked_in_users()
+
+    assert Activity.objects.get(employee=failing).logout_time is None
+    assert Activity.objects.get(employee=working).logout_time is not None
+
+    admin_notif = Notification.objects.get(
+        recipient_group=Notification.RecipientType.SITE_ADMINS
+    )
+    assert "[TST001]" in admin_notif.message
+    assert "TST002" not in admin_notif.message
+
+
+@pytest.mark.django_db
+def test_check_clocked_in_users_retries_database_errors(store, celery_eager):
+    """
+    Test that a store's part of the job is retried on a database connection error.
+    """
+    emp = _create_clocked_in_employee(
+        store, "Retried", make_aware(datetime(2025, 6, 6, 17))
+    )
+
+    def clock_out(store, deliveries=0):
+        if mock_clock_out.call_count == 1:
+            raise OperationalError("Connection lost")
+        return controllers.handle_store_forced_clock_out(store, deliveries)
+
+    with freeze_time(make_aware(FORCED_CLOCK_OUT_TIME)), patch(
+        "auth_app.tasks.handle_store_forced_clock_out", side_effect=clock_out
+    ) as mock_clock_out:
+        check_clocked_in_users()
+
+    assert mock_clock_out.call_count == 2
+    assert Activity.objects.get(employee=emp).logout_time is not None
+    assert not Notification.objects.filter(
+        recipient_group=Notification.RecipientType.SITE_ADMINS
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_check_clocked_in_users_retry_still_notifies(store, celery_eager):
+    """
+    Test that a database error while notifying rolls back the store's clock outs, so the retry notifies everyone.
+    """
+    emp = _create_clocked_in_employee(
+        store, "Notified", make_aware(datetime(2025, 6, 6, 17))
+    )
+    send_to_users = Notification.send_to_users
+
+    def send(*args, **kwargs):
+        if mock_send.call_count == 1:
+            raise OperationalError("Connection lost")
+        return send_to_users(*args, **kwargs)
+
+    with freeze_time(make_aware(FORCED_CLOCK_OUT_TIME)), patch(
+        "auth_app.tasks.Notification.send_to_users", side_effect=send
+    ) as mock_send:
+        check_clocked_in_users()
+
+    assert Activity.objects.get(employee=emp).logout_time is not None
+    employee_notif = Notification.objects.get(
+        recipient_group=Notification.RecipientType.INDIVIDUAL
+    )
+    assert list(
+        NotificationReceipt.objects.filter(notification=employee_notif).values_list(
+            "user_id", flat=True
+        )
+    ) == [emp.id]
+
+
+def _create_reconciliation_scenario(store):
+    """
+    Create shifts/activities/exceptions covering every linking outcome over 3 (local) days.
+    """
+    emp1 = _create_clocked_in_employee(
+        store, "Recon1", make_aware(datetime(2025, 6, 1, 9))
+    )
+    emp2 = _create_clocked_in_employee(
+        store, "Recon2", make_aware(datetime(2025, 6, 1, 9))
+    )
+    Activity.objects.filter(employee__in=[emp1, emp2]).delete()
+
+    def shift(emp, day, start, end):
+        return Shift.objects.create(
+            store=store,
+            employee=emp,
+            date=datetime(2025, 6, day).date(),
+            start_time=time(*start),
+            end_time=time(*end),
+        )
+
+    def activity(emp, day, start, end):
+        login = make_aware(datetime(2025, 6, day, *start))
+        logout = make_aware(datetime(2025, 6, day, *end))
+        return _create_finished_activity(
+            emp, store, login, int((logout - login).total_seconds() // 60)
+        )
+
+    # Perfect, missed and incorrectly clocked shifts
+    shift(emp1, 2, (9, 0), (17, 0))
+    activity(emp1, 2, (9, 0), (17, 0))
+    shift(emp1, 3, (9, 0), (17, 0))
+    shift(emp1, 4, (9, 0), (17, 0))
+    activity(emp1, 4, (9, 15), (17, 0))
+
+    # Two shifts with one (morning -> previous UTC day) activity
+    shift(emp2, 2, (7, 0), (11, 0))
+    shift(emp2, 2, (13, 0), (17, 0))
+    activity(emp2, 2, (7, 0), (11, 0))
+
+    # Activity with an existing NO_SHIFT exception that now has a perfect shift
+    no_shift = activity(emp2, 3, (9, 0), (17, 0))
+    ShiftException.objects.create(
+        activity=no_shift, reason=ShiftException.Reason.NO_SHIFT
+    )
+    shift(emp2, 3, (9, 0), (17, 0))
+
+    # Shift with an existing MISSED_SHIFT exception that now has an incorrect activity
+    missed = shift(emp2, 4, (9, 0), (17, 0))
+    ShiftException.objects.create(
+        shift=missed, reason=ShiftException.Reason.MISSED_SHIFT
+    )
+    activity(emp2, 4, (10, 0), (17, 0))
+
+
+def _snapshot_shift_exceptions():
+    return sorted(
+        ShiftException.objects.values_list(
+            "shift_id", "activity_id", "reason", "is_approved"
+        ),
+        key=lambda row: (row[0] or 0, row[1] or 0),
+    )
+
+
+@pytest.mark.django_db
+def test_reconcile_store_shift_exceptions_matches_linking_each_shift(store):
+    """
+    Test that reconciling a store in bulk has the same outcome as linking each shift individually.
+    """
+    _create_reconciliation_scenario(store)
+    start, end = datetime(2025, 6, 1).date(), datetime(2025, 6, 5).date()
+
+    with transaction.atomic():
+        expected_results = {
+            s.id: controllers.link_activity_to_shift(shift=s)
+            for s in Shift.objects.select_related("store")
+            .filter(store=store, date__range=(start, end), is_deleted=False)
+            .order_by("date", "start_time", "id")
+        }
+        expected = _snapshot_shift_exceptions()
+        transaction.set_rollback(True)
+
+    results = controllers.reconcile_store_shift_exceptions(
+        store=store, start_date=start, end_date=end
+    )
+
+    # Linking a shift reconciles its whole day -> only compare the reasons (created flags move to the first shift of the day)
+    assert {shift_id: reason for shift_id, (reason, _) in results.items()} == {
+        shift_id: reason for shift_id, (reason, _) in expected_results.items()
+    }
+    assert _snapshot_shift_exceptions() == expected
+    assert {reason for reason, _ in results.values()} == {
+        None,
+        ShiftException.Reason.MISSED_SHIFT,
+        ShiftException.Reason.INCORRECTLY_CLOCKED,
+    }
+
+    # Running again changes nothing
+    results = controllers.reconcile_store_shift_exceptions(
+        store=store, start_date=start, end_date=end
+    )
+    assert not any(created for _, created in results.values())
+    assert _snapshot_shift_exceptions() == expected
+
+
+@pytest.mark.django_db
+def test_reconcile_store_shift_exceptions_constant_query_count(store):
+    """
+    Test that the number of queries to reconcile a store does not grow with the number of shifts.
+    """
+    start, end = datetime(2025, 6, 1).date(), datetime(2025, 6, 30).date()
+
+    def count_reconcile_queries():
+        with CaptureQueriesContext(connection) as ctx:
+            controllers.reconcile_store_shift_exceptions(
+                store=store, start_date=start, end_date=end
+            )
+        return len(ctx.captured_queries)
+
+    _create_reconciliation_scenario(store)
+    ShiftException.objects.all().delete()
+    few_queries = count_reconcile_queries()
+
+    emp = User.objects.get(first_name="Recon1")
+    for day in range(10, 30):
+        Shift.objects.create(
+            store=store,
+            employee=emp,
+            date=datetime(2025, 6, day).date(),
+            start_time=time(9, 0),
+            end_time=time(17, 0),
+        )
+    ShiftException.objects.all().delete()
+
+    assert count_reconcile_queries() == few_queries
+    # The 20 new shifts + the 2 missed shifts of the scenario
+    missed = ShiftException.objects.filter(reason=ShiftException.Reason.MISSED_SHIFT)
+    assert missed.count() == 22
+
+
+@pytest.mark.django_db
+def test_link_activity_to_shift_split_shift_clock_outs(store, employee):
+    """
+    Test that clocking out of the first half of a split shift doesn't touch the second half (not yet ended)
+    and that the day's exceptions follow edits without duplicates.
+    """
+    day = datetime(2025, 6, 6).date()
+    first = Shift.objects.create(
+        store=store,
+        employee=employee,
+        date=day,
+        start_time=time(9, 0),
+        end_time=time(13, 0),
+    )
+    second = Shift.objects.create(
+        store=store,
+        employee=employee,
+        date=day,
+        start_time=time(17, 0),
+        end_time=time(21, 0),
+    )
+
+    with freeze_time(make_aware(datetime(2025, 6, 6, 13, 5))):
+        morning = _create_finished_activity(
+            employee, store, make_aware(datetime(2025, 6, 6, 9)), 240
+        )
+        assert controllers.link_activity_to_shift(activity=morning) == (None, False)
+        assert not ShiftException.objects.exists()
+
+    with freeze_time(make_aware(datetime(2025, 6, 6, 21, 5))):
+        evening = _create_finished_activity(
+            employee, store, make_aware(datetime(2025, 6, 6, 17, 30)), 210
+        )
+        assert controllers.link_activity_to_shift(activity=evening) == (
+            ShiftException.Reason.INCORRECTLY_CLOCKED,
+            True,
+        )
+
+        exception = ShiftException.objects.get()
+        assert (exception.shift_id, exception.activity_id) == (second.id, evening.id)
+
+        # Fixing the activity approves the existing exception
+        evening.login_time = make_aware(datetime(2025, 6, 6, 17))
+        evening.save()
+        assert controllers.link_activity_to_shift(activity=evening) == (None, False)
+        exception.refresh_from_db()
+        assert exception.is_approved
+        assert ShiftException.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_link_activity_to_shift_merges_exceptions(store, employee):
+    """
+    Test that a lone activity's NO_SHIFT exception and a lone shift's MISSED_SHIFT exception are merged once they link.
+    """
+    day = datetime(2025, 6, 6).date()
+    activity = _create_finished_activity(
+        employee, store, make_aware(datetime(2025, 6, 6, 9, 15)), 465
+    )
+    no_shift = ShiftException.objects.create(
+        activity=activity, reason=ShiftException.Reason.NO_SHIFT
+    )
+    shift = Shift.objects.create(
+        store=store,
+        employee=employee,
+        date=day,
+        start_time=time(9, 0),
+        end_time=time(17, 0),
+    )
+    missed = ShiftException.objects.create(
+        shift=shift, reason=ShiftException.Reason.MISSED_SHIFT
+    )
+
+    assert controllers.link_activity_to_shift(shift=shift) == (
+        ShiftException.Reason.INCORRECTLY_CLOCKED,
+        False,
+    )
+
+    exception = ShiftException.objects.get()
+    assert exception.id == no_shift.id
+    assert (exception.shift_id, exception.activity_id) == (shift.id, activity.id)
+    assert exception.reason == ShiftException.Reason.INCORRECTLY_CLOCKED
+    assert not ShiftException.objects.filter(id=missed.id).exists()
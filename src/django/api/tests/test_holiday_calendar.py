@@ -0,0 +1,232 @@
+import json
+import pytest
+import threading
+import api.utils as util
+import api.holiday_calendar as holiday_calendar
+
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from freezegun import freeze_time
+from django.utils import timezone
+from django.core.cache import caches
+from django.utils.timezone import make_aware, localtime, now
+from unittest.mock import patch
+from auth_app.models import Activity, PublicHolidayOverride
+from auth_app.tasks import (
+    refresh_public_holiday_overrides,
+    reconcile_public_holiday_flags,
+    update_activity_public_holiday,
+)
+
+
+STUB_HOLIDAYS_2025 = [
+    # Already in the offline calendar
+    {
+        "date": "2025-01-01",
+        "localName": "New Year's Day",
+        "global": True,
+        "counties": None,
+        "types": ["Public"],
+    },
+    # Only applies to the configured region (AU-WA) and is missing from the offline calendar
+    {
+        "date": "2025-03-14",
+        "localName": "Stub Holiday",
+        "global": False,
+        "counties": ["AU-WA"],
+        "types": ["Public"],
+    },
+    # Another region
+    {
+        "date": "2025-03-20",
+        "localName": "Other Region Day",
+        "global": False,
+        "counties": ["AU-NSW"],
+        "types": ["Public"],
+    },
+    # Not a public holiday
+    {
+        "date": "2025-03-21",
+        "localName": "Bank Day",
+        "global": True,
+        "counties": None,
+        "types": ["Bank"],
+    },
+]
+
+
+class StubHolidayAPIHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/PublicHolidays/2025/AU":
+            body = json.dumps(STUB_HOLIDAYS_2025).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def clear_holiday_cache():
+    caches["holiday_checks"].clear()
+    yield
+    caches["holiday_checks"].clear()
+
+
+@pytest.fixture
+def stub_holiday_api(settings):
+    """
+    Serve the remote holiday API locally for the duration of a test.
+    """
+    server = HTTPServer(("127.0.0.1", 0), StubHolidayAPIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.PUBLIC_HOLIDAY_API_URL = f"http://127.0.0.1:{server.server_port}/"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+def test_is_public_holiday_uses_no_network():
+    """
+    Test that public holiday checks are answered offline from the calendar.
+    """
+    with patch("requests.get", side_effect=AssertionError("Network used")):
+        assert util.is_public_holiday(make_aware(datetime(2025, 12, 25, 9))) is True
+        assert util.is_public_holiday(make_aware(datetime(2025, 6, 10, 9))) is False
+        # Naive datetimes are treated as local time
+        assert util.is_public_holiday(datetime(2025, 1, 1, 23, 30)) is True
+
+
+@pytest.mark.django_db
+def test_offline_calendar_year_built_once():
+    """
+    Test that the offline calendar is only built once per year per process.
+    """
+    holiday_calendar._year_index.pop(("AU", "WA", 2031), None)
+
+    with patch(
+        "api.holiday_calendar.holidays.country_holidays", return_value={}
+    ) as builder:
+        holiday_calendar.is_public_holiday_date(date(2031, 5, 1))
+        holiday_calendar.is_public_holiday_date(date(2031, 8, 1))
+
+    assert builder.call_count == 1
+    holiday_calendar._year_index.pop(("AU", "WA", 2031), None)
+
+
+@pytest.mark.django_db
+def test_holiday_overrides_take_priority():
+    """
+    Test that overrides can add and remove holidays, and that changing them invalidates the cache.
+    """
+    added = date(2025, 6, 10)
+    removed = date(2025, 12, 25)
+    assert holiday_calendar.is_public_holiday_date(added) is False
+    assert holiday_calendar.is_public_holiday_date(removed) is True
+
+    PublicHolidayOverride.objects.create(date=added, name="Extra Holiday")
+    override = PublicHolidayOverride.objects.create(
+        date=removed, is_public_holiday=False
+    )
+
+    assert holiday_calendar.is_public_holiday_date(added) is True
+    assert holiday_calendar.is_public_holiday_date(removed) is False
+
+    override.delete()
+    assert holiday_calendar.is_public_holiday_date(removed) is True
+
+
+@pytest.mark.django_db
+def test_sync_holiday_overrides_from_stub_api(stub_holiday_api):
+    """
+    Test that syncing from the (stubbed) remote API only adds missing regional holidays,
+    removes stale API overrides and keeps manual overrides.
+    """
+    PublicHolidayOverride.objects.create(
+        date=date(2025, 5, 5), source=PublicHolidayOverride.Source.API
+    )
+    PublicHolidayOverride.objects.create(
+        date=date(2025, 5, 6), source=PublicHolidayOverride.Source.MANUAL
+    )
+
+    created, deleted = holiday_calendar.sync_holiday_overrides_from_api(year=2025)
+
+    assert (created, deleted) == (1, 1)
+    assert set(PublicHolidayOverride.objects.values_list("date", "source", "name")) == {
+        (date(2025, 3, 14), PublicHolidayOverride.Source.API, "Stub Holiday"),
+        (date(2025, 5, 6), PublicHolidayOverride.Source.MANUAL, ""),
+    }
+    assert holiday_calendar.is_public_holiday_date(date(2025, 3, 14)) is True
+    assert holiday_calendar.is_public_holiday_date(date(2025, 3, 20)) is False
+
+    # Running it again changes nothing
+    assert holiday_calendar.sync_holiday_overrides_from_api(year=2025) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_refresh_public_holiday_overrides_task(stub_holiday_api):
+    """
+    Test that the scheduled task syncs the overrides from the (stubbed) remote API.
+    """
+    refresh_public_holiday_overrides(years=[2025])
+
+    assert PublicHolidayOverride.objects.filter(
+        date=date(2025, 3, 14), source=PublicHolidayOverride.Source.API
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_update_activity_public_holiday_task(employee, store):
+    """
+    Test that the after-commit task sets the flag without marking the activity as modified.
+    """
+    login = make_aware(datetime(2025, 12, 25, 9))
+    activity = Activity.objects.create(
+        employee=employee, store=store, login_time=login, login_timestamp=login
+    )
+    last_updated_at = activity.last_updated_at
+
+    update_activity_public_holiday(activity.id)
+
+    activity.refresh_from_db()
+    assert activity.is_public_holiday is True
+    assert activity.last_updated_at == last_updated_at
+
+
+@freeze_time(datetime(2025, 12, 25, 9, 0, tzinfo=timezone.get_default_timezone()))
+@pytest.mark.django_db
+def test_reconcile_public_holiday_flags_keeps_manual_edits(employee, store):
+    """
+    Test that the nightly reconciliation fixes unmodified activities only.
+    """
+    christmas = localtime(now())
+    unchecked = Activity.objects.create(
+        employee=employee, store=store, login_time=christmas, login_timestamp=christmas
+    )
+
+    # Manager manually marked a regular day as a holiday (edited after clocking)
+    christmas_eve = christmas - timedelta(days=1)
+    edited = Activity.objects.create(
+        employee=employee,
+        store=store,
+        login_time=christmas_eve,
+        login_timestamp=christmas_eve,
+        logout_time=christmas_eve + timedelta(hours=1),
+        logout_timestamp=christmas_eve + timedelta(hours=1),
+        is_public_holiday=True,
+    )
+
+    reconcile_public_holiday_flags()
+
+    unchecked.refresh_from_db()
+    edited.refresh_from_db()
+    assert unchecked.is_public_holiday is True
+    assert edited.is_public_holiday is True
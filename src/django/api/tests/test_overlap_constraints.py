@@ -0,0 +1,420 @@
+import pytest
+import importlib
+
+from datetime import timedelta, datetime, time
+from django.db import connection, IntegrityError, transaction
+from django.core.exceptions import ValidationError
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now, localtime, make_aware
+from auth_app.models import (
+    Activity,
+    ActivityDailySummary,
+    Shift,
+    ShiftException,
+    Store,
+    ACTIVITY_OVERLAP_CONSTRAINT,
+    OPEN_ACTIVITY_CONSTRAINT,
+    SHIFT_OVERLAP_CONSTRAINT,
+)
+import api.controllers as controllers
+import api.exceptions as err
+import api.utils as util
+
+
+def _shift(employee, store, start, end, date=None, **kwargs):
+    return Shift(
+        employee=employee,
+        store=store,
+        date=date or localtime(now()).date() + timedelta(days=1),
+        start_time=time(*start),
+        end_time=time(*end),
+        **kwargs,
+    )
+
+
+def _inserted(obj) -> bool:
+    """Insert the shift/activity without validation, returning False if the database rejected it."""
+    try:
+        with transaction.atomic():
+            obj.__class__.objects.bulk_create([obj])
+        return True
+    except IntegrityError:
+        return False
+
+
+def _old_rule_conflicts(start, end, other_start, other_end, gap_mins=60):
+    """The former in-memory conflict check of two shifts on the same day."""
+    gap = timedelta(minutes=gap_mins)
+    day = datetime(2025, 1, 6)
+    start, end = day.replace(hour=start[0], minute=start[1]), day.replace(
+        hour=end[0], minute=end[1]
+    )
+    other_start, other_end = day.replace(
+        hour=other_start[0], minute=other_start[1]
+    ), day.replace(hour=other_end[0], minute=other_end[1])
+    return other_end > start - gap and other_start < end + gap
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "start, end",
+    [
+        ((9, 0), (17, 0)),  # Same
+        ((12, 0), (13, 0)),  # Inside
+        ((16, 0), (20, 0)),  # Overlapping
+        ((17, 30), (20, 0)),  # Too close after
+        ((18, 0), (20, 0)),  # Exactly the gap after
+        ((6, 0), (8, 30)),  # Too close before
+        ((6, 0), (8, 0)),  # Exactly the gap before
+        ((0, 0), (3, 0)),
+    ],
+)
+def test_shift_constraint_matches_conflict_rule(store, employee, start, end):
+    """
+    Test that the database rejects exactly the shifts the former conflict check rejected.
+    """
+    existing = _shift(employee, store, (9, 0), (17, 0))
+    existing.save()
+    expected = _old_rule_conflicts(start, end, (9, 0), (17, 0))
+
+    assert (
+        util.employee_has_conflicting_shifts(
+            employee.id, store.id, existing.date, time(*start), time(*end)
+        )
+        == expected
+    )
+
+    assert _inserted(_shift(employee, store, start, end)) != expected
+
+
+@pytest.mark.django_db
+def test_shift_constraint_scope(store, employee, employee_b):
+    """
+    Test that only shifts of the same employee, store and date conflict (shifts can end/start at midnight).
+    """
+    date = localtime(now()).date() + timedelta(days=1)
+    _shift(employee, store, (20, 0), (23, 59), date=date).save()
+    other_store = Store.objects.create(
+        name="Second Store",
+        code="TST002",
+        location_street="456 Main St",
+        location_latitude=1.0,
+        location_longitude=1.0,
+        allowable_clocking_dist_m=500,
+        store_pin="001",
+        is_active=True,
+    )
+
+    Shift.objects.bulk_create(
+        [
+            _shift(employee, store, (0, 0), (4, 0), date=date + timedelta(days=1)),
+            _shift(employee_b, store, (20, 0), (23, 59), date=date),
+            _shift(employee, other_store, (20, 0), (23, 59), date=date),
+        ]
+    )
+
+    # Validated on save (full_clean) like the other constraints
+    with pytest.raises(ValidationError):
+        _shift(employee, store, (18, 0), (19, 30), date=date).save()
+
+
+@pytest.mark.django_db
+def test_bulk_create_skip_conflicts(store, employee, employee_b):
+    """
+    Test that conflicting shifts (with existing shifts or earlier ones in the batch) are skipped and reported,
+    with a single insert when nothing conflicts.
+    """
+    _shift(employee, store, (9, 0), (13, 0)).save()
+    shifts = [
+        _shift(employee, store, (13, 30), (17, 0)),  # Too close to the existing one
+        _shift(employee_b, store, (9, 0), (13, 0)),
+        _shift(employee_b, store, (12, 0), (15, 0)),  # Overlaps the previous one
+        _shift(employee, store, (18, 0), (20, 0)),
+    ]
+
+    skipped = Shift.objects.bulk_create_skip_conflicts(shifts)
+
+    assert skipped == [shifts[0], shifts[2]]
+    assert Shift.objects.count() == 3
+
+    Shift.objects.all().delete()
+    shifts = [
+        _shift(employee, store, (9, 0), (13, 0)),
+        _shift(employee_b, store, (9, 0), (13, 0)),
+    ]
+    with CaptureQueriesContext(connection) as ctx:
+        assert Shift.objects.bulk_create_skip_conflicts(shifts) == []
+    assert [
+        q["sql"].split()[0] for q in ctx.captured_queries if "SAVEPOINT" not in q["sql"]
+    ] == ["INSERT"]
+
+
+@pytest.mark.django_db
+def test_copy_week_schedule_override(store, employee):
+    """
+    Test that copying a week with overrides replaces the colliding shifts of the target week.
+    """
+    source_week = util.get_week_start(localtime(now()).date()) + timedelta(weeks=1)
+    target_week = source_week + timedelta(weeks=1)
+    _shift(employee, store, (9, 0), (17, 0), date=source_week).save()
+    _shift(
+        employee, store, (12, 0), (14, 0), date=source_week + timedelta(days=1)
+    ).save()
+    _shift(employee, store, (16, 0), (20, 0), date=target_week).save()
+    _shift(employee, store, (6, 0), (7, 0), date=target_week).save()  # Not colliding
+
+    result = controllers.copy_week_schedule(
+        store=store,
+        source_week=source_week,
+        target_week=target_week,
+        override_shifts=True,
+    )
+
+    assert result == {"created": 1, "updated": 1, "skipped": 0, "total": 2}
+    assert set(
+        Shift.objects.filter(date__gte=target_week).values_list(
+            "date", "start_time", "end_time"
+        )
+    ) == {
+        (target_week, time(6, 0), time(7, 0)),
+        (target_week, time(9, 0), time(17, 0)),
+        (target_week + timedelta(days=1), time(12, 0), time(14, 0)),
+    }
+
+
+def _activity(employee, store, login, logout=None):
+    return Activity(
+        employee=employee,
+        store=store,
+        login_time=login,
+        login_timestamp=login,
+        logout_time=logout,
+        logout_timestamp=logout,
+        work_date=Activity.get_work_date(login),
+    )
+
+
+@pytest.mark.django_db
+def test_activity_constraint(store, employee):
+    """
+    Test that the database rejects activities of the same day that conflict (an ongoing activity conflicts with
+    any later one), ignoring activities that took no time.
+    """
+    day = localtime(now()).date() - timedelta(days=1)
+    login = make_aware(datetime.combine(day, time(9, 0)))
+    Activity.objects.bulk_create(
+        [
+            _activity(employee, store, login, login + timedelta(hours=4)),
+            _activity(
+                employee,
+                store,
+                login + timedelta(hours=4, minutes=15),
+                login + timedelta(hours=4, minutes=15),
+            ),
+        ]
+    )
+
+    for proposed_login, proposed_logout, conflicts in [
+        (login + timedelta(hours=4, minutes=30), None, True),  # Too close
+        (login + timedelta(hours=5), login + timedelta(hours=6), False),
+        (login - timedelta(hours=2), None, True),  # Ongoing over the existing one
+        (login - timedelta(hours=2), login - timedelta(hours=1), False),
+    ]:
+        assert (
+            util.employee_has_conflicting_activities(
+                employee.id, store.id, proposed_login, proposed_logout
+            )
+            == conflicts
+        )
+        assert (
+            _inserted(_activity(employee, store, proposed_login, proposed_logout))
+            != conflicts
+        )
+        Activity.objects.filter(login_time=proposed_login).delete()
+
+
+@pytest.mark.django_db
+def test_clock_in_conflicting_with_later_activity(store, employee):
+    """
+    Test that a clock in conflicting with an activity entered later in the day is rejected (as starting too soon).
+    """
+    time = localtime(now()).replace(hour=9, minute=0, second=0, microsecond=0)
+    later = time + timedelta(minutes=30)
+    Activity.objects.bulk_create(
+        [_activity(employee, store, later, later + timedelta(hours=1))]
+    )
+
+    with pytest.raises(err.StartingShiftTooSoonError):
+        controllers._create_open_activity(employee=employee, store=store, time=time)
+
+
+@pytest.fixture
+def without_overlap_constraints(db):
+    """Drop the overlap constraints to insert the conflicting data existing before them, adding them back after."""
+    constraints = [
+        (model, next(c for c in model._meta.constraints if c.name == name))
+        for model, name in [
+            (Shift, SHIFT_OVERLAP_CONSTRAINT),
+            (Activity, ACTIVITY_OVERLAP_CONSTRAINT),
+        ]
+    ]
+    with connection.schema_editor() as editor:
+        for model, constraint in constraints:
+            editor.remove_constraint(model, constraint)
+
+    def add_back():
+        # Check the deferred foreign keys first
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        with connection.schema_editor() as editor:
+            for model, constraint in constraints:
+                editor.add_constraint(model, constraint)
+
+    return add_back
+
+
+def _resolve_conflicts():
+    from django.apps import apps
+
+    migration = importlib.import_module(
+        "auth_app.migrations.0059_shift_activity_overlap_constraints"
+    )
+    migration.resolve_conflicts(apps, connection.schema_editor())
+
+
+@pytest.mark.django_db
+def test_migration_removes_conflicting_deleted_shifts(
+    store, employee, without_overlap_constraints
+):
+    """
+    Test that soft deleted shifts conflicting with another shift are removed by the migration (detaching their
+    exceptions) so the constraints can be added.
+    """
+    date = localtime(now()).date() + timedelta(days=1)
+    kept_shift, soft_deleted_shift, other_soft_deleted_shift = (
+        Shift.objects.bulk_create(
+            [
+                _shift(employee, store, (9, 0), (13, 0), date=date),
+                _shift(employee, store, (8, 0), (10, 0), date=date, is_deleted=True),
+                _shift(employee, store, (13, 30), (15, 0), date=date, is_deleted=True),
+            ]
+        )
+    )
+    login = make_aware(datetime.combine(date - timedelta(days=2), time(9, 0)))
+    activity = Activity.objects.bulk_create(
+        [_activity(employee, store, login, login + timedelta(hours=4))]
+    )[0]
+    ShiftException.objects.bulk_create(
+        [
+            ShiftException(shift=soft_deleted_shift),
+            ShiftException(
+                shift=other_soft_deleted_shift,
+                activity=activity,
+                reason=ShiftException.Reason.INCORRECTLY_CLOCKED,
+            ),
+        ]
+    )
+
+    _resolve_conflicts()
+
+    assert list(Shift.objects.values_list("id", flat=True)) == [kept_shift.id]
+    assert list(ShiftException.objects.values_list("shift_id", "activity_id")) == [
+        (None, activity.id)
+    ]
+    without_overlap_constraints()
+
+
+@pytest.mark.django_db
+def test_migration_fails_on_conflicting_roster_data(
+    store, employee, without_overlap_constraints
+):
+    """
+    Test that the migration doesn't change conflicting visible shifts or activities, failing with their IDs instead.
+    """
+    date = localtime(now()).date() + timedelta(days=1)
+    shifts = Shift.objects.bulk_create(
+        [
+            _shift(employee, store, (9, 0), (13, 0), date=date),
+            _shift(employee, store, (13, 30), (17, 0), date=date),
+        ]
+    )
+    login = make_aware(datetime.combine(date - timedelta(days=2), time(9, 0)))
+    kept_activity, conflicting_activity, open_activity = Activity.objects.bulk_create(
+        [
+            _activity(employee, store, login, login + timedelta(hours=4)),
+            _activity(
+                employee,
+                store,
+                login + timedelta(hours=4, minutes=15),
+                login + timedelta(hours=6),
+            ),
+            _activity(employee, store, login - timedelta(hours=1)),
+        ]
+    )
+
+    with pytest.raises(RuntimeError) as exc:
+        _resolve_conflicts()
+
+    assert f"Shift IDs: {[shifts[1].id]}" in str(exc.value)
+    assert f"Activity IDs: {[conflicting_activity.id, open_activity.id]}" in str(
+        exc.value
+    )
+    assert Shift.objects.count() == 2
+    conflicting_activity.refresh_from_db()
+    assert conflicting_activity.logout_time == login + timedelta(hours=6)
+    open_activity.refresh_from_db()
+    assert open_activity.logout_time is None
+
+    # Once corrected by hand the constraints can be added
+    Shift.objects.filter(id=shifts[1].id).delete()
+    Activity.objects.filter(id__in=[conflicting_activity.id, open_activity.id]).delete()
+    _resolve_conflicts()
+    without_overlap_constraints()
+
+
+@pytest.mark.django_db
+def test_migration_closes_duplicate_open_activities(
+    store, employee, without_overlap_constraints
+):
+    """
+    Test that closing the duplicate open activities (before the open activity constraint) rebuilds their rollups.
+    """
+    from django.apps import apps
+
+    migration = importlib.import_module(
+        "auth_app.migrations.0057_activity_unique_open_activity"
+    )
+    constraint = next(
+        c for c in Activity._meta.constraints if c.name == OPEN_ACTIVITY_CONSTRAINT
+    )
+    with connection.schema_editor() as editor:
+        editor.remove_constraint(Activity, constraint)
+
+    day = localtime(now()).date() - timedelta(days=1)
+    login = make_aware(datetime.combine(day, time(9, 0)))
+    finished = _activity(
+        employee, store, login - timedelta(hours=3), login - timedelta(hours=2)
+    )
+    finished.shift_length_mins = 60
+    finished.deliveries = 2
+    older, latest = Activity.objects.bulk_create(
+        [
+            _activity(employee, store, login),
+            _activity(employee, store, login + timedelta(hours=3)),
+            finished,
+        ]
+    )[:2]
+
+    migration.close_duplicate_open_activities(apps, connection.schema_editor())
+
+    older.refresh_from_db()
+    assert older.logout_time == older.login_time
+    assert Activity.objects.get(logout_time__isnull=True) == latest
+    summary = ActivityDailySummary.objects.get(employee=employee, store=store, date=day)
+    assert (summary.shift_count, summary.mins_total, summary.deliveries) == (2, 60, 2)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    with connection.schema_editor() as editor:
+        editor.add_constraint(Activity, constraint)
+    without_overlap_constraints()
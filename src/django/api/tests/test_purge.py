@@ -0,0 +1,116 @@
+import pytest
+
+from datetime import timedelta, datetime, time
+from django.utils.timezone import now, localtime, make_aware
+from auth_app.models import (
+    Activity,
+    Notification,
+    NotificationReceipt,
+    Shift,
+    ShiftException,
+)
+from auth_app.purge import purge_in_batches
+from auth_app.tasks import delete_old_unused_shifts
+
+
+def _send_notifications(users, count, expires_on=None):
+    for i in range(count):
+        Notification.send_to_users(
+            users=users,
+            title=f"Notification {i}",
+            message="Message",
+            recipient_group=Notification.RecipientType.INDIVIDUAL,
+            expires_on=expires_on,
+        )
+
+
+@pytest.mark.django_db
+def test_purge_in_batches(employee, manager):
+    """
+    Test that only the matched rows are deleted (with their cascades), in batches of the given size.
+    """
+    today = localtime(now()).date()
+    _send_notifications([employee, manager], 7, expires_on=today)
+    _send_notifications([employee], 2)
+    Notification.objects.filter(expires_on__gt=today).update(
+        expires_on=today + timedelta(days=5)
+    )
+
+    result = purge_in_batches(
+        Notification.objects.filter(expires_on__lte=today), batch_size=3, sleep_sec=0
+    )
+
+    assert result.deleted == 7
+    assert result.cascaded == {
+        "auth_app.Notification": 7,
+        "auth_app.NotificationReceipt": 14,
+    }
+    assert result.batches == 3
+    assert result.finished
+    assert Notification.objects.count() == 2
+    assert NotificationReceipt.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_purge_in_batches_stops_after_max_duration(employee):
+    """
+    Test that a purge out of time stops starting batches, leaving the rest for the next run.
+    """
+    _send_notifications([employee], 3)
+
+    result = purge_in_batches(Notification.objects.all(), max_duration_sec=0)
+
+    assert (result.deleted, result.batches, result.finished) == (0, 0, False)
+    assert Notification.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_delete_old_unused_shifts_detaches_exceptions(store, employee):
+    """
+    Test that purging old soft-deleted shifts deletes their exceptions without an activity and unlinks the others.
+    """
+    old_date = localtime(now()).date() - timedelta(days=60)
+
+    def shift(start_hour, is_deleted=True, date=old_date):
+        return Shift.objects.create(
+            employee=employee,
+            store=store,
+            date=date,
+            start_time=time(start_hour, 0),
+            end_time=time(start_hour + 1, 0),
+            is_deleted=is_deleted,
+        )
+
+    missed = shift(6)
+    clocked = shift(9)
+    kept = shift(12, is_deleted=False)
+    recent = shift(15, date=localtime(now()).date())
+
+    login = make_aware(datetime.combine(old_date, time(9, 5)))
+    activity = Activity.objects.create(
+        employee=employee,
+        store=store,
+        login_time=login,
+        login_timestamp=login,
+        logout_time=login + timedelta(hours=1),
+        logout_timestamp=login + timedelta(hours=1),
+    )
+    missed_exc = ShiftException.objects.create(
+        shift=missed, reason=ShiftException.Reason.MISSED_SHIFT
+    )
+    clocked_exc = ShiftException.objects.create(
+        shift=clocked,
+        activity=activity,
+        reason=ShiftException.Reason.INCORRECTLY_CLOCKED,
+    )
+    kept_exc = ShiftException.objects.create(
+        shift=kept, reason=ShiftException.Reason.MISSED_SHIFT
+    )
+
+    delete_old_unused_shifts()
+
+    assert set(Shift.objects.values_list("id", flat=True)) == {kept.id, recent.id}
+    assert not ShiftException.objects.filter(id=missed_exc.id).exists()
+    clocked_exc.refresh_from_db()
+    assert (clocked_exc.shift_id, clocked_exc.activity_id) == (None, activity.id)
+    assert ShiftException.objects.get(id=kept_exc.id).shift_id == kept.id
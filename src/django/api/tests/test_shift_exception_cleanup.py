@@ -0,0 +1,154 @@
+import pytest
+
+from datetime import timedelta, datetime, time
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now, localtime, make_aware
+from auth_app.models import Activity, Shift, ShiftException
+
+
+def _create_shifts_and_activities(employee, store, count=3):
+    """
+    Create `count` days each with a shift and activity, with one exception per kind of link:
+    shift only (missed shift), activity only (no shift) and both (incorrectly clocked).
+    """
+    shifts, activities, exceptions = [], [], []
+    for day in range(count):
+        date = localtime(now()).date() - timedelta(days=day + 1)
+        shift = Shift.objects.create(
+            employee=employee,
+            store=store,
+            date=date,
+            start_time=time(9, 0),
+            end_time=time(17, 0),
+        )
+        login = make_aware(datetime.combine(date, time(9, 0)))
+        activity = Activity.objects.create(
+            employee=employee,
+            store=store,
+            login_time=login,
+            login_timestamp=login,
+            logout_time=login + timedelta(hours=8),
+            logout_timestamp=login + timedelta(hours=8),
+        )
+        reason, link = [
+            (ShiftException.Reason.MISSED_SHIFT, {"shift": shift}),
+            (ShiftException.Reason.NO_SHIFT, {"activity": activity}),
+            (
+                ShiftException.Reason.INCORRECTLY_CLOCKED,
+                {"shift": shift, "activity": activity},
+            ),
+        ][day % 3]
+        exceptions.append(ShiftException.objects.create(reason=reason, **link))
+        shifts.append(shift)
+        activities.append(activity)
+
+    return shifts, activities, exceptions
+
+
+def _signal_cleanup(exceptions, shift_ids=(), activity_ids=()):
+    """
+    The exceptions left by the former per-row `pre_delete` signals, deleting the given shifts and then the
+    given activities one by one: {exception id: (shift id, activity id)}.
+    """
+    state = {exc.id: (exc.shift_id, exc.activity_id) for exc in exceptions}
+    for shift_id in shift_ids:
+        for exc_id, (exc_shift_id, exc_activity_id) in list(state.items()):
+            if exc_shift_id == shift_id:
+                if exc_activity_id is None:
+                    del state[exc_id]
+                else:
+                    state[exc_id] = (None, exc_activity_id)
+    for activity_id in activity_ids:
+        for exc_id, (exc_shift_id, exc_activity_id) in list(state.items()):
+            if exc_activity_id == activity_id:
+                if exc_shift_id is None:
+                    del state[exc_id]
+                else:
+                    state[exc_id] = (exc_shift_id, None)
+    return state
+
+
+def _exceptions_state():
+    return {
+        exc_id: (shift_id, activity_id)
+        for exc_id, shift_id, activity_id in ShiftException.objects.values_list(
+            "id", "shift_id", "activity_id"
+        )
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "delete_shifts, delete_activities",
+    [(True, False), (False, True), (True, True)],
+)
+def test_bulk_delete_matches_signal_cleanup(
+    store, employee, delete_shifts, delete_activities
+):
+    """
+    Test that deleting shifts/activities in bulk leaves the same exceptions as the former per-row signals.
+    """
+    shifts, activities, exceptions = _create_shifts_and_activities(
+        employee, store, count=6
+    )
+    shift_ids = [s.id for s in shifts[:4]] if delete_shifts else []
+    activity_ids = [a.id for a in activities[2:]] if delete_activities else []
+    expected = _signal_cleanup(exceptions, shift_ids, activity_ids)
+
+    Shift.objects.filter(id__in=shift_ids).delete()
+    Activity.objects.filter(id__in=activity_ids).delete()
+
+    assert _exceptions_state() == expected
+    assert not ShiftException.objects.filter(
+        shift__isnull=True, activity__isnull=True
+    ).exists()
+
+
+@pytest.mark.django_db
+def test_instance_delete_matches_signal_cleanup(store, employee):
+    """
+    Test that deleting a single shift or activity leaves the same exceptions as the former signals.
+    """
+    shifts, activities, exceptions = _create_shifts_and_activities(employee, store)
+    expected = _signal_cleanup(
+        exceptions,
+        shift_ids=[shifts[0].id, shifts[2].id],
+        activity_ids=[activities[1].id],
+    )
+
+    shifts[0].delete()
+    shifts[2].delete()
+    activities[1].delete()
+
+    assert _exceptions_state() == expected
+
+
+@pytest.mark.django_db
+def test_bulk_delete_queries_are_constant(store, employee):
+    """
+    Test that the exception cleanup doesn't add queries per deleted shift.
+    """
+
+    def count_queries(count):
+        shifts, _, _ = _create_shifts_and_activities(employee, store, count=count)
+        with CaptureQueriesContext(connection) as ctx:
+            Shift.objects.filter(id__in=[s.id for s in shifts]).delete()
+        Activity.objects.all().delete()
+        return len(ctx.captured_queries)
+
+    assert count_queries(2) == count_queries(9)
+
+
+@pytest.mark.django_db
+def test_deleting_user_cleans_up_exceptions(store, employee, employee_b):
+    """
+    Test that deleting a user (cascading their shifts and activities) deletes their exceptions, and only theirs.
+    """
+    _create_shifts_and_activities(employee, store)
+    _, _, other_exceptions = _create_shifts_and_activities(employee_b, store)
+    expected = {exc.id: (exc.shift_id, exc.activity_id) for exc in other_exceptions}
+
+    employee.delete()
+
+    assert _exceptions_state() == expected
@@ -0,0 +1,108 @@
+import random
+import pytest
+
+from itertools import permutations
+from datetime import datetime, time, date
+from django.utils.timezone import make_aware
+from auth_app.models import Activity, Shift, ShiftException
+from api.shift_matching import min_cost_assignment, match_employee_day
+
+
+DAY = date(2025, 6, 6)
+
+
+def _shift(id, start, end):
+    return Shift(id=id, date=DAY, start_time=time(*start), end_time=time(*end))
+
+
+def _activity(id, start, end=None):
+    return Activity(
+        id=id,
+        login_time=make_aware(datetime.combine(DAY, time(*start))),
+        logout_time=make_aware(datetime.combine(DAY, time(*end))) if end else None,
+    )
+
+
+def _brute_force_cost(costs):
+    rows, cols = len(costs), len(costs[0])
+    if rows <= cols:
+        return min(
+            sum(costs[r][c] for r, c in enumerate(perm))
+            for perm in permutations(range(cols), rows)
+        )
+    return min(
+        sum(costs[r][c] for c, r in enumerate(perm))
+        for perm in permutations(range(rows), cols)
+    )
+
+
+@pytest.mark.parametrize("rows, cols", [(1, 1), (3, 3), (2, 4), (4, 2), (5, 5)])
+def test_min_cost_assignment_is_optimal(rows, cols):
+    """
+    Test that the assignment has the minimum total cost and assigns as many rows/columns as possible.
+    """
+    rng = random.Random(rows * 10 + cols)
+    for _ in range(20):
+        costs = [[rng.randint(0, 50) for _ in range(cols)] for _ in range(rows)]
+        pairs = min_cost_assignment(costs)
+
+        assert len(pairs) == min(rows, cols)
+        assert len({r for r, _ in pairs}) == len({c for _, c in pairs}) == len(pairs)
+        assert sum(costs[r][c] for r, c in pairs) == _brute_force_cost(costs)
+
+
+def test_min_cost_assignment_empty():
+    assert min_cost_assignment([]) == []
+    assert min_cost_assignment([[]]) == []
+
+
+def test_match_employee_day_split_shift():
+    """
+    Test that a late clock in for the first half of a split shift doesn't steal the second half's link
+    (matching by the nearest start would link it to the second shift).
+    """
+    first, second = _shift(1, (9, 0), (13, 0)), _shift(2, (12, 0), (16, 0))
+    late, perfect = _activity(1, (11, 45), (13, 0)), _activity(2, (12, 0), (16, 0))
+
+    links = match_employee_day(
+        shifts=[second, first],
+        activities=[perfect, late],
+        now=make_aware(datetime(2025, 6, 7)),
+    )
+
+    assert [(l.shift, l.activity, l.reason) for l in links] == [
+        (first, late, ShiftException.Reason.INCORRECTLY_CLOCKED),
+        (second, perfect, None),
+    ]
+
+
+def test_match_employee_day_unlinked():
+    """
+    Test that lone activities are NO_SHIFT, lone ended shifts MISSED_SHIFT and unfinished activities/shifts are ignored.
+    """
+    morning, evening = _shift(1, (9, 0), (13, 0)), _shift(2, (18, 0), (22, 0))
+    perfect, extra = _activity(1, (9, 0), (13, 0)), _activity(2, (14, 0), (15, 0))
+    ongoing = _activity(3, (16, 0))
+
+    # Unfinished activities are never linked
+    links = match_employee_day(
+        shifts=[morning],
+        activities=[extra, ongoing, perfect],
+        now=make_aware(datetime.combine(DAY, time(16, 30))),
+    )
+    assert [(l.shift, l.activity, l.reason) for l in links] == [
+        (morning, perfect, None),
+        (None, extra, ShiftException.Reason.NO_SHIFT),
+    ]
+
+    # Only ended shifts are missed
+    for now, missed in [
+        (make_aware(datetime.combine(DAY, time(16, 30))), [morning]),
+        (make_aware(datetime(2025, 6, 7)), [morning, evening]),
+    ]:
+        links = match_employee_day(
+            shifts=[morning, evening], activities=[ongoing], now=now
+        )
+        assert [(l.shift, l.activity, l.reason) for l in links] == [
+            (s, None, ShiftException.Reason.MISSED_SHIFT) for s in missed
+        ]
@@ -0,0 +1,240 @@
+import pytest
+import fakeredis
+
+from datetime import time, date
+from unittest.mock import patch
+from django.core.cache import caches
+from auth_app.models import RepeatingShift, Shift, Notification
+from auth_app.task_leases import (
+    TaskLease,
+    exclusive_task,
+    is_run_complete,
+    mark_run_complete,
+)
+from auth_app.tasks import write_out_repeating_shifts_for_week
+
+
+@pytest.fixture
+def redis_task_leases(settings):
+    """
+    Store the task leases/ledger in an in-process fake Redis server.
+    """
+    settings.CACHES = {
+        **settings.CACHES,
+        "task_leases": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": "redis://fake-redis:6379/7",
+            "OPTIONS": {
+                "CONNECTION_POOL_KWARGS": {
+                    "connection_class": fakeredis.FakeRedisConnection
+                }
+            },
+        },
+    }
+
+    client = caches["task_leases"].client.get_client(write=True)
+    client.flushdb()
+    yield client
+    client.flushdb()
+
+
+def test_task_lease_is_exclusive(redis_task_leases):
+    """
+    Test that only one run holds a lease at a time, and that it expires by itself.
+    """
+    with TaskLease("job", scope=1, period="2025-06-06", ttl=60) as first:
+        assert first.acquired
+        with TaskLease("job", scope=1, period="2025-06-06") as second:
+            assert not second.acquired
+
+        # Other stores/periods are independent
+        with TaskLease("job", scope=2, period="2025-06-06") as other_store:
+            assert other_store.acquired
+        with TaskLease("job", scope=1, period="2025-06-07") as other_period:
+            assert other_period.acquired
+
+        key = caches["task_leases"].make_key("task_lease:job:1:2025-06-06")
+        assert 0 < redis_task_leases.ttl(key) <= 60
+
+    with TaskLease("job", scope=1, period="2025-06-06") as third:
+        assert third.acquired
+
+
+def test_task_lease_only_released_by_holder(redis_task_leases):
+    """
+    Test that a run whose lease expired (and was taken over) doesn't release the new holder's lease.
+    """
+    key = caches["task_leases"].make_key("task_lease:job:all:")
+
+    lease = TaskLease("job")
+    assert lease.acquire()
+    redis_task_leases.set(key, "another-run")  # Expired and taken over
+    lease.release()
+
+    assert redis_task_leases.get(key) == b"another-run"
+    assert not TaskLease("job").acquire()
+
+
+def test_task_ledger_skips_completed_runs(redis_task_leases):
+    """
+    Test that a completed run is skipped by later runs using the ledger (but not by runs without it).
+    """
+    with TaskLease("job", scope=1, period="2025-06-06", use_ledger=True) as lease:
+        assert lease.acquired
+        lease.complete()
+
+    assert is_run_complete("job", 1, "2025-06-06")
+    with TaskLease("job", scope=1, period="2025-06-06", use_ledger=True) as retry:
+        assert not retry.acquired
+        assert retry.already_complete
+    with TaskLease("job", scope=1, period="2025-06-06") as no_ledger:
+        assert no_ledger.acquired
+
+    # A failed run (not completed) is retried
+    with TaskLease("job", scope=2, period="2025-06-06", use_ledger=True):
+        pass
+    with TaskLease("job", scope=2, period="2025-06-06", use_ledger=True) as retry:
+        assert retry.acquired
+
+
+def test_task_lease_granted_when_cache_unreachable(redis_task_leases):
+    """
+    Test that tasks keep running (without a lease) when Redis can't be reached.
+    """
+    with patch("auth_app.task_leases._get_redis_client", side_effect=ConnectionError):
+        with TaskLease("job") as lease:
+            assert lease.acquired
+
+
+def test_exclusive_task_skips_overlapping_runs(redis_task_leases):
+    """
+    Test that a task run is skipped while another run of it holds the lease.
+    """
+    calls = []
+
+    @exclusive_task()
+    def job(value):
+        calls.append(value)
+        return value
+
+    assert job(1) == 1
+    with TaskLease("job"):
+        assert job(2) is None
+    assert job(3) == 3
+    assert calls == [1, 3]
+
+
+@pytest.mark.django_db
+def test_write_out_repeating_shifts_is_idempotent(
+    redis_task_leases, store, employee, store_associate_employee, celery_eager
+):
+    """
+    Test that writing out an already written week (i.e. a second beat node, or a retry) changes nothing,
+    unless an admin forces it.
+    """
+    store.is_repeating_shifts_enabled = True
+    store.save()
+    RepeatingShift.objects.create(
+        employee=employee,
+        store=store,
+        start_weekday=0,
+        end_weekday=0,
+        start_time=time(9, 0),
+        end_time=time(17, 0),
+        active_weeks=[1, 2, 3, 4],
+    )
+
+    for _ in range(2):
+        write_out_repeating_shifts_for_week(
+            week_start_date="2025-01-06", store_id=store.id, weeks=2
+        )
+
+    assert set(Shift.objects.values_list("date", flat=True)) == {
+        date(2025, 1, 6),
+        date(2025, 1, 13),
+    }
+    assert Notification.objects.filter(store=store).count() == 1
+
+    # A range overlapping a written week only writes the new week
+    write_out_repeating_shifts_for_week(
+        week_start_date="2025-01-13", store_id=store.id, weeks=2
+    )
+    assert Shift.objects.count() == 3
+    assert "Conflicting Shift" not in Notification.objects.latest("id").message
+
+    # Forced runs still check for conflicts
+    write_out_repeating_shifts_for_week(
+        week_start_date="2025-01-06", store_id=store.id, force=True
+    )
+    assert Shift.objects.count() == 3
+    assert Notification.objects.filter(store=store).count() == 3
+
+
+@pytest.mark.django_db
+def test_write_out_repeating_shifts_skips_leased_store(
+    redis_task_leases, store, employee, store_associate_employee, celery_eager
+):
+    """
+    Test that a store being written out by another run is skipped.
+    """
+    store.is_repeating_shifts_enabled = True
+    store.save()
+    RepeatingShift.objects.create(
+        employee=employee,
+        store=store,
+        start_weekday=0,
+        end_weekday=0,
+        start_time=time(9, 0),
+        end_time=time(17, 0),
+        active_weeks=[1, 2, 3, 4],
+    )
+
+    with TaskLease("auth_app.tasks.write_out_store_repeating_shifts", scope=store.id):
+        write_out_repeating_shifts_for_week(
+            week_start_date="2025-01-06", store_id=store.id
+        )
+    assert not Shift.objects.exists()
+    assert not is_run_complete(
+        "auth_app.tasks.write_out_store_repeating_shifts", store.id, "2025-01-06"
+    )
+
+    mark_run_complete(
+        "auth_app.tasks.write_out_store_repeating_shifts", store.id, "2025-01-06"
+    )
+    write_out_repeating_shifts_for_week(week_start_date="2025-01-06", store_id=store.id)
+    assert not Shift.objects.exists()
+
+
+@pytest.mark.django_db
+def test_store_task_refused_when_cache_unreachable(
+    redis_task_leases, store, employee, store_associate_employee, celery_eager
+):
+    """
+    Test that a store's ledger guarded run is skipped and reported to the admins (instead of running without
+    its lease) when Redis can't be reached.
+    """
+    store.is_repeating_shifts_enabled = True
+    store.save()
+    RepeatingShift.objects.create(
+        employee=employee,
+        store=store,
+        start_weekday=0,
+        end_weekday=0,
+        start_time=time(9, 0),
+        end_time=time(17, 0),
+        active_weeks=[1, 2, 3, 4],
+    )
+
+    with patch("auth_app.task_leases._get_redis_client", side_effect=ConnectionError):
+        with TaskLease("job", fail_open=False) as lease:
+            assert not lease.acquired and lease.error
+
+        write_out_repeating_shifts_for_week(
+            week_start_date="2025-01-06", store_id=store.id
+        )
+
+    assert not Shift.objects.exists()
+    alert = Notification.objects.get(
+        notification_type=Notification.Type.AUTOMATIC_ALERT
+    )
+    assert "Task lease unavailable" in alert.message
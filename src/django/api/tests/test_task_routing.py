@@ -0,0 +1,83 @@
+import pytest
+
+from unittest.mock import patch
+from celery.exceptions import TimeLimitExceeded
+from django.conf import settings
+from auth_app.models import Notification
+from clock_in_system.celery import app as celery_app
+import auth_app.tasks as tasks
+
+
+def _queue(task):
+    return celery_app.amqp.router.route({}, task.name)["queue"].name
+
+
+@pytest.mark.parametrize(
+    "task, queue",
+    [
+        (tasks.notify_employee_account_reset_pin, "notifications"),
+        (tasks.notify_shift_requests_status_change, "notifications"),
+        (tasks.update_activity_public_holiday, "notifications"),
+        (tasks.check_clocked_in_users, "maintenance"),
+        (tasks.force_clock_out_store_users, "maintenance"),
+        (tasks.report_store_job_results, "maintenance"),
+        (tasks.report_store_job_failure, "maintenance"),
+        (tasks.delete_old_notifications, "maintenance"),
+        (tasks.rebuild_activity_daily_summaries, "reports"),
+        (tasks.reconcile_public_holiday_flags, "reports"),
+    ],
+)
+def test_tasks_are_routed_by_workload(task, queue):
+    """
+    Test that each kind of task is sent to its own queue (consumed by its own worker).
+    """
+    assert _queue(task) == queue
+
+
+def test_tasks_declare_time_limits():
+    """
+    Test that every task of the app declares its own time limits.
+    """
+    app_tasks = [
+        task
+        for name, task in celery_app.tasks.items()
+        if name.startswith("auth_app.tasks.")
+    ]
+    assert app_tasks
+    for task in app_tasks:
+        assert task.time_limit and task.soft_time_limit < task.time_limit, task.name
+
+    assert (
+        tasks.notify_managers_account_activated.time_limit
+        == settings.NOTIFICATION_TASK_TIME_LIMIT
+    )
+    assert (
+        tasks.rebuild_activity_daily_summaries.time_limit
+        == settings.REPORT_TASK_TIME_LIMIT
+    )
+
+
+@pytest.mark.django_db
+def test_store_job_failure_reported(store):
+    """
+    Test that a store subtask failing outright (so the chord's callback never runs) is still reported to the admins.
+    """
+    with patch("auth_app.tasks.chord") as chord:
+        tasks.dispatch_store_job(
+            task_name="job",
+            store_task=tasks.force_clock_out_store_users,
+            store_ids=[store.id],
+            error_title="Job failed",
+            error_message="Failed to run the job.",
+        )
+
+    callback = chord.return_value.call_args.args[0]
+    [errback] = callback.options["link_error"]
+    assert errback.task == tasks.report_store_job_failure.name
+
+    # Called by the worker as `errback(request, exc, traceback)`
+    tasks.report_store_job_failure(None, TimeLimitExceeded(180), None, **errback.kwargs)
+    alert = Notification.objects.get(
+        notification_type=Notification.Type.AUTOMATIC_ALERT
+    )
+    assert "Failed to run the job." in alert.message
@@ -1,9 +1,40 @@
+import os
+import time
 import pytest
+import logging
+import fakeredis
 import api.utils as util
 
-from datetime import datetime, timedelta
-from django.utils.timezone import now
-from auth_app.models import Activity
+from datetime import datetime, timedelta, time as dt_time
+from io import StringIO
+from freezegun import freeze_time
+from unittest.mock import patch
+from django.utils.timezone import now, localtime
+from django.core.cache import caches
+from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.contrib.sessions.backends.base import UpdateError
+from auth_app.models import (
+    Activity,
+    UserSession,
+    Notification,
+    NotificationReceipt,
+    Shift,
+    ShiftRequest,
+    StoreUserAccess,
+)
+from auth_app.sessions import SessionStore as UserSessionStore
+from auth_app.redis_sessions import SessionStore as RedisSessionStore
+from auth_app.user_stats import (
+    get_user_stats,
+    update_shift_request_user_stats,
+    COMPLETE_FIELD,
+)
+from auth_app.tasks import (
+    cancel_expired_shift_requests,
+    delete_old_notifications,
+    notify_shift_requests_status_change,
+)
 from api.utils import is_activity_modified
 
 
@@ -90,3 +121,424 @@ def test_is_activity_modified_with_logout_time():
     )
 
     assert is_activity_modified(activity)
+
+
+def _create_user_session(user_id=None):
+    session = UserSessionStore()
+    if user_id is not None:
+        session["user_id"] = user_id
+    session.create()
+    session.save()
+    return session.session_key
+
+
+@pytest.mark.django_db
+def test_flush_user_sessions_uses_user_index(settings, django_assert_num_queries):
+    """
+    Test that flushing a user's sessions only deletes their sessions using a single indexed query.
+    """
+    settings.SESSION_ENGINE = "auth_app.sessions"
+    own_keys = [_create_user_session(5), _create_user_session(5)]
+    other_key = _create_user_session(6)
+    anonymous_key = _create_user_session()
+
+    assert UserSession.objects.get(session_key=own_keys[0]).user_id == 5
+    assert UserSession.objects.get(session_key=anonymous_key).user_id is None
+
+    with django_assert_num_queries(1):
+        assert util.flush_user_sessions(user_id=5) == 2
+
+    assert not UserSession.objects.filter(session_key__in=own_keys).exists()
+    assert (
+        UserSession.objects.filter(session_key__in=[other_key, anonymous_key]).count()
+        == 2
+    )
+
+
+@pytest.mark.skipif(
+    not os.getenv("RUN_BENCHMARKS"), reason="Benchmark (set RUN_BENCHMARKS=1 to run)"
+)
+@pytest.mark.django_db
+def test_flush_user_sessions_benchmark(settings):
+    """
+    Benchmark flushing one user's sessions out of 100k stored sessions (indexed vs full decode scan).
+    The timings are logged (view with `--log-cli-level=INFO`), they aren't asserted as they depend on the machine.
+    """
+    total_sessions = 100_000
+    encoder = UserSessionStore()
+    expire_date = now() + timedelta(days=8)
+
+    def build_sessions(model, with_user_id):
+        rows = []
+        for i in range(total_sessions):
+            user_id = (i % 5000) + 1
+            row = model(
+                session_key=f"bench{i:035d}",
+                session_data=encoder.encode({"user_id": user_id, "name": "Bench"}),
+                expire_date=expire_date,
+            )
+            if with_user_id:
+                row.user_id = user_id
+            rows.append(row)
+        model.objects.bulk_create(rows, batch_size=10000)
+
+    # Indexed engine
+    settings.SESSION_ENGINE = "auth_app.sessions"
+    build_sessions(UserSession, with_user_id=True)
+    start = time.perf_counter()
+    assert util.flush_user_sessions(user_id=42) == total_sessions // 5000
+    indexed_secs = time.perf_counter() - start
+
+    # Legacy full scan (default database engine)
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.db"
+    build_sessions(Session, with_user_id=False)
+    start = time.perf_counter()
+    assert util.flush_user_sessions(user_id=42) == total_sessions // 5000
+    scan_secs = time.perf_counter() - start
+
+    logging.getLogger("benchmarks").info(
+        f"flush_user_sessions over {total_sessions} sessions: indexed={indexed_secs * 1000:.1f}ms, full scan={scan_secs * 1000:.1f}ms"
+    )
+
+
+@pytest.fixture
+def redis_sessions(settings):
+    """
+    Use the Redis session engine backed by an in-process fake Redis server.
+    """
+    settings.CACHES = {
+        **settings.CACHES,
+        "sessions": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": "redis://fake-redis:6379/6",
+            "OPTIONS": {
+                "CONNECTION_POOL_KWARGS": {
+                    "connection_class": fakeredis.FakeRedisConnection
+                }
+            },
+        },
+    }
+    settings.SESSION_ENGINE = "auth_app.redis_sessions"
+    settings.SESSION_CACHE_ALIAS = "sessions"
+    settings.SESSION_SAVE_THRESHOLD_SEC = 600
+
+    client = caches["sessions"].client.get_client(write=True)
+    client.flushdb()
+    yield client
+    client.flushdb()
+
+
+def test_redis_session_saves_are_coalesced(redis_sessions):
+    """
+    Test that unmodified sessions are only re-written once the save threshold has passed.
+    """
+    session = RedisSessionStore()
+    session["user_id"] = 5
+    session.create()
+    session_key = session.session_key
+
+    cache = caches["sessions"]
+    with patch.object(cache, "set", wraps=cache.set) as cache_set:
+        # Unmodified and recently written -> no write
+        RedisSessionStore(session_key).save()
+        assert cache_set.call_count == 0
+
+        # Modified -> written
+        store = RedisSessionStore(session_key)
+        store["name"] = "Bob"
+        store.save()
+        assert cache_set.call_count == 1
+
+        # Unmodified but last written past the threshold -> written (pushes the expiry back)
+        with freeze_time(now() + timedelta(seconds=601)):
+            RedisSessionStore(session_key).save()
+        assert cache_set.call_count == 2
+
+    loaded = RedisSessionStore(session_key)
+    assert loaded["name"] == "Bob"
+    assert "_saved_at" not in loaded.keys()
+
+
+def test_redis_session_flush_is_not_recreated(redis_sessions):
+    """
+    Test that a session deleted while a request is still using it is never written back.
+    """
+    session = RedisSessionStore()
+    session["user_id"] = 5
+    session.create()
+
+    in_flight = RedisSessionStore(session.session_key)
+    in_flight.load()
+    in_flight["name"] = "Bob"
+
+    assert util.flush_user_sessions(user_id=5) == 1
+    with pytest.raises(UpdateError):
+        in_flight.save()
+    assert not RedisSessionStore().exists(session.session_key)
+
+
+def test_flush_user_sessions_redis_index(redis_sessions):
+    """
+    Test that flushing a user's Redis sessions only deletes their sessions.
+    """
+    keys = {}
+    for name, user_id in [("own1", 5), ("own2", 5), ("other", 6), ("anon", None)]:
+        session = RedisSessionStore()
+        if user_id is not None:
+            session["user_id"] = user_id
+        session.create()
+        keys[name] = session.session_key
+
+    assert util.flush_user_sessions(user_id=5) == 2
+    assert util.flush_user_sessions(user_id=5) == 0
+
+    store = RedisSessionStore()
+    assert not store.exists(keys["own1"]) and not store.exists(keys["own2"])
+    assert store.exists(keys["other"]) and store.exists(keys["anon"])
+
+
+@pytest.mark.django_db
+def test_database_sessions_copied_to_redis(redis_sessions):
+    """
+    Test that switching to the Redis session engine keeps the unexpired database sessions (and their user index).
+    """
+    encoder = UserSessionStore()
+    UserSession.objects.bulk_create(
+        [
+            UserSession(
+                session_key="a" * 32,
+                session_data=encoder.encode({"user_id": 5}),
+                expire_date=now() + timedelta(days=1),
+                user_id=5,
+            ),
+            UserSession(
+                session_key="b" * 32,
+                session_data=encoder.encode({"user_id": 6}),
+                expire_date=now() - timedelta(days=1),
+                user_id=6,
+            ),
+        ]
+    )
+
+    call_command("copy_sessions_to_redis", stdout=StringIO())
+
+    assert RedisSessionStore("a" * 32)["user_id"] == 5
+    assert not RedisSessionStore().exists("b" * 32)
+    assert util.flush_user_sessions(user_id=5) == 1
+
+
+@pytest.fixture
+def redis_user_stats(settings):
+    """
+    Store the user stats in an in-process fake Redis server.
+    """
+    settings.CACHES = {
+        **settings.CACHES,
+        "user_stats": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": "redis://fake-redis:6379/5",
+            "OPTIONS": {
+                "CONNECTION_POOL_KWARGS": {
+                    "connection_class": fakeredis.FakeRedisConnection
+                }
+            },
+        },
+    }
+    settings.USER_STATS_USE_CACHE = True
+
+    client = caches["user_stats"].client.get_client(write=True)
+    client.flushdb()
+    yield client
+    client.flushdb()
+
+
+def test_user_stats_follow_notifications(
+    redis_user_stats, employee, manager, django_assert_num_queries
+):
+    """
+    Test that the cached unread counts are changed in place as notifications are sent and read.
+    """
+    assert get_user_stats(employee) == (0, 0)
+    assert get_user_stats(manager) == (0, 0)
+
+    notif = Notification.send_to_users(
+        users=[employee, manager],
+        title="Title",
+        message="Message",
+        recipient_group=Notification.RecipientType.INDIVIDUAL,
+    )
+
+    # Served from the cache without recounting
+    with django_assert_num_queries(0):
+        assert get_user_stats(employee) == (1, 0)
+        assert get_user_stats(manager) == (1, 0)
+
+    # Marking as read twice only decrements once
+    assert notif.mark_notification_as_read(user=employee) is True
+    assert notif.mark_notification_as_read(user=employee) is False
+    with django_assert_num_queries(0):
+        assert get_user_stats(employee) == (0, 0)
+        assert get_user_stats(manager) == (1, 0)
+
+
+def test_user_stats_partial_hash_is_recounted(redis_user_stats, employee):
+    """
+    Test that a hash created by an increment on an expired key (no completeness marker) is never trusted.
+    """
+    key = caches["user_stats"].make_key(f"user_stats:{employee.id}")
+    redis_user_stats.hset(key, "unread_notif_count", 5)
+
+    assert get_user_stats(employee) == (0, 0)
+    assert redis_user_stats.hget(key, COMPLETE_FIELD) == b"1"
+    assert redis_user_stats.ttl(key) > 0
+
+
+@pytest.mark.django_db
+def test_user_stats_dropped_on_untracked_changes(
+    redis_user_stats,
+    store,
+    employee,
+    store_associate_employee,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that the cached stats are recounted after changes their counts don't follow (store access changes,
+    purged notifications) and expire by the next local midnight (when notifications expire).
+    """
+    key = caches["user_stats"].make_key(f"user_stats:{employee.id}")
+    Notification.send_to_users(
+        users=[employee],
+        title="Title",
+        message="Message",
+        recipient_group=Notification.RecipientType.INDIVIDUAL,
+        expires_on=localtime(now()).date(),
+    )
+    assert get_user_stats(employee) == (1, 0)
+    midnight = localtime(now()).replace(hour=0, minute=0, second=0) + timedelta(days=1)
+    assert 0 < redis_user_stats.ttl(key) <= (midnight - localtime(now())).seconds + 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        access = StoreUserAccess.objects.get(user=employee, store=store)
+        access.is_manager = True
+        access.save()
+    assert not redis_user_stats.exists(key)
+
+    assert get_user_stats(employee) == (1, 0)
+    delete_old_notifications()
+    assert not redis_user_stats.exists(key)
+    assert get_user_stats(employee) == (0, 0)
+
+
+def test_user_stats_follow_shift_request_status(
+    redis_user_stats,
+    store,
+    employee,
+    manager,
+    store_associate_employee,
+    store_associate_manager,
+):
+    """
+    Test that a cover request moves from the store users' active counts to only the managers' once accepted.
+    """
+    shift = Shift.objects.create(
+        store=store,
+        employee=manager,
+        date=now().date() + timedelta(days=3),
+        start_time=dt_time(9, 0),
+        end_time=dt_time(17, 0),
+    )
+    assert get_user_stats(employee) == (0, 0)
+    assert get_user_stats(manager) == (0, 0)
+
+    req = ShiftRequest.objects.create(
+        requester=manager,
+        shift=shift,
+        type=ShiftRequest.Type.COVER,
+        store=store,
+    )
+    update_shift_request_user_stats(req)
+    assert get_user_stats(employee) == (0, 1)
+    assert get_user_stats(manager) == (0, 1)
+
+    req.status = ShiftRequest.Status.ACCEPTED
+    req.target_user = employee
+    req.save()
+    update_shift_request_user_stats(req, old_status=ShiftRequest.Status.PENDING)
+    assert get_user_stats(employee) == (0, 0)
+    assert get_user_stats(manager) == (0, 1)
+
+    # Cached counts match a full recount
+    for user in [employee, manager]:
+        assert get_user_stats(user)[1] == user.get_active_shift_requests().count()
+
+    # Cancelled once the shift has started
+    Shift.objects.filter(id=shift.id).update(date=localtime(now()).date())
+    with patch("auth_app.tasks.notify_shift_requests_status_change.delay"):
+        cancel_expired_shift_requests()
+    assert get_user_stats(employee) == (0, 0)
+    assert get_user_stats(manager) == (0, 0)
+
+
+def test_cancel_expired_shift_requests_notifies_in_bulk(
+    store, employee, employee_b, manager, django_assert_num_queries
+):
+    """
+    Test that expired shift requests are cancelled in one statement and notified with a SINGLE task,
+    which sends one notification per request in a constant number of queries.
+    """
+    today = localtime(now()).date()
+    requests = []
+    for days, status, target in [
+        (0, ShiftRequest.Status.PENDING, None),
+        (-1, ShiftRequest.Status.ACCEPTED, employee_b),
+        (-2, ShiftRequest.Status.PENDING, employee),
+        (2, ShiftRequest.Status.PENDING, None),  # Not expired yet
+        (-3, ShiftRequest.Status.REJECTED, None),  # Already resolved
+    ]:
+        shift = Shift.objects.create(
+            store=store,
+            employee=manager,
+            date=today + timedelta(days=days),
+            start_time=dt_time(9, 0),
+            end_time=dt_time(17, 0),
+        )
+        requests.append(
+            ShiftRequest.objects.create(
+                requester=manager,
+                target_user=target,
+                shift=shift,
+                type=ShiftRequest.Type.COVER,
+                store=store,
+                status=status,
+            )
+        )
+
+    with patch(
+        "auth_app.tasks.notify_shift_requests_status_change.delay"
+    ) as mock_delay:
+        cancel_expired_shift_requests()
+
+    mock_delay.assert_called_once()
+    request_ids = mock_delay.call_args.kwargs["request_ids"]
+    assert sorted(request_ids) == sorted(req.id for req in requests[:3])
+    assert [ShiftRequest.objects.get(id=req.id).status for req in requests] == [
+        ShiftRequest.Status.CANCELLED
+    ] * 3 + [
+        ShiftRequest.Status.PENDING,
+        ShiftRequest.Status.REJECTED,
+    ]
+
+    # Notifications + receipts are created in bulk, regardless of the number of requests
+    with django_assert_num_queries(3):
+        notify_shift_requests_status_change(request_ids=request_ids)
+
+    notifications = Notification.objects.filter(
+        notification_type=Notification.Type.AUTOMATIC_ALERT
+    )
+    assert notifications.count() == 3
+    assert all("<strong>CANCELLED</strong>" in notif.message for notif in notifications)
+    assert sorted(
+        NotificationReceipt.objects.filter(notification__in=notifications).values_list(
+            "user_id", flat=True
+        )
+    ) == sorted([manager.id] * 3 + [employee.id, employee_b.id])
@@ -1,38 +1,51 @@
 import re
+import json
 import math
-import requests
+import hashlib
 import logging
-import holidays
 import api.exceptions as err
+import api.holiday_calendar as holiday_calendar
 
+from celery import current_app
+from importlib import import_module
 from datetime import timedelta, datetime, time, date
 from typing import List, Tuple, Optional, Union, Pattern
-from urllib.parse import urlencode
 from django.db.models import Q
 from django.conf import settings
 from django.utils import timezone
+from django.utils.cache import quote_etag
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.cache import caches
 from django.contrib.sessions.models import Session
 from django.utils.timezone import make_aware, is_naive, localtime, now
 from auth_app.models import User, Store, Activity, Shift, ShiftException, RepeatingShift
+from auth_app.utils import get_request_principal
 
 logger = logging.getLogger("api")
 
 
-def flush_user_sessions(user_id: int):
+def flush_user_sessions(user_id: int, reason: str = "PASSWORD-CHANGE") -> int:
     """
-    Helper function to flush all sessions that are for the given user_id
+    Helper function to flush all sessions that are for the given user_id.
+    Uses the session engine's user index if it has one (single indexed delete),
+    otherwise it falls back to decoding every stored database session.
     """
-    count = 0
-    for session in Session.objects.all():
-        data = session.get_decoded()
-        if data.get("user_id") == int(user_id):
-            session.delete()
-            count += 1
+    store_class = import_module(settings.SESSION_ENGINE).SessionStore
+
+    if hasattr(store_class, "delete_user_sessions"):
+        count = store_class.delete_user_sessions(user_id=int(user_id))
+    else:
+        count = 0
+        for session in Session.objects.all():
+            data = session.get_decoded()
+            if data.get("user_id") == int(user_id):
+                session.delete()
+                count += 1
 
     logger.debug(
-        f"[FLUSH: SESSIONS] [PASSWORD-CHANGE] USER ID: {user_id} -- Num Sessions flushed: {count}"
+        f"[FLUSH: SESSIONS] [{reason}] USER ID: {user_id} -- Num Sessions flushed: {count}"
     )
+    return count
 
 
 # Function to check if a given date is a public holiday
@@ -40,7 +53,6 @@ def is_public_holiday(
     time,
     country=settings.COUNTRY_CODE,
     subdiv=settings.COUNTRY_SUBDIV_CODE,
-    utc_offset=settings.UTC_OFFSET,
 ):
     # Ensure 'time' is timezone-aware
     if time.tzinfo is None:
@@ -50,77 +62,33 @@ def is_public_holiday(
     time = timezone.localtime(
         time
     )  # Ensure time is in the local timezone of django settings
-    date = time.date()
-    cache = caches["holiday_checks"]
-
-    # Check cache if public holiday status has already been checked (saves computing)
-    cache_key = f"public_holiday_{date.isoformat()}"
 
-    status = cache.get(cache_key)
-    if status is not None:
-        # If the status is already cached, return the status
-        return status
-
-    # Check using offline library
+    # Check the offline calendar (with its overrides) -- NEVER USES THE NETWORK
     try:
-        country_holidays = holidays.country_holidays(country=country, subdiv=subdiv)
-        if date in country_holidays:
-            # Set the cache before returning
-            cache.set(cache_key, True, timeout=86400)  # Cache it for 24 hours
-            return True
-
+        return holiday_calendar.is_public_holiday_date(
+            time.date(), country=country, subdiv=subdiv
+        )
     except Exception as e:
-        logger.error(f"Error checking local holidays for date `{date}`: {str(e)}")
-
-    # Else, double check API to ensure its up to date with current affairs.
-    url = f"https://date.nager.at/api/v3/IsTodayPublicHoliday/{country}"
+        logger.error(
+            f"Error checking public holiday for date `{time.date()}`: {str(e)}"
+        )
 
-    # Create query parameters
-    query_params = {}
-    if subdiv:  # If there is a further country subdivision code
-        query_params["countyCode"] = f"{country}-{subdiv}"
-    if utc_offset:
-        query_params["offset"] = utc_offset
+    return False
 
-    # Append query params if any exist
-    if query_params:
-        url += "?" + urlencode(query_params)
 
-    # Check API
+def queue_activity_public_holiday_check(activity_id: int):
+    """
+    Queue the background task which sets an activity's public holiday flag.
+    If it cant be queued, the flag is fixed by the nightly `reconcile_public_holiday_flags` task instead.
+    """
     try:
-        response = requests.get(url, timeout=3)
-        if response.status_code == 200:
-            # Set the cache before returning
-            cache.set(cache_key, True, timeout=86400)
-            return True
-
-        elif response.status_code == 204:
-            cache.set(cache_key, False, timeout=86400)
-            return False
-
-        elif response.status_code == 503:
-            logger.error(
-                f"Error checking public holiday via API gave code `{response.status_code}`: Server is currently down."
-            )
-
-        else:
-            logger.error(
-                f"Error checking public holiday via API gave code `{response.status_code}`: {response.json().get('error', 'Unknown error.')}"
-            )
-
-    except requests.exceptions.Timeout:
-        logger.error(
-            "Error checking public holiday via API as request timed out. Is the API up?"
+        current_app.send_task(
+            "auth_app.tasks.update_activity_public_holiday", args=[activity_id]
         )
-    except requests.exceptions.ConnectionError:
+    except Exception as e:
         logger.error(
-            "Error checking public holiday via API as it failed to connect to API."
+            f"Failed to queue the public holiday check for activity ID {activity_id} (left for nightly reconciliation): {str(e)}"
         )
-    except requests.RequestException as e:
-        logger.error(f"Unexpected error when checking public holiday via API: {str(e)}")
-
-    # Ensure something returns (DONT SET CACHE AS API CALL FAILED)
-    return False
 
 
 def can_manager_export_report(user: Union[User, int]) -> bool:
@@ -168,6 +136,11 @@ def api_get_user_object_from_session(request) -> User:
     if employee_id is None:
         raise Exception("No user_id set in session details!")
 
+    # Reuse the user already loaded (and checked) by the auth decorators for this request
+    principal = get_request_principal(request)
+    if principal is not None:
+        return principal
+
     # Get employee data to check state
     try:
         employee = User.objects.get(pk=employee_id)
@@ -351,6 +324,7 @@ def employee_has_conflicting_activities(
     Checks to see if an activity collides with another activity (i.e. A: 9am-5pm and B: 3pm-7pm).
     This also checks to make sure activities have a `gap_period_mins` between each activity for the user for a store for a day.
     THIS WILL ALLOW ACTIVITIES ENDING AT MIDNIGHT AND STARTING NEXT DAY AT MIDNIGHT.
+    Same rule as the database's `ACTIVITY_OVERLAP_CONSTRAINT` (with the default gap), checked with a single query.
 
     Args:
         employee_id (int): The ID of the employee.
@@ -366,32 +340,16 @@ def employee_has_conflicting_activities(
     """
     # Get activities for the employee on the given day for the given store
     activities = Activity.objects.filter(
-        employee_id=employee_id, store_id=store_id, login_time__date=login.date()
-    )
+        employee_id=employee_id,
+        store_id=store_id,
+        work_date=Activity.get_work_date(login),
+    ).overlapping(login, logout, gap_period_mins=gap_period_mins)
 
     # Exclude an acitivity if given (i.e. updating an existing activity)
     if exclude_activity_id:
         activities = activities.exclude(pk=exclude_activity_id)
 
-    for act in activities:
-        # Determine actual range of the compared activity
-        other_start = act.login_time
-        # Extend open-ended activity to end of the day (23:59:59)
-        other_end = act.logout_time or datetime.combine(other_start.date(), time.max)
-
-        # Apply buffer to both sides
-        login_start_buffer = login - timedelta(minutes=gap_period_mins)
-        logout_end_buffer = (
-            logout + timedelta(minutes=gap_period_mins)
-            if logout
-            else datetime.combine(login.date(), time.max)
-        )
-
-        # Check overlap (inclusive of buffer zone)
-        if login_start_buffer < other_end and logout_end_buffer > other_start:
-            return True
-
-    return False
+    return activities.exists()
 
 
 def employee_has_conflicting_shifts(
@@ -407,6 +365,7 @@ def employee_has_conflicting_shifts(
     Checks to see if a scheduled shift collides with another shift (i.e. A: 9am-5pm and B: 3pm-7pm).
     This also checks to make sure shifts have a `gap_period_mins` between each activity for the user for a store for a day.
     THIS WILL ALLOW SCHEDULED SHIFTS ENDING AT MIDNIGHT AND STARTING NEXT DAY AT MIDNIGHT.
+    Same rule as the database's `SHIFT_OVERLAP_CONSTRAINT` (with the default gap), checked with a single query.
 
     Args:
         employee_id (int): The ID of the employee.
@@ -421,29 +380,16 @@ def employee_has_conflicting_shifts(
     Returns:
         bool: Whether there is a conflict or not.
     """
-    # Get activities for the employee on the given day for the given store
-    shifts = Shift.objects.filter(employee_id=employee_id, store_id=store_id, date=date)
+    # Get shifts for the employee on the given day for the given store
+    shifts = Shift.objects.filter(
+        employee_id=employee_id, store_id=store_id, date=date
+    ).overlapping(login, logout, gap_period_mins=gap_period_mins)
 
     # Exclude an acitivity if given (i.e. updating an existing activity)
     if exclude_shift_id:
         shifts = shifts.exclude(pk=exclude_shift_id)
 
-    for shift in shifts:
-        # Use datetime variables by using date to combine them with time
-        other_start = datetime.combine(date, shift.start_time)
-        other_end = datetime.combine(date, shift.end_time)
-        this_start = datetime.combine(date, login)
-        this_end = datetime.combine(date, logout)
-
-        # Add/subtract buffer
-        this_start_buffer = this_start - timedelta(minutes=gap_period_mins)
-        this_end_buffer = this_end + timedelta(minutes=gap_period_mins)
-
-        # Check for overlap
-        if this_start_buffer < other_end and this_end_buffer > other_start:
-            return True
-
-    return False
+    return shifts.exists()
 
 
 def get_filter_list_from_string(
@@ -524,6 +470,14 @@ def clean_param_str(value):
         return str(value).strip()
 
 
+def get_response_etag(data) -> str:
+    """
+    Get a (quoted) strong ETag for a response's data, changing whenever any of its values change.
+    """
+    content = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+    return quote_etag(hashlib.md5(content.encode(), usedforsecurity=False).hexdigest())
+
+
 def is_shift_duration_valid(
     start_time: time,
     end_time: time,
@@ -623,7 +577,7 @@ def check_store_exceptions_in_period(
             )
             | Q(
                 activity__store_id=store_id,
-                activity__login_timestamp__range=(start_dt, end_dt),
+                activity__work_date__range=(start_dt.date(), end_dt.date()),
             )
         )
     ).exists()
@@ -666,86 +620,6 @@ def check_perfect_shift_activity_timings(activity: Activity, shift: Shift) -> bo
     return True
 
 
-def is_valid_linking_activity_candidate(
-    possible_activity: Activity,
-    existing_exception: Optional[ShiftException] = None,
-    other_shifts: Optional[List[Shift]] = None,
-) -> bool:
-    """
-    Check whether the given activity is a valid candidate for linking to a shift.
-
-    Args:
-        possible_activity (Activity): The activity to validate.
-        existing_exception (ShiftException, optional): Existing exception, if any.
-        other_shifts (List[Shift], optional): Preloaded list of other shifts for performance. Used to check if perfect match already exists for possible activity.
-
-    Returns:
-        bool: True if this activity is valid for linking, else False.
-    """
-    if not possible_activity.logout_time:
-        return False
-
-    # Check if the given activity has a related exception
-    related_exception = getattr(possible_activity, "activity_shiftexception", None)
-
-    if related_exception:
-        # Linked to current shift's exception
-        if existing_exception and possible_activity == existing_exception.activity:
-            return True
-        # Linked exception has no shift
-        elif not related_exception.shift:
-            return True
-        # Otherwise it's already a full exception — not valid
-        return False
-
-    # Skip if it's already has a perfect match (with another shift)
-    if other_shifts:
-        for s in other_shifts:
-            if check_perfect_shift_activity_timings(
-                activity=possible_activity, shift=s
-            ):
-                return False
-
-    return True
-
-
-def is_valid_linking_shift_candidate(
-    possible_shift: Shift,
-    existing_exception: Optional[ShiftException] = None,
-    other_activities: Optional[List[Activity]] = None,
-) -> bool:
-    """
-    Check whether the given shift is a valid candidate for linking to an activity.
-
-    Args:
-        possible_shift (Shift): The shift to validate.
-        existing_exception (ShiftException, optional): Existing exception, if any.
-        other_activities (List[Activity], optional): Preloaded list of other activities for performance. Used to check if perfect match already exists for possible shift.
-
-    Returns:
-        bool: True if this shift is valid for linking, else False.
-    """
-    related_exception = getattr(possible_shift, "shift_shiftexception", None)
-
-    if related_exception:
-        # Allow if already linked to the activity's exception
-        if existing_exception and possible_shift == existing_exception.shift:
-            return True
-        # Allow if the shift exception exists but has no linked activity
-        elif not related_exception.activity:
-            return True
-        # Otherwise it's already a full exception — not valid
-        return False
-
-    # Skip if it's already has a perfect match (with another shift)
-    if other_activities:
-        for a in other_activities:
-            if check_perfect_shift_activity_timings(shift=possible_shift, activity=a):
-                return False
-
-    return True
-
-
 def ensure_aware_datetime(dt: datetime) -> datetime:
     """
     Return timezone aware datetime if given niave dt.
@@ -753,20 +627,6 @@ def ensure_aware_datetime(dt: datetime) -> datetime:
     return make_aware(dt) if is_naive(dt) else dt
 
 
-def schedule_copy_do_shifts_collide(
-    shift1_start,
-    shift1_end,
-    shift2_start,
-    shift2_end,
-    gap=settings.START_NEW_SHIFT_TIME_DELTA_THRESHOLD_MINS,
-):
-    """Return True if shift1 and shift2 overlap or are too close."""
-    gap_delta = timedelta(minutes=gap)
-    return not (
-        shift1_end + gap_delta <= shift2_start or shift2_end + gap_delta <= shift1_start
-    )
-
-
 # THESE FOLLOWING TWO FUNCTIONS ARE DUPLICATED IN AUTH_APP.UTILS
 def get_repeating_shift_cycle_week(
     dt: Union[datetime, date],
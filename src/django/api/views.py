@@ -20,15 +20,18 @@ from django.db import transaction, IntegrityError, DatabaseError
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from django.views.decorators.http import require_GET
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.utils.timezone import now, localtime, make_aware
 from auth_app.utils import (
     sanitise_markdown_title_text,
     sanitise_markdown_message_text,
-    update_user_stats_cache,
 )
+from auth_app.user_stats import update_shift_request_user_stats
+from auth_app.clocked_state import set_clocked_state
 from auth_app.models import (
     User,
     Activity,
+    ActivityDailySummary,
     Store,
     StoreUserAccess,
     Notification,
@@ -371,6 +374,7 @@ def update_shift_details(request, id):
             )
 
         # Save activity info
+        was_ongoing = activity.logout_time is None
         original = {
             "id": activity.id,
             "deliveries": activity.deliveries,
@@ -387,20 +391,16 @@ def update_shift_details(request, id):
             with transaction.atomic():
                 activity.delete()
 
-                # Create exception IF there is a correlated shift
-                shift = (
-                    Shift.objects.select_related("store")
-                    .filter(
-                        store_id=activity.store_id,
-                        employee_id=activity.employee_id,
-                        date=activity.login_time.date(),
-                        is_deleted=False,
-                    )
-                    .defer("comment")
-                    .first()
+                # Deleting the ongoing activity clocks the employee out
+                if was_ongoing:
+                    set_clocked_state(activity.employee_id, activity.store_id, None)
+
+                # Re-match the day's shifts without the activity (i.e. a correlated shift is now missed)
+                controllers.reconcile_employee_day(
+                    store=activity.store,
+                    employee_id=activity.employee_id,
+                    day=original["login_time"].date(),
                 )
-                if shift:
-                    controllers.link_activity_to_shift(shift=shift)
 
             logger.info(
                 f"Manager ID {manager.id} ({manager.first_name} {manager.last_name}) deleted an ACTIVITY with ID {id} for the employee ID {activity.employee.id} ({activity.employee.first_name} {activity.employee.last_name}) under the store [{activity.store.code}])."
@@ -561,10 +561,38 @@ def update_shift_details(request, id):
             with transaction.atomic():
                 activity.save()
 
+                # Editing the ongoing activity changes the employee's clocked state (i.e. finishes or re-opens it)
+                if was_ongoing or activity.logout_time is None:
+                    set_clocked_state(
+                        activity.employee_id,
+                        activity.store_id,
+                        activity if activity.logout_time is None else None,
+                    )
+
+                # Saving updates the new day's rollup -> update the original day's rollup if the activity moved days
+                if (
+                    original["login_time"].date()
+                    != localtime(activity.login_time).date()
+                ):
+                    ActivityDailySummary.rebuild_for_activity(
+                        activity, date=original["login_time"].date()
+                    )
+
                 # If activity is finished -> check for exceptions
                 if activity.logout_time:
                     controllers.link_activity_to_shift(activity=activity)
 
+                # Re-match the original day if the activity moved days
+                if (
+                    original["login_time"].date()
+                    != localtime(activity.login_time).date()
+                ):
+                    controllers.reconcile_employee_day(
+                        store=activity.store,
+                        employee_id=activity.employee_id,
+                        day=original["login_time"].date(),
+                    )
+
             logger.info(
                 f"Manager ID {manager.id} ({manager.first_name} {manager.last_name}) updated an ACTIVITY with ID {id} for the employee ID {activity.employee.id} ({activity.employee.first_name} {activity.employee.last_name}) under the store [{activity.store.code}])."
             )
@@ -630,9 +658,8 @@ def create_new_shift(request):
         now_time = localtime(now())
 
         # Get the account info of the user requesting this shift info
-        manager_id = request.session.get("user_id")
         try:
-            manager = User.objects.get(id=manager_id)
+            manager = util.api_get_user_object_from_session(request)
         except User.DoesNotExist:
             return Response(
                 {
@@ -827,6 +854,8 @@ def create_new_shift(request):
             # If activity is finished -> check for exceptions
             if activity.logout_time:
                 controllers.link_activity_to_shift(activity=activity.id)
+            else:
+                set_clocked_state(employee.id, store.id, activity)
 
         logger.info(
             f"Manager ID {manager.id} ({manager.first_name} {manager.last_name}) created a new ACTIVITY with ID {activity.id} for the employee ID {employee.id} ({employee.first_name} {employee.last_name}) under the store [{store.code}]."
@@ -1507,6 +1536,7 @@ def modify_account_status(request, id):
                 )
             employee.is_active = False
             employee.save()
+            util.flush_user_sessions(user_id=employee.id, reason="DEACTIVATION")
             tasks.notify_managers_account_deactivated.delay(
                 user_id=employee.id, manager_id=manager.id
             )
@@ -1529,6 +1559,7 @@ def modify_account_status(request, id):
         elif status_type == "reset_password":
             employee.is_setup = False
             employee.save()
+            util.flush_user_sessions(user_id=employee.id, reason="PASSWORD-RESET")
             tasks.notify_employee_account_reset_password.delay(
                 user_id=employee.id, manager_id=manager.id
             )
@@ -1702,7 +1733,7 @@ def modify_account_password(request):
 
         # Get employee
         employee_id = request.session.get("user_id")
-        employee = User.objects.get(pk=employee_id)
+        employee = util.api_get_user_object_from_session(request)
 
         # Check account can be modified
         if not employee.is_active:
@@ -2071,13 +2102,20 @@ def clocked_state_view(request):
         # Get the user object from the session information
         employee = util.api_get_user_object_from_session(request)
 
-        # Get the user's info
+        # Get the user's info (from the cached clocked state -> polling doesn't query the database)
         info = controllers.get_employee_clocked_info(
-            employee_id=employee.id, store_id=store_id
+            employee_id=employee.id, store_id=store_id, employee=employee
         )
+        data = ClockedInfoSerializer(info).data
 
-        # Return the info
-        return Response(ClockedInfoSerializer(info).data, status=status.HTTP_200_OK)
+        # Let the dashboard revalidate its last response instead of downloading it again
+        etag = util.get_response_etag(data)
+        response = get_conditional_response(request, etag=etag) or Response(
+            data, status=status.HTTP_200_OK
+        )
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     except User.DoesNotExist:
         # Return a 404 if the user does not exist
@@ -2584,11 +2622,8 @@ def mark_notification_read(request, id):
         # Get notification
         notif = Notification.objects.get(pk=id)
 
-        # Mark the notification as read
-        marked = notif.mark_notification_as_read(user=user_id)
-
-        if marked:
-            update_user_stats_cache(user_id=user_id, increase_notif_count=-1)
+        # Mark the notification as read (updates the user's stats)
+        notif.mark_notification_as_read(user=user_id)
 
         # Logging
         logger.debug(
@@ -4122,6 +4157,9 @@ def request_shift_cover(request, shift_id):
                 shift=shift,
             )
 
+        # Update the active request counts of the users who can see it
+        update_shift_request_user_stats(req)
+
         logger.info(
             f"User ID {employee.id} ({employee.first_name} {employee.last_name}) requested COVER for shift ID {shift.id} from {f'[{shift.store.code}]' if req.type != ShiftRequest.Type.SWAP else f'Employee ID {selected_employee_id}'}."
         )
@@ -4224,9 +4262,6 @@ def manage_shift_request(request, req_id):
             req.status = ShiftRequest.Status.ACCEPTED
             req.save()
 
-            # Manually update user's cache
-            update_user_stats_cache(user_id=employee.id, increase_shift_req_count=-1)
-
         # PUT -> MANAGER APPROVES THE COVER -> UPDATE SHIFT
         elif request.method == "PUT":
             # Ensure user is manager
@@ -4289,8 +4324,6 @@ def manage_shift_request(request, req_id):
                 if shift_end_dt < localtime(now()):
                     controllers.link_activity_to_shift(shift=req.shift_id)
 
-            update_user_stats_cache(user_id=employee.id, increase_shift_req_count=-1)
-
         # PATCH -> MANAGER/TARGET USER REJECTS REQUEST
         elif request.method == "PATCH":
             if req.status != ShiftRequest.Status.ACCEPTED and req.type in [
@@ -4321,9 +4354,6 @@ def manage_shift_request(request, req_id):
             req.status = ShiftRequest.Status.REJECTED
             req.save()
 
-            # Manually update user's cache
-            update_user_stats_cache(user_id=employee.id, increase_shift_req_count=-1)
-
         # DELETE -> MANAGER/REQUESTING USER DELETES/CANCELS IT IN `PENDING` STATE
         elif request.method == "DELETE":
             # Ensure user is MANAGER or AUTHORING user
@@ -4345,11 +4375,8 @@ def manage_shift_request(request, req_id):
             req.status = ShiftRequest.Status.CANCELLED
             req.save()
 
-            # Manually update user's cache -- manager doesnt get an active notification for it, so ignore them
-            if employee.id == req.requester_id:
-                update_user_stats_cache(
-                    user_id=employee.id, increase_shift_req_count=-1
-                )
+        # Update the active request counts of every affected user (i.e. store employees/managers)
+        update_shift_request_user_stats(req, old_status=original["status"].lower())
 
         tasks.notify_shift_request_status_change.delay(
             request_id=req.id, acting_user_id=employee.id
@@ -8,6 +8,8 @@ from auth_app.forms import AdminActionRepeatingShiftWriterForm
 from auth_app.models import (
     User,
     Activity,
+    ActivityDailySummary,
+    PublicHolidayOverride,
     Store,
     StoreUserAccess,
     Notification,
@@ -231,6 +233,7 @@ class StoreAdmin(admin.ModelAdmin):
             if form.is_valid():
                 store_id = form.cleaned_data["store"].id
                 week_start_date = form.cleaned_data["week_start_date"]
+                weeks = form.cleaned_data["weeks"]
 
                 write_out_repeating_shifts_for_week.delay(
                     store_id=store_id,
@@ -239,6 +242,8 @@ class StoreAdmin(admin.ModelAdmin):
                         if week_start_date
                         else None
                     ),
+                    weeks=weeks,
+                    force=True,  # Explicitly requested
                 )
 
                 messages.success(request, "Task queued successfully.")
@@ -277,6 +282,38 @@ class ActivityAdmin(admin.ModelAdmin):
         return obj.store.code
 
 
+@admin.register(ActivityDailySummary)
+class ActivityDailySummaryAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "employee",
+        "store_code",
+        "date",
+        "mins_total",
+        "mins_weekday",
+        "mins_weekend",
+        "mins_public_holiday",
+        "deliveries",
+        "shift_count",
+    )
+    list_filter = ("store__code",)
+    search_fields = ("employee__first_name", "employee__last_name", "employee__email")
+    ordering = ("-date",)
+    readonly_fields = [field.name for field in ActivityDailySummary._meta.fields]
+
+    @admin.display(description="Store Code")
+    def store_code(self, obj):
+        return obj.store.code
+
+
+@admin.register(PublicHolidayOverride)
+class PublicHolidayOverrideAdmin(admin.ModelAdmin):
+    list_display = ("id", "date", "name", "is_public_holiday", "source", "updated_at")
+    list_filter = ("is_public_holiday", "source")
+    search_fields = ("name",)
+    ordering = ("-date",)
+
+
 @admin.register(StoreUserAccess)
 class StoreUserAccessAdmin(admin.ModelAdmin):
     list_display = (
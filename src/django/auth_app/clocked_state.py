@@ -0,0 +1,109 @@
+import logging
+
+from typing import Dict, Optional, Tuple
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger("auth_app")
+
+# The clocked state of an employee for a store is kept in the `clocked_state` cache (Redis in production), so the
+# clocking dashboard's polling doesn't reach the database. It is written through (once committed) by every change
+# of the employee's ongoing activity: clocking in/out, forced clock outs and manager edits.
+# Entries expire as a safety net for any other change (i.e. through the admin site).
+
+
+def _state_key(employee_id: int, store_id: int) -> str:
+    return f"clocked_state:{int(employee_id)}:{int(store_id)}"
+
+
+def _build_state(activity) -> dict:
+    """
+    The clocked state given the employee's ongoing activity for the store (None if clocked out).
+    """
+    return {
+        "clocked_in": activity is not None,
+        "login_time": activity.login_time if activity else None,
+        "login_timestamp": activity.login_timestamp if activity else None,
+    }
+
+
+def get_clocked_state(employee_id: int, store_id: int) -> Optional[dict]:
+    """
+    Get the cached clocked state of an employee for a store as {"clocked_in", "login_time", "login_timestamp"}.
+    Returns None on a miss (or if the cache can't be reached).
+    """
+    try:
+        return caches["clocked_state"].get(_state_key(employee_id, store_id))
+    except Exception as e:
+        logger.warning(
+            f"Failed to read the cached clocked state of employee ID {employee_id} for store ID {store_id}, producing error: {str(e)}"
+        )
+        return None
+
+
+def fill_clocked_state(employee_id: int, store_id: int, activity) -> dict:
+    """
+    Cache the clocked state loaded from the database after a miss, given the employee's ongoing activity for the
+    store (None if clocked out). Never replaces an entry written through in the meantime (the state loaded may
+    already be outdated).
+
+    Returns:
+      - dict: The clocked state.
+    """
+    state = _build_state(activity)
+    try:
+        caches["clocked_state"].add(
+            _state_key(employee_id, store_id),
+            state,
+            timeout=settings.CLOCKED_STATE_CACHE_TIMEOUT_SEC,
+        )
+    except Exception as e:
+        logger.warning(
+            f"Failed to cache the clocked state of employee ID {employee_id} for store ID {store_id}, producing error: {str(e)}"
+        )
+    return state
+
+
+def set_clocked_states(activities: Dict[Tuple[int, int], object]) -> None:
+    """
+    Write through the clocked states of many employees once the current transaction commits (right away outside
+    of one), in a single round trip.
+
+    Args:
+      - activities (dict): {(employee_id, store_id): ongoing activity (None if clocked out)}
+    """
+    if not activities:
+        return
+
+    states = {
+        _state_key(employee_id, store_id): _build_state(activity)
+        for (employee_id, store_id), activity in activities.items()
+    }
+
+    def write():
+        try:
+            caches["clocked_state"].set_many(
+                states, timeout=settings.CLOCKED_STATE_CACHE_TIMEOUT_SEC
+            )
+        except Exception as e:
+            # Drop the (now outdated) entries instead -> next read falls back to the database
+            logger.warning(
+                f"Failed to write the clocked state of {len(states)} employees, producing error: {str(e)}"
+            )
+            try:
+                caches["clocked_state"].delete_many(list(states))
+            except Exception:
+                pass
+
+    transaction.on_commit(write)
+
+
+def set_clocked_state(employee_id: int, store_id: int, activity) -> None:
+    """
+    Write through the clocked state of an employee for a store once the current transaction commits.
+
+    Args:
+      - activity (Activity): The employee's ongoing activity for the store (None if clocked out).
+    """
+    set_clocked_states({(employee_id, store_id): activity})
@@ -548,3 +548,12 @@ class AdminActionRepeatingShiftWriterForm(forms.Form):
         required=True,
         label="Store",
     )
+
+    weeks = forms.IntegerField(
+        min_value=1,
+        max_value=3,
+        initial=1,
+        required=True,
+        label="Weeks",
+        help_text="Number of consecutive weeks to write out, starting from the week start date.",
+    )
@@ -0,0 +1,44 @@
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import now
+from auth_app.models import UserSession
+from auth_app.redis_sessions import SessionStore, SAVED_AT_KEY
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the unexpired database sessions to the Redis session engine so users stay logged in after "
+        "switching engines. Run it once after the switch -> sessions already in Redis are never replaced."
+    )
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE != "auth_app.redis_sessions":
+            raise CommandError(
+                f"The Redis session engine isn't in use (SESSION_ENGINE = '{settings.SESSION_ENGINE}')."
+            )
+
+        decoder = DBSessionStore()
+        copied = 0
+        for session in UserSession.objects.filter(expire_date__gt=now()).iterator():
+            data = decoder.decode(session.session_data)
+            expiry_age = int((session.expire_date - now()).total_seconds())
+            if not data or expiry_age <= 0:
+                continue
+
+            store = SessionStore(session.session_key)
+            # Never replace a session already created in Redis (`nx`)
+            if store._cache.set(
+                store.cache_key,
+                {**data, SAVED_AT_KEY: int(time.time())},
+                expiry_age,
+                nx=True,
+            ):
+                store._index_user_session(data.get("user_id"))
+                copied += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Copied {copied} database sessions to Redis.")
+        )
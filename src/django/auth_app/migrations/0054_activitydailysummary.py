@@ -0,0 +1,126 @@
+# Generated by Django 5.2.2 on 2026-01-08 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Q, Sum, Count, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_daily_summaries(apps, schema_editor):
+    Activity = apps.get_model("auth_app", "Activity")
+    ActivityDailySummary = apps.get_model("auth_app", "ActivityDailySummary")
+
+    # Same aggregation as `ActivityDailySummary.rebuild` (evaluated in the LOCAL timezone)
+    finished = Q(logout_time__isnull=False)
+    finished_regular_day = finished & Q(is_public_holiday=False)
+
+    rows = (
+        Activity.objects.annotate(work_date=TruncDate("login_time"))
+        .values("employee_id", "store_id", "work_date")
+        .annotate(
+            mins_total=Coalesce(Sum("shift_length_mins"), Value(0)),
+            mins_weekday=Coalesce(
+                Sum(
+                    "shift_length_mins",
+                    filter=finished_regular_day & Q(login_time__iso_week_day__lte=5),
+                ),
+                Value(0),
+            ),
+            mins_weekend=Coalesce(
+                Sum(
+                    "shift_length_mins",
+                    filter=finished_regular_day & Q(login_time__iso_week_day__gte=6),
+                ),
+                Value(0),
+            ),
+            mins_public_holiday=Coalesce(
+                Sum("shift_length_mins", filter=finished & Q(is_public_holiday=True)),
+                Value(0),
+            ),
+            deliveries=Coalesce(Sum("deliveries"), Value(0)),
+            shift_count=Count("id", filter=finished),
+        )
+        .order_by()
+    )
+
+    ActivityDailySummary.objects.bulk_create(
+        (
+            ActivityDailySummary(
+                employee_id=row["employee_id"],
+                store_id=row["store_id"],
+                date=row["work_date"],
+                mins_total=row["mins_total"],
+                mins_weekday=row["mins_weekday"],
+                mins_weekend=row["mins_weekend"],
+                mins_public_holiday=row["mins_public_holiday"],
+                deliveries=row["deliveries"],
+                shift_count=row["shift_count"],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_app", "0053_store_is_repeating_shifts_enabled"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActivityDailySummary",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("mins_total", models.IntegerField(default=0)),
+                ("mins_weekday", models.IntegerField(default=0)),
+                ("mins_weekend", models.IntegerField(default=0)),
+                ("mins_public_holiday", models.IntegerField(default=0)),
+                ("deliveries", models.IntegerField(default=0)),
+                ("shift_count", models.IntegerField(default=0)),
+                ("last_updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="auth_app.user",
+                    ),
+                ),
+                (
+                    "store",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_summaries",
+                        to="auth_app.store",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["store", "date"], name="dailysummary_store_date_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("employee", "store", "date"),
+                        name="unique_daily_summary_employee_store_date",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            backfill_daily_summaries, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.2 on 2026-01-12 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_app", "0054_activitydailysummary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PublicHolidayOverride",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField(unique=True)),
+                (
+                    "is_public_holiday",
+                    models.BooleanField(
+                        default=True,
+                        help_text="Whether the date IS a public holiday. Unticking it removes a holiday given by the offline calendar.",
+                    ),
+                ),
+                ("name", models.CharField(blank=True, default="", max_length=100)),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("manual", "Manual (Admin)"),
+                            ("api", "Public Holiday API"),
+                        ],
+                        default="manual",
+                        max_length=10,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "ordering": ["-date"],
+            },
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.2 on 2026-01-15 14:03
+
+from django.db import migrations, models
+from django.utils.timezone import now
+
+
+def copy_active_sessions(apps, schema_editor):
+    """
+    Copy the unexpired sessions of the default database engine so users stay logged in.
+    """
+    from django.contrib.sessions.backends.db import SessionStore
+
+    Session = apps.get_model("sessions", "Session")
+    UserSession = apps.get_model("auth_app", "UserSession")
+    decoder = SessionStore()
+
+    batch = []
+    for session in Session.objects.filter(expire_date__gt=now()).iterator():
+        try:
+            user_id = int(decoder.decode(session.session_data).get("user_id"))
+        except (ValueError, TypeError):
+            user_id = None
+
+        batch.append(
+            UserSession(
+                session_key=session.session_key,
+                session_data=session.session_data,
+                expire_date=session.expire_date,
+                user_id=user_id,
+            )
+        )
+        if len(batch) >= 5000:
+            UserSession.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+
+    UserSession.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_app", "0055_publicholidayoverride"),
+        ("sessions", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserSession",
+            fields=[
+                (
+                    "session_key",
+                    models.CharField(
+                        max_length=40,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="session key",
+                    ),
+                ),
+                ("session_data", models.TextField(verbose_name="session data")),
+                (
+                    "expire_date",
+                    models.DateTimeField(db_index=True, verbose_name="expire date"),
+                ),
+                ("user_id", models.IntegerField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                "verbose_name": "session",
+                "verbose_name_plural": "sessions",
+                "db_table": "auth_app_user_session",
+                "abstract": False,
+            },
+        ),
+        migrations.RunPython(
+            copy_active_sessions, reverse_code=migrations.RunPython.noop
+        ),
+    ]
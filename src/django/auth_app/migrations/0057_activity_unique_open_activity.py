@@ -0,0 +1,98 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:09
+
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def close_duplicate_open_activities(apps, schema_editor):
+    """
+    Keep only the latest open activity of an employee per store (clocked in twice by a race), closing the
+    older ones as zero length shifts so they stay visible for managers to correct.
+    """
+    Activity = apps.get_model("auth_app", "Activity")
+    open_activities = Activity.objects.filter(logout_time__isnull=True)
+    closed_days = set()
+
+    duplicates = (
+        open_activities.values("employee_id", "store_id")
+        .annotate(count=Count("id"))
+        .filter(count__gt=1)
+        .order_by()
+    )
+    for row in duplicates:
+        group = open_activities.filter(
+            employee_id=row["employee_id"], store_id=row["store_id"]
+        ).order_by("-login_time", "-id")
+        older_ids = list(group.values_list("id", flat=True)[1:])
+        older = Activity.objects.filter(id__in=older_ids)
+        closed_days.update(
+            older.annotate(day=TruncDate("login_time")).values_list(
+                "employee_id", "store_id", "day"
+            )
+        )
+        older.update(
+            logout_time=F("login_time"),
+            logout_timestamp=F("login_timestamp"),
+            shift_length_mins=0,
+        )
+
+    _rebuild_daily_summaries(apps, closed_days)
+
+
+def _rebuild_daily_summaries(apps, days):
+    """
+    Recalculate the daily rollups of the given (employee ID, store ID, local date) days, same as
+    `ActivityDailySummary.rebuild()` (which can't be used with the historical models).
+    """
+    Activity = apps.get_model("auth_app", "Activity")
+    ActivityDailySummary = apps.get_model("auth_app", "ActivityDailySummary")
+
+    # Same aggregation as `ActivityDailySummary.rebuild` (evaluated in the LOCAL timezone)
+    finished = Q(logout_time__isnull=False)
+    finished_regular_day = finished & Q(is_public_holiday=False)
+
+    def sum_mins(condition):
+        return Coalesce(Sum("shift_length_mins", filter=condition), Value(0))
+
+    for employee_id, store_id, date in days:
+        totals = (
+            Activity.objects.annotate(day=TruncDate("login_time"))
+            .filter(employee_id=employee_id, store_id=store_id, day=date)
+            .aggregate(
+                mins_total=Coalesce(Sum("shift_length_mins"), Value(0)),
+                mins_weekday=sum_mins(
+                    finished_regular_day & Q(login_time__iso_week_day__lte=5)
+                ),
+                mins_weekend=sum_mins(
+                    finished_regular_day & Q(login_time__iso_week_day__gte=6)
+                ),
+                mins_public_holiday=sum_mins(finished & Q(is_public_holiday=True)),
+                deliveries=Coalesce(Sum("deliveries"), Value(0)),
+                shift_count=Count("id", filter=finished),
+            )
+        )
+        ActivityDailySummary.objects.update_or_create(
+            employee_id=employee_id, store_id=store_id, date=date, defaults=totals
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_app", "0056_usersession"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            close_duplicate_open_activities, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="activity",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("logout_time__isnull", True)),
+                fields=("employee", "store"),
+                name="unique_open_activity_per_employee_store",
+            ),
+        ),
+    ]
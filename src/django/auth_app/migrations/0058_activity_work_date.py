@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:30
+
+from django.db import migrations, models
+from django.db.models.functions import TruncDate
+
+
+def backfill_work_dates(apps, schema_editor):
+    Activity = apps.get_model("auth_app", "Activity")
+
+    # Same as `Activity.get_work_date` (TruncDate is evaluated in the LOCAL timezone)
+    Activity.objects.update(work_date=TruncDate("login_time"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_app", "0057_activity_unique_open_activity"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="activity",
+            name="work_date",
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_work_dates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="activity",
+            name="work_date",
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["store", "work_date"], name="activity_store_work_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="activity",
+            index=models.Index(
+                fields=["employee", "store", "work_date"],
+                name="activity_emp_store_wdate_idx",
+            ),
+        ),
+    ]
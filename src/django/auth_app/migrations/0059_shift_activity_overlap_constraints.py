@@ -0,0 +1,340 @@
+# Generated by Django 5.2.9 on 2026-10-17 04:36
+
+import datetime
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.db.models.expressions
+import django.db.models.functions.comparison
+import django.db.models.functions.datetime
+import logging
+from itertools import groupby
+from django.db import migrations, models
+from django.db.models import F, Q
+from django.utils.timezone import now
+
+logger = logging.getLogger("auth_app")
+
+# Half the gap enforced between two shifts/activities (`START_NEW_SHIFT_TIME_DELTA_THRESHOLD_MINS`)
+HALF_GAP_SECS = 1800
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _find_conflicts(periods):
+    """
+    Given the (start secs, end secs or None, row) periods of one employee, store and day in order of priority,
+    get the rows conflicting with a higher priority row (same as the exclusion constraints).
+    """
+    kept, conflicting = [], []
+    for start, end, row in periods:
+        start -= HALF_GAP_SECS
+        end = None if end is None else end + HALF_GAP_SECS
+        if any(
+            (other_end is None or start < other_end)
+            and (end is None or other_start < end)
+            for other_start, other_end in kept
+        ):
+            conflicting.append(row)
+        else:
+            kept.append((start, end))
+    return conflicting
+
+
+def _time_secs(time):
+    return time.hour * 3600 + time.minute * 60 + time.second
+
+
+def _epoch_secs(timestamp):
+    return None if timestamp is None else round((timestamp - EPOCH).total_seconds())
+
+
+def _find_conflicting_shifts(Shift):
+    # Visible shifts are kept over soft deleted ones, then the oldest shifts
+    shifts = (
+        Shift.objects.order_by("employee_id", "store_id", "date", "is_deleted", "id")
+        .values(
+            "id",
+            "employee_id",
+            "store_id",
+            "date",
+            "start_time",
+            "end_time",
+            "is_deleted",
+        )
+        .iterator()
+    )
+
+    conflicting = []
+    for _, group in groupby(
+        shifts, key=lambda row: (row["employee_id"], row["store_id"], row["date"])
+    ):
+        periods = []
+        for row in group:
+            start = _time_secs(row["start_time"])
+            periods.append((start, max(_time_secs(row["end_time"]), start), row))
+        conflicting.extend(_find_conflicts(periods))
+    return conflicting
+
+
+def _find_conflicting_activities(Activity):
+    # Finished activities are kept over ongoing ones, then the earliest activities
+    activities = (
+        Activity.objects.filter(
+            Q(logout_time__isnull=True) | Q(logout_time__gt=F("login_time"))
+        )
+        .order_by("employee_id", "store_id", "work_date")
+        .values(
+            "id", "employee_id", "store_id", "work_date", "login_time", "logout_time"
+        )
+        .iterator()
+    )
+
+    conflicting = []
+    for _, group in groupby(
+        activities,
+        key=lambda row: (row["employee_id"], row["store_id"], row["work_date"]),
+    ):
+        group = sorted(
+            group,
+            key=lambda row: (row["logout_time"] is None, row["login_time"], row["id"]),
+        )
+        conflicting.extend(
+            _find_conflicts(
+                (_epoch_secs(row["login_time"]), _epoch_secs(row["logout_time"]), row)
+                for row in group
+            )
+        )
+    return conflicting
+
+
+def resolve_conflicts(apps, schema_editor):
+    """
+    Prepare the existing data (created before the rules were enforced on every path) for the overlap constraints.
+    Soft deleted shifts conflicting with another shift are removed. Any other conflict (visible shifts, activities)
+    is roster/payroll data -> the migration fails listing them so they can be corrected by hand first.
+    """
+    Shift = apps.get_model("auth_app", "Shift")
+    Activity = apps.get_model("auth_app", "Activity")
+    ShiftException = apps.get_model("auth_app", "ShiftException")
+
+    conflicting_shifts = _find_conflicting_shifts(Shift)
+    visible_shift_ids = [
+        row["id"] for row in conflicting_shifts if not row["is_deleted"]
+    ]
+    activity_ids = [row["id"] for row in _find_conflicting_activities(Activity)]
+    if visible_shift_ids or activity_ids:
+        raise RuntimeError(
+            "Existing shifts/activities overlap (or are too close to) another shift/activity of the same employee, "
+            "store and day. Correct them (i.e. through the admin site) before migrating.\n"
+            f"Shift IDs: {visible_shift_ids}\n"
+            f"Activity IDs: {activity_ids}"
+        )
+
+    soft_deleted_ids = [row["id"] for row in conflicting_shifts]
+    if not soft_deleted_ids:
+        return
+
+    # Handle their exceptions first (same as `ShiftException.detach_shifts`) -> exceptions without an activity
+    # are deleted, the others keep their activity
+    exceptions = ShiftException.objects.filter(shift_id__in=soft_deleted_ids)
+    exceptions.filter(activity__isnull=True).delete()
+    exceptions.update(shift=None, updated_at=now())
+
+    # Their shift requests are deleted with them (CASCADE), as when deleting a shift
+    deleted, cascaded = Shift.objects.filter(id__in=soft_deleted_ids).delete()
+    logger.warning(
+        f"Deleted {len(soft_deleted_ids)} soft deleted shifts conflicting with another shift (IDs {soft_deleted_ids}), with their cascades: {cascaded}."
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth_app", "0058_activity_work_date"),
+    ]
+
+    operations = [
+        migrations.RunPython(resolve_conflicts, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name="shift",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="activity",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                condition=models.Q(
+                    ("logout_time__isnull", True),
+                    ("logout_time__gt", models.F("login_time")),
+                    _connector="OR",
+                ),
+                expressions=[
+                    (
+                        models.Func(
+                            models.F("employee"),
+                            models.F("employee"),
+                            models.Value("[]"),
+                            function="int8range",
+                            output_field=django.contrib.postgres.fields.ranges.BigIntegerRangeField(),
+                        ),
+                        "&&",
+                    ),
+                    (
+                        models.Func(
+                            models.F("store"),
+                            models.F("store"),
+                            models.Value("[]"),
+                            function="int8range",
+                            output_field=django.contrib.postgres.fields.ranges.BigIntegerRangeField(),
+                        ),
+                        "&&",
+                    ),
+                    (
+                        models.Func(
+                            models.F("work_date"),
+                            models.F("work_date"),
+                            models.Value("[]"),
+                            function="daterange",
+                            output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                        ),
+                        "&&",
+                    ),
+                    (
+                        models.Func(
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.functions.comparison.Cast(
+                                    django.db.models.functions.datetime.Extract(
+                                        models.ExpressionWrapper(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("login_time"),
+                                                "-",
+                                                models.Value(
+                                                    datetime.datetime(
+                                                        1970,
+                                                        1,
+                                                        1,
+                                                        0,
+                                                        0,
+                                                        tzinfo=datetime.timezone.utc,
+                                                    )
+                                                ),
+                                            ),
+                                            output_field=models.DurationField(),
+                                        ),
+                                        "epoch",
+                                    ),
+                                    output_field=models.BigIntegerField(),
+                                ),
+                                "-",
+                                models.Value(1800),
+                            ),
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.functions.comparison.Cast(
+                                    django.db.models.functions.datetime.Extract(
+                                        models.ExpressionWrapper(
+                                            django.db.models.expressions.CombinedExpression(
+                                                models.F("logout_time"),
+                                                "-",
+                                                models.Value(
+                                                    datetime.datetime(
+                                                        1970,
+                                                        1,
+                                                        1,
+                                                        0,
+                                                        0,
+                                                        tzinfo=datetime.timezone.utc,
+                                                    )
+                                                ),
+                                            ),
+                                            output_field=models.DurationField(),
+                                        ),
+                                        "epoch",
+                                    ),
+                                    output_field=models.BigIntegerField(),
+                                ),
+                                "+",
+                                models.Value(1800),
+                            ),
+                            function="int8range",
+                            output_field=django.contrib.postgres.fields.ranges.BigIntegerRangeField(),
+                        ),
+                        "&&",
+                    ),
+                ],
+                name="exclude_overlapping_activities",
+                violation_error_message="The activity conflicts with another activity of the employee.",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="shift",
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(
+                expressions=[
+                    (
+                        models.Func(
+                            models.F("employee"),
+                            models.F("employee"),
+                            models.Value("[]"),
+                            function="int8range",
+                            output_field=django.contrib.postgres.fields.ranges.BigIntegerRangeField(),
+                        ),
+                        "&&",
+                    ),
+                    (
+                        models.Func(
+                            models.F("store"),
+                            models.F("store"),
+                            models.Value("[]"),
+                            function="int8range",
+                            output_field=django.contrib.postgres.fields.ranges.BigIntegerRangeField(),
+                        ),
+                        "&&",
+                    ),
+                    (
+                        models.Func(
+                            models.F("date"),
+                            models.F("date"),
+                            models.Value("[]"),
+                            function="daterange",
+                            output_field=django.contrib.postgres.fields.ranges.DateRangeField(),
+                        ),
+                        "&&",
+                    ),
+                    (
+                        models.Func(
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.functions.comparison.Cast(
+                                    django.db.models.functions.datetime.Extract(
+                                        models.F("start_time"), "epoch"
+                                    ),
+                                    output_field=models.BigIntegerField(),
+                                ),
+                                "-",
+                                models.Value(1800),
+                            ),
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.functions.comparison.Greatest(
+                                    django.db.models.functions.comparison.Cast(
+                                        django.db.models.functions.datetime.Extract(
+                                            models.F("end_time"), "epoch"
+                                        ),
+                                        output_field=models.BigIntegerField(),
+                                    ),
+                                    django.db.models.functions.comparison.Cast(
+                                        django.db.models.functions.datetime.Extract(
+                                            models.F("start_time"), "epoch"
+                                        ),
+                                        output_field=models.BigIntegerField(),
+                                    ),
+                                ),
+                                "+",
+                                models.Value(1800),
+                            ),
+                            function="int8range",
+                            output_field=django.contrib.postgres.fields.ranges.BigIntegerRangeField(),
+                        ),
+                        "&&",
+                    ),
+                ],
+                name="exclude_overlapping_shifts",
+                violation_error_message="The shift conflicts with another shift of the employee.",
+            ),
+        ),
+    ]
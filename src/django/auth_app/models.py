@@ -1,16 +1,28 @@
 import random
-from datetime import timedelta
-from django.db import models
-from django.db.models import Q
+from typing import Dict, List, Set, Tuple, Optional
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import models, transaction, IntegrityError
+from django.core.cache import caches
+from django.db.models import Q, F, Func, Sum, Count, Value, ExpressionWrapper
+from django.db.models.functions import Cast, Coalesce, Extract, Greatest
 from django.utils.timezone import now, localtime
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from django.contrib.postgres.indexes import GinIndex
-from django.contrib.postgres.fields import ArrayField
+from django.contrib.sessions.base_session import AbstractBaseSession
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import (
+    ArrayField,
+    BigIntegerRangeField,
+    DateRangeField,
+    RangeOperators,
+)
 from django.contrib.auth.hashers import make_password, check_password
 from clock_in_system.settings import (
     NOTIFICATION_DEFAULT_EXPIRY_LENGTH_DAYS,
     NOTIFICATION_MAX_EXPIRY_LENGTH_DAYS,
+    STORE_ACCESS_CACHE_TIMEOUT_SEC,
+    START_NEW_SHIFT_TIME_DELTA_THRESHOLD_MINS,
 )
 
 
@@ -22,6 +34,27 @@ HEX_COLOUR_VALIDATOR = RegexValidator(
 )
 
 
+############################ SESSIONS ##########################################
+
+
+class UserSession(AbstractBaseSession):
+    """
+    Database session which also stores the ID of the logged in user (if any),
+    allowing all of a user's sessions to be found/deleted with a single indexed query.
+    """
+
+    user_id = models.IntegerField(null=True, blank=True, db_index=True)
+
+    class Meta(AbstractBaseSession.Meta):
+        db_table = "auth_app_user_session"
+
+    @classmethod
+    def get_session_store_class(cls):
+        from auth_app.sessions import SessionStore
+
+        return SessionStore
+
+
 ############################ USERS ##########################################
 
 
@@ -60,24 +93,130 @@ class User(models.Model):
 
         return f"[{self.id}] {self.first_name} {self.last_name} ({self.email}){role}"
 
+    # Store access of the user as {store_id: (is_manager, store_is_active)} kept for the lifetime of this object
+    # (only once enabled with `cache_store_access`, i.e. for the request's authenticated user)
+    _store_access_cache_enabled: bool = False
+    _store_access: Optional[Dict[int, Tuple[bool, bool]]] = None
+
+    def cache_store_access(self) -> None:
+        """
+        Keep the user's store access on this object once loaded (for the rest of the request),
+        so `is_manager`, `is_associated_with_store` etc dont even need to hit the shared cache again.
+        """
+        self._store_access_cache_enabled = True
+
+    @classmethod
+    def get_with_store_access(cls, user_id: int) -> "User":
+        """
+        Get the user with their store access loaded and kept on the object (see `cache_store_access`).
+        Raises User.DoesNotExist if there is no user with the ID.
+        """
+        user = cls.objects.get(id=user_id)
+        user.cache_store_access()
+        user.get_store_access()
+        return user
+
+    def clear_store_access(self) -> None:
+        """
+        Clears the store access kept on this object (the shared cache is invalidated by signals).
+        """
+        self._store_access = None
+
+    @staticmethod
+    def _store_access_cache_keys(user_id: int) -> Tuple[str, str]:
+        return f"store_access_{int(user_id)}", f"store_access_version_{int(user_id)}"
+
+    @classmethod
+    def get_store_access_cache_version(cls, user_id: int) -> int:
+        """
+        Get the current cache version of the user's store access (and any cache entry depending on it).
+        """
+        _, version_key = cls._store_access_cache_keys(user_id)
+        return caches["default"].get(version_key, 0)
+
+    @classmethod
+    def get_cached_store_access(cls, user_id: int) -> Dict[int, Tuple[bool, bool]]:
+        """
+        Get a user's store access as {store_id: (is_manager, store_is_active)} from the shared (default) cache,
+        loading it with a single query on a miss. The entry is versioned, so a stale result computed
+        while the access was being changed is written under an old version and never read.
+        """
+        cache = caches["default"]
+        key, _ = cls._store_access_cache_keys(user_id)
+        version = cls.get_store_access_cache_version(user_id)
+
+        store_access = cache.get(key, version=version)
+        if store_access is None:
+            store_access = {
+                store_id: (is_manager, store_is_active)
+                for store_id, is_manager, store_is_active in StoreUserAccess.objects.filter(
+                    user_id=int(user_id)
+                ).values_list(
+                    "store_id", "is_manager", "store__is_active"
+                )
+            }
+            cache.set(
+                key,
+                store_access,
+                timeout=STORE_ACCESS_CACHE_TIMEOUT_SEC,
+                version=version,
+            )
+
+        return store_access
+
+    @classmethod
+    def invalidate_cached_store_access(cls, user_ids: List[int]) -> None:
+        """
+        Invalidate the users' cached store access by bumping their version once the current transaction commits
+        (right away outside of one). Bumping it earlier would let a concurrent request cache the access being
+        replaced under the new version.
+        """
+        user_ids = set(user_ids)
+        transaction.on_commit(lambda: cls._bump_store_access_cache_versions(user_ids))
+
+    @classmethod
+    def _bump_store_access_cache_versions(cls, user_ids: Set[int]) -> None:
+        cache = caches["default"]
+        for user_id in user_ids:
+            _, version_key = cls._store_access_cache_keys(user_id)
+            cache.add(version_key, 0, timeout=None)
+            try:
+                cache.incr(version_key)
+            except ValueError:  # Evicted between add & incr
+                cache.set(version_key, 1, timeout=None)
+
+    def get_store_access(self) -> Dict[int, Tuple[bool, bool]]:
+        """
+        Returns the user's store access as {store_id: (is_manager, store_is_active)}.
+        """
+        if self._store_access is not None:
+            return self._store_access
+
+        store_access = User.get_cached_store_access(self.id)
+        if self._store_access_cache_enabled:
+            self._store_access = store_access
+        return store_access
+
+    @staticmethod
+    def _get_store_id(store) -> Optional[int]:
+        if isinstance(store, Store):
+            return store.id
+        elif isinstance(store, int) or (isinstance(store, str) and store.isdigit()):
+            return int(store)
+        return None
+
     def is_manager(self, store=None) -> bool:
         """
         Checks if user is a manager of a certain store OR if they are a manager for ANY STORE if none specified.
         """
+        store_access = self.get_store_access()
         if store is None:
-            return StoreUserAccess.objects.filter(user=self, is_manager=True).exists()
+            return any(is_manager for is_manager, _ in store_access.values())
 
-        if isinstance(store, Store):  # Check if store is an object
-            return StoreUserAccess.objects.filter(
-                user=self, store_id=store.id, is_manager=True
-            ).exists()
-
-        elif isinstance(store, int) or (
-            isinstance(store, str) and store.isdigit()
-        ):  # If store is an ID
-            return StoreUserAccess.objects.filter(
-                user=self, store_id=int(store), is_manager=True
-            ).exists()
+        store_id = self._get_store_id(store)
+        if store_id is None:
+            return None
+        return store_access.get(store_id, (False, False))[0]
 
     # Password management
     def set_password(self, raw_password: str) -> None:
@@ -168,15 +307,7 @@ class User(models.Model):
         Checks if the user is associated with the given store (either way).
         You can pass a store object or store id.
         """
-        if isinstance(store, Store):  # Check if store is an object
-            return StoreUserAccess.objects.filter(user=self, store=store).exists()
-        elif isinstance(store, int) or (
-            isinstance(store, str) and store.isdigit()
-        ):  # If store is an ID
-            return StoreUserAccess.objects.filter(
-                user=self, store_id=int(store)
-            ).exists()
-        return False
+        return self._get_store_id(store) in self.get_store_access()
 
     def get_associated_stores(
         self,
@@ -192,30 +323,25 @@ class User(models.Model):
             - If show_inactive_for_managers is True, also includes inactive stores
               where the user is a manager.
         """
-        qs = Store.objects.all()
+        store_access = self.get_store_access()
 
         if get_only_stores_as_manager:
             # Only stores where this user is a manager
-            qs = qs.filter(user_access__user=self, user_access__is_manager=True)
-            if not show_inactive_for_managers:
-                qs = qs.filter(is_active=True)
+            store_ids = [
+                store_id
+                for store_id, (is_manager, store_is_active) in store_access.items()
+                if is_manager and (store_is_active or show_inactive_for_managers)
+            ]
 
         else:
-            # Stores this user belongs to
-            qs = qs.filter(user_access__user=self)
-            if show_inactive_for_managers:
-                qs = qs.filter(
-                    Q(is_active=True)
-                    | Q(
-                        is_active=False,
-                        user_access__user=self,
-                        user_access__is_manager=True,
-                    )
-                )
-            else:
-                qs = qs.filter(is_active=True)
+            # Active stores this user belongs to (+ inactive stores they manage if requested)
+            store_ids = [
+                store_id
+                for store_id, (is_manager, store_is_active) in store_access.items()
+                if store_is_active or (show_inactive_for_managers and is_manager)
+            ]
 
-        return qs.distinct()
+        return Store.objects.filter(id__in=store_ids)
 
     def is_manager_of(self, employee, ignore_inactive_stores: bool = True) -> bool:
         """
@@ -227,28 +353,30 @@ class User(models.Model):
         if not self.is_active:
             return False
 
-        # Resolve employee object if ID is provided
-        if isinstance(employee, int) or (
+        # Resolve employee ID if an object is provided
+        if isinstance(employee, User):
+            employee_id = employee.id
+        elif isinstance(employee, int) or (
             isinstance(employee, str) and employee.isdigit()
         ):
-            try:
-                employee = User.objects.get(id=int(employee))
-            except User.DoesNotExist:
-                return False
-        elif not isinstance(employee, User):
+            employee_id = int(employee)
+        else:
             return False
 
         # Get store IDs where the current user is a manager
-        manager_store_qs = StoreUserAccess.objects.filter(user=self, is_manager=True)
-        if ignore_inactive_stores:
-            manager_store_qs = manager_store_qs.filter(store__is_active=True)
-
-        manager_store_ids = manager_store_qs.values_list("store_id", flat=True)
+        manager_store_ids = {
+            store_id
+            for store_id, (
+                is_manager,
+                store_is_active,
+            ) in self.get_store_access().items()
+            if is_manager and (store_is_active or not ignore_inactive_stores)
+        }
 
         # Check if the employee shares any of those stores
-        return StoreUserAccess.objects.filter(
-            user=employee, store_id__in=manager_store_ids
-        ).exists()
+        return not manager_store_ids.isdisjoint(
+            User.get_cached_store_access(employee_id)
+        )
 
     def get_active_shift_requests(self):
         """
@@ -342,7 +470,7 @@ class User(models.Model):
         Returns:
             bool: True if a shift exists for that date, otherwise False.
         """
-        qs = Activity.objects.filter(employee=self, login_timestamp__date=date)
+        qs = Activity.objects.filter(employee=self, work_date=date)
 
         if store:
             if isinstance(store, Store):
@@ -515,6 +643,119 @@ class StoreUserAccess(models.Model):
 ########################## SHIFTS ##########################
 
 
+OPEN_ACTIVITY_CONSTRAINT = "unique_open_activity_per_employee_store"
+ACTIVITY_OVERLAP_CONSTRAINT = "exclude_overlapping_activities"
+SHIFT_OVERLAP_CONSTRAINT = "exclude_overlapping_shifts"
+
+# Activities that took no time (i.e. clocked in and out within the same rounding) can't overlap anything
+ACTIVITY_OVERLAP_CONDITION = Q(logout_time__isnull=True) | Q(
+    logout_time__gt=F("login_time")
+)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _single_value_range(
+    field: str, function: str = "int8range", output_field=BigIntegerRangeField()
+) -> Func:
+    """
+    The range `[value, value]` of a column. Two of them overlap when the values are equal, which lets the GiST
+    exclusion constraints compare IDs/dates without the `btree_gist` extension.
+    """
+    return Func(
+        F(field), F(field), Value("[]"), function=function, output_field=output_field
+    )
+
+
+def _overlap_period(start_secs, end_secs, gap_period_mins: int) -> Func:
+    """
+    The range `[start - gap/2, end + gap/2)` (in seconds) of a shift/activity. Two periods overlap exactly when the
+    shifts/activities overlap or are less than `gap_period_mins` apart. A NULL end (ongoing activity) is unbounded.
+    """
+    half_gap_secs = gap_period_mins * 30
+    return Func(
+        start_secs - half_gap_secs,
+        end_secs + half_gap_secs,
+        function="int8range",
+        output_field=BigIntegerRangeField(),
+    )
+
+
+def _shift_period(
+    start_time, end_time, gap_period_mins=START_NEW_SHIFT_TIME_DELTA_THRESHOLD_MINS
+) -> Func:
+    def seconds(time):  # Since midnight
+        return Cast(Extract(time, "epoch"), output_field=models.BigIntegerField())
+
+    # A shift ending before it starts (i.e. approved from an activity past midnight) is checked from its start only
+    return _overlap_period(
+        seconds(start_time),
+        Greatest(seconds(end_time), seconds(start_time)),
+        gap_period_mins,
+    )
+
+
+def _activity_period(
+    login_time, logout_time, gap_period_mins=START_NEW_SHIFT_TIME_DELTA_THRESHOLD_MINS
+) -> Func:
+    def seconds(timestamp):
+        # Since the epoch -> extracted from an interval as EXTRACT on a timestamptz depends on the session's timezone
+        # (and can't be indexed)
+        return Cast(
+            Extract(
+                ExpressionWrapper(
+                    timestamp - Value(EPOCH), output_field=models.DurationField()
+                ),
+                "epoch",
+            ),
+            output_field=models.BigIntegerField(),
+        )
+
+    return _overlap_period(seconds(login_time), seconds(logout_time), gap_period_mins)
+
+
+class ActivityQuerySet(models.QuerySet):
+    def overlapping(
+        self,
+        login_time,
+        logout_time=None,
+        gap_period_mins: int = START_NEW_SHIFT_TIME_DELTA_THRESHOLD_MINS,
+    ):
+        """
+        Filter the activities that overlap the given times (or are less than `gap_period_mins` apart), same as
+        `ACTIVITY_OVERLAP_CONSTRAINT`. Filter the employee, store and work date first.
+        """
+        period = _activity_period(
+            Value(login_time, output_field=models.DateTimeField()),
+            Value(logout_time, output_field=models.DateTimeField()),
+            gap_period_mins,
+        )
+        return (
+            self.filter(ACTIVITY_OVERLAP_CONDITION)
+            .alias(
+                overlap_period=_activity_period(
+                    F("login_time"), F("logout_time"), gap_period_mins
+                )
+            )
+            .filter(overlap_period__overlap=period)
+        )
+
+    def delete(self):
+        # Handle the linked exceptions in bulk before the activities go (they are SET_NULL otherwise)
+        with transaction.atomic():
+            ShiftException.detach_activities(self.values("pk"))
+            days = set(
+                self.values_list("employee_id", "store_id", "work_date")
+                .order_by()
+                .distinct()
+            )
+            deleted = super().delete()
+
+            # Remove the activities from their days' rollups
+            ActivityDailySummary.rebuild_days(days)
+            return deleted
+
+
 class Activity(models.Model):
     employee = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="activities"
@@ -532,15 +773,263 @@ class Activity(models.Model):
     last_updated_at = models.DateTimeField(
         auto_now=True, null=False
     )  # Track modifications outside clocking
+    # LOCAL date of the login time, set on save (filter dates with it instead of `login_time__date` -> uses the indexes)
+    work_date = models.DateField(null=False, editable=False)
+
+    objects = ActivityQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # An employee can only be clocked in once per store (also indexes the "who is clocked in" lookups)
+            models.UniqueConstraint(
+                fields=["employee", "store"],
+                condition=Q(logout_time__isnull=True),
+                name=OPEN_ACTIVITY_CONSTRAINT,
+            ),
+            # Activities of an employee for a store on a work date can't overlap or be too close (see `overlapping()`)
+            ExclusionConstraint(
+                name=ACTIVITY_OVERLAP_CONSTRAINT,
+                expressions=[
+                    (_single_value_range("employee"), RangeOperators.OVERLAPS),
+                    (_single_value_range("store"), RangeOperators.OVERLAPS),
+                    (
+                        _single_value_range("work_date", "daterange", DateRangeField()),
+                        RangeOperators.OVERLAPS,
+                    ),
+                    (
+                        _activity_period(F("login_time"), F("logout_time")),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+                condition=ACTIVITY_OVERLAP_CONDITION,
+                violation_error_message="The activity conflicts with another activity of the employee.",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["store", "work_date"], name="activity_store_work_date_idx"
+            ),
+            models.Index(
+                fields=["employee", "store", "work_date"],
+                name="activity_emp_store_wdate_idx",
+            ),
+        ]
+
+    @staticmethod
+    def get_work_date(login_time):
+        """
+        Get the work date (LOCAL date) of an activity logging in at the given time.
+        """
+        return localtime(login_time).date() if login_time else None
 
     def save(self, *args, **kwargs):
+        self.work_date = Activity.get_work_date(self.login_time)
         self.full_clean()
+        adding = self._state.adding
         super().save(*args, **kwargs)
 
+        # Keep the activity's daily rollup up to date (a new unfinished activity contributes nothing to it)
+        if not adding or self.logout_time is not None:
+            ActivityDailySummary.rebuild_for_activity(self)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ShiftException.detach_activities([self.pk])
+            deleted = super().delete(*args, **kwargs)
+
+            # Remove the activity from its (saved) day's rollup
+            ActivityDailySummary.rebuild_for_activity(self, date=self.work_date)
+            return deleted
+
     def __str__(self):
         return f"[{self.id}] [{self.login_time.date()}] {self.employee.first_name} {self.employee.last_name} ({self.employee_id}) → {self.store.code}"
 
 
+class ActivityDailySummary(models.Model):
+    """
+    Pre-aggregated labour rollup of an employee's activities for a store on a single LOCAL date (by login time).
+    Only FINISHED activities count towards the minutes and shift count.
+    """
+
+    employee = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="daily_summaries"
+    )
+    store = models.ForeignKey(
+        Store, on_delete=models.CASCADE, related_name="daily_summaries"
+    )
+    date = models.DateField(null=False)
+    mins_total = models.IntegerField(default=0, null=False)
+    mins_weekday = models.IntegerField(default=0, null=False)
+    mins_weekend = models.IntegerField(default=0, null=False)
+    mins_public_holiday = models.IntegerField(
+        default=0, null=False
+    )  # MUTUALLY EXCLUSIVE TO WEEKDAY/WEEKEND MINS
+    deliveries = models.IntegerField(default=0, null=False)
+    shift_count = models.IntegerField(default=0, null=False)
+    last_updated_at = models.DateTimeField(auto_now=True, null=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["employee", "store", "date"],
+                name="unique_daily_summary_employee_store_date",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["store", "date"], name="dailysummary_store_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"[{self.id}] [{self.date}] Employee ID {self.employee_id} → Store ID {self.store_id} ({self.mins_total} mins)"
+
+    @classmethod
+    def rebuild(cls, start_date, end_date, store_id=None, employee_id=None) -> int:
+        """
+        Recalculate the rollups within a (local) date range from the raw activities, optionally limited
+        to a single store and/or employee. Rollups for days without any activities are removed.
+
+        Returns:
+            int: The number of rollup rows written.
+        """
+        activities = Activity.objects.filter(
+            work_date__gte=start_date, work_date__lte=end_date
+        )
+        summaries = cls.objects.filter(date__gte=start_date, date__lte=end_date)
+        if store_id is not None:
+            activities = activities.filter(store_id=store_id)
+            summaries = summaries.filter(store_id=store_id)
+        if employee_id is not None:
+            activities = activities.filter(employee_id=employee_id)
+            summaries = summaries.filter(employee_id=employee_id)
+
+        # Public holidays are MUTUALLY EXCLUSIVE to regular week/weekend days.
+        # NOTE: `work_date` is the LOCAL date of the login (`iso_week_day`: Monday=1, Sunday=7)
+        finished = Q(logout_time__isnull=False)
+        finished_regular_day = finished & Q(is_public_holiday=False)
+
+        def sum_mins(condition: Q):
+            return Coalesce(Sum("shift_length_mins", filter=condition), Value(0))
+
+        rows = (
+            activities.values("employee_id", "store_id", "work_date")
+            .annotate(
+                mins_total=Coalesce(Sum("shift_length_mins"), Value(0)),
+                mins_weekday=sum_mins(
+                    finished_regular_day & Q(work_date__iso_week_day__lte=5)
+                ),
+                mins_weekend=sum_mins(
+                    finished_regular_day & Q(work_date__iso_week_day__gte=6)
+                ),
+                mins_public_holiday=sum_mins(finished & Q(is_public_holiday=True)),
+                deliveries=Coalesce(Sum("deliveries"), Value(0)),
+                shift_count=Count("id", filter=finished),
+            )
+            .order_by()
+        )
+
+        rollups = [
+            cls(
+                employee_id=row["employee_id"],
+                store_id=row["store_id"],
+                date=row["work_date"],
+                mins_total=row["mins_total"],
+                mins_weekday=row["mins_weekday"],
+                mins_weekend=row["mins_weekend"],
+                mins_public_holiday=row["mins_public_holiday"],
+                deliveries=row["deliveries"],
+                shift_count=row["shift_count"],
+            )
+            for row in rows
+        ]
+
+        with transaction.atomic():
+            if rollups:
+                cls.objects.bulk_create(
+                    rollups,
+                    update_conflicts=True,
+                    unique_fields=["employee", "store", "date"],
+                    update_fields=[
+                        "mins_total",
+                        "mins_weekday",
+                        "mins_weekend",
+                        "mins_public_holiday",
+                        "deliveries",
+                        "shift_count",
+                        "last_updated_at",
+                    ],
+                )
+
+            # Remove stale rollups (i.e. days whose activities were all deleted or moved)
+            summaries.exclude(id__in=[rollup.id for rollup in rollups]).delete()
+
+        return len(rollups)
+
+    @classmethod
+    def rebuild_days(cls, days) -> int:
+        """
+        Recalculate the rollups of the given (employee ID, store ID, date) days (i.e. after deleting activities).
+        """
+        return sum(
+            cls.rebuild(
+                start_date=date,
+                end_date=date,
+                store_id=store_id,
+                employee_id=employee_id,
+            )
+            for employee_id, store_id, date in days
+        )
+
+    @classmethod
+    def rebuild_for_activity(cls, activity, date=None) -> int:
+        """
+        Recalculate the rollup of the day an activity belongs to (or the given date, i.e. its date before an edit).
+        """
+        date = date or Activity.get_work_date(activity.login_time)
+        return cls.rebuild(
+            start_date=date,
+            end_date=date,
+            store_id=activity.store_id,
+            employee_id=activity.employee_id,
+        )
+
+
+######################## PUBLIC HOLIDAYS ##########################
+
+
+class PublicHolidayOverride(models.Model):
+    """
+    Admin managed (or API synced) corrections to the offline public holiday calendar for the configured region.
+    An override always takes priority over the offline calendar for its date.
+    """
+
+    class Source(models.TextChoices):
+        MANUAL = "manual", "Manual (Admin)"
+        API = "api", "Public Holiday API"
+
+    date = models.DateField(unique=True, null=False)
+    is_public_holiday = models.BooleanField(
+        default=True,
+        null=False,
+        help_text="Whether the date IS a public holiday. Unticking it removes a holiday given by the offline calendar.",
+    )
+    name = models.CharField(max_length=100, blank=True, default="")
+    source = models.CharField(
+        max_length=10, choices=Source.choices, default=Source.MANUAL, null=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True, null=False)
+    updated_at = models.DateTimeField(auto_now=True, null=False)
+
+    class Meta:
+        ordering = ["-date"]
+
+    def save(self, *args, **kwargs):
+        self.full_clean()
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"[{self.date}] {self.name or 'Unnamed'} → {'HOLIDAY' if self.is_public_holiday else 'NOT HOLIDAY'} ({self.get_source_display()})"
+
+
 ########################## NOTIFICATIONS ##########################
 
 
@@ -650,12 +1139,7 @@ class Notification(models.Model):
         if not receipt:
             raise NotificationReceipt.DoesNotExist
 
-        if receipt.read_at is None:
-            receipt.read_at = localtime(now())
-            receipt.save(update_fields=["read_at"])
-            return True
-
-        return False
+        return receipt.mark_as_read()
 
     @classmethod
     def send_to_users(
@@ -705,6 +1189,7 @@ class Notification(models.Model):
             NotificationReceipt(notification=notif, user=user) for user in users
         ]
         NotificationReceipt.objects.bulk_create(receipts)
+        NotificationReceipt.update_user_stats(receipts, notif_change=1)
         return notif
 
     @classmethod
@@ -757,8 +1242,66 @@ class Notification(models.Model):
             NotificationReceipt(notification=notif, user=user) for user in users
         ]
         NotificationReceipt.objects.bulk_create(receipts)
+        NotificationReceipt.update_user_stats(receipts, notif_change=1)
         return notif
 
+    @classmethod
+    def send_many_to_users(
+        cls,
+        notifications,
+        recipient_group,
+        notification_type=Type.GENERAL,
+        sender=None,
+        expires_on=None,
+        store=None,
+    ):
+        """
+        Create and send many notifications (each to its own users) at once, using bulk inserts.
+
+        Args:
+            notifications (iterable of tuple): (user IDs, title, message) of each notification to send. MAX 200 CHARS TITLES
+            recipient_group (Notification.RecipientType): One of the `Notification.RecipientType` choices defining the type of recipient the notifications are for.
+            notification_type (Notification.Type): One of `Notification.Type` choices defining the notification category.
+            sender (User or None): Optional User instance who is sending the notifications.
+            expires_on (date or None): Optional expiration date for the notifications.
+                Defaults to Notification default expiry date if None.
+            store (Store or None): ONLY INCLUDE THIS IF SENDING TO STORE MANAGERS (TO BE ABLE TO TRACK WHAT STORE ITS FOR)
+
+        Returns:
+            List[Notification]: The created Notification instances.
+        """
+        # Set default expiry if none set (enforce max expiry)
+        if expires_on is None:
+            expires_on = notification_default_expires_on()
+        else:
+            expires_on = min(expires_on, get_max_expiry_date())
+
+        notifications = list(notifications)
+        notifs = [
+            cls(
+                sender=sender,
+                store=store,
+                recipient_group=recipient_group,
+                title=title,
+                message=message,
+                notification_type=notification_type,
+                expires_on=expires_on,
+            )
+            for _, title, message in notifications
+        ]
+        for notif in notifs:
+            notif.full_clean()  # Same validation as saving
+        cls.objects.bulk_create(notifs)
+
+        receipts = [
+            NotificationReceipt(notification=notif, user_id=user_id)
+            for notif, (user_ids, _, _) in zip(notifs, notifications)
+            for user_id in set(user_ids)
+        ]
+        NotificationReceipt.objects.bulk_create(receipts)
+        NotificationReceipt.update_user_stats(receipts, notif_change=1)
+        return notifs
+
     @classmethod
     def send_system_notification_to_all(
         cls, title, message, sender=None, expires_on=None
@@ -813,10 +1356,35 @@ class NotificationReceipt(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
 
-    def mark_as_read(self):
-        if not self.read_at:
-            self.read_at = localtime(now())
-            self.save(update_fields=["read_at"])
+    def mark_as_read(self) -> bool:
+        """
+        Marks the receipt as read (only if it is still unread in the database -> safe against concurrent requests).
+
+        Returns:
+            - True if the receipt was updated to 'read'
+            - False if it was already marked as read
+        """
+        if self.read_at:
+            return False
+
+        read_at = localtime(now())
+        updated = NotificationReceipt.objects.filter(
+            pk=self.pk, read_at__isnull=True
+        ).update(read_at=read_at)
+        self.read_at = read_at
+
+        if updated:
+            NotificationReceipt.update_user_stats([self], notif_change=-1)
+        return bool(updated)
+
+    @staticmethod
+    def update_user_stats(receipts, notif_change: int):
+        """
+        Update the cached unread notification counts of the receipts' users (in a single round trip).
+        """
+        from auth_app.user_stats import increment_user_stats
+
+        increment_user_stats([r.user_id for r in receipts], notif_change=notif_change)
 
 
 ########################## SCHEDULING ##########################
@@ -856,6 +1424,63 @@ class Role(models.Model):
         return False
 
 
+class ShiftQuerySet(models.QuerySet):
+    def overlapping(
+        self,
+        start_time,
+        end_time,
+        gap_period_mins: int = START_NEW_SHIFT_TIME_DELTA_THRESHOLD_MINS,
+    ):
+        """
+        Filter the shifts that overlap the given times of day (or are less than `gap_period_mins` apart), same as
+        `SHIFT_OVERLAP_CONSTRAINT`. Filter the employee, store and date first.
+        """
+        period = _shift_period(
+            Value(start_time, output_field=models.TimeField()),
+            Value(end_time, output_field=models.TimeField()),
+            gap_period_mins,
+        )
+        return self.alias(
+            overlap_period=_shift_period(
+                F("start_time"), F("end_time"), gap_period_mins
+            )
+        ).filter(overlap_period__overlap=period)
+
+    def bulk_create_skip_conflicts(self, shifts: List["Shift"]) -> List["Shift"]:
+        """
+        Insert the shifts (in order) letting the database reject the ones conflicting with another shift
+        (`SHIFT_OVERLAP_CONSTRAINT`). They are inserted in a single query unless there is a conflict.
+
+        Returns:
+            List[Shift]: The shifts that were NOT created.
+        """
+        try:
+            with transaction.atomic():
+                self.bulk_create(shifts)
+            return []
+        except IntegrityError as e:
+            if SHIFT_OVERLAP_CONSTRAINT not in str(e):
+                raise e
+
+        # Find the conflicting shifts one by one
+        conflicting = []
+        for shift in shifts:
+            try:
+                with transaction.atomic():
+                    self.bulk_create([shift])
+            except IntegrityError as e:
+                if SHIFT_OVERLAP_CONSTRAINT not in str(e):
+                    raise e
+                conflicting.append(shift)
+        return conflicting
+
+    def delete(self):
+        # Handle the linked exceptions in bulk before the shifts go (they are SET_NULL otherwise)
+        with transaction.atomic():
+            ShiftException.detach_shifts(self.values("pk"))
+            return super().delete()
+
+
 class Shift(models.Model):
     employee = models.ForeignKey(User, on_delete=models.CASCADE, related_name="shifts")
     store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name="shifts")
@@ -874,10 +1499,30 @@ class Shift(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ShiftQuerySet.as_manager()
+
     class Meta:
         ordering = ["store", "date", "start_time"]
-        # Only one shift per day per user per store:
-        unique_together = [("employee", "store", "date", "start_time")]
+        constraints = [
+            # Shifts of an employee for a store on a day can't overlap or be too close (see `overlapping()`).
+            # INCLUDES SOFT DELETED SHIFTS (also makes them unique by start time).
+            ExclusionConstraint(
+                name=SHIFT_OVERLAP_CONSTRAINT,
+                expressions=[
+                    (_single_value_range("employee"), RangeOperators.OVERLAPS),
+                    (_single_value_range("store"), RangeOperators.OVERLAPS),
+                    (
+                        _single_value_range("date", "daterange", DateRangeField()),
+                        RangeOperators.OVERLAPS,
+                    ),
+                    (
+                        _shift_period(F("start_time"), F("end_time")),
+                        RangeOperators.OVERLAPS,
+                    ),
+                ],
+                violation_error_message="The shift conflicts with another shift of the employee.",
+            )
+        ]
         indexes = [
             models.Index(fields=["store", "date", "start_time"]),  # For store listing
         ]
@@ -886,6 +1531,11 @@ class Shift(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
 
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ShiftException.detach_shifts([self.pk])
+            return super().delete(*args, **kwargs)
+
     def __str__(self):
         return f"[{self.pk}] [{self.store.code}] {self.date} - {self.employee.first_name} {self.employee.last_name}: {self.role if self.role else 'NO ROLE'}"
 
@@ -1120,6 +1770,41 @@ class ShiftException(models.Model):
             )
         super().save(*args, **kwargs)
 
+    @classmethod
+    def detach_shifts(cls, shift_ids) -> int:
+        """
+        Handle the exceptions of shifts about to be deleted, with two set-based statements: exceptions left
+        without a shift or activity are deleted, the others are unlinked from the shift.
+
+        Args:
+            shift_ids (Iterable[int] | QuerySet): The IDs of the shifts (or a `values("pk")` subquery).
+
+        Returns:
+            int: The number of deleted exceptions.
+        """
+        return cls._detach("shift", "activity", shift_ids)
+
+    @classmethod
+    def detach_activities(cls, activity_ids) -> int:
+        """
+        Handle the exceptions of activities about to be deleted, with two set-based statements: exceptions left
+        without a shift or activity are deleted, the others are unlinked from the activity.
+
+        Args:
+            activity_ids (Iterable[int] | QuerySet): The IDs of the activities (or a `values("pk")` subquery).
+
+        Returns:
+            int: The number of deleted exceptions.
+        """
+        return cls._detach("activity", "shift", activity_ids)
+
+    @classmethod
+    def _detach(cls, field: str, other_field: str, ids) -> int:
+        exceptions = cls.objects.filter(**{f"{field}_id__in": ids})
+        deleted, _ = exceptions.filter(**{f"{other_field}__isnull": True}).delete()
+        exceptions.update(**{field: None, "updated_at": now()})
+        return deleted
+
     def get_date(self):
         """
         Function to get the date that the exception is related to (handles if either shift or activity is NULL).
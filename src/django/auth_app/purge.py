@@ -0,0 +1,93 @@
+import time
+import logging
+
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+from django.conf import settings
+from django.db import transaction
+from django.db.models import QuerySet
+
+logger = logging.getLogger("celery_beat")
+
+
+class PurgeResult(NamedTuple):
+    """
+    The progress metrics of a purge.
+    """
+
+    deleted: int  # Rows of the purged model
+    cascaded: Dict[str, int]  # Rows deleted per model label (including cascades)
+    batches: int
+    elapsed_sec: float
+    finished: bool  # False if it stopped early (time budget) -> the rest is left for the next run
+
+    def __str__(self):
+        return f"{self.deleted} rows in {self.batches} batches ({self.elapsed_sec:.1f}s{'' if self.finished else ', stopped early'}) {dict(self.cascaded)}"
+
+
+def purge_in_batches(
+    queryset: QuerySet,
+    batch_size: int = settings.PURGE_BATCH_SIZE,
+    sleep_sec: float = settings.PURGE_BATCH_SLEEP_SEC,
+    max_duration_sec: Optional[float] = settings.PURGE_MAX_DURATION_SEC,
+) -> PurgeResult:
+    """
+    Delete the rows matched by a queryset in batches of primary keys (walking the keys in order), each batch
+    deleted (with its cascades) in its own transaction. This bounds the rows the deletion collector loads into
+    memory and how long the locks are held, unlike a single `queryset.delete()`.
+
+    Args:
+        queryset (QuerySet): The rows to delete.
+        batch_size (int, optional): The number of rows deleted per batch. Defaults to settings.PURGE_BATCH_SIZE.
+        sleep_sec (float, optional): Pause between batches. Defaults to settings.PURGE_BATCH_SLEEP_SEC.
+        max_duration_sec (float, optional): Stop starting batches after this long (None = no limit).
+            Defaults to settings.PURGE_MAX_DURATION_SEC.
+
+    Returns:
+        PurgeResult: The progress metrics.
+    """
+    started = time.monotonic()
+    cascaded = Counter()
+    batches = 0
+    last_pk = None
+    finished = False
+
+    while True:
+        if (
+            max_duration_sec is not None
+            and time.monotonic() - started >= max_duration_sec
+        ):
+            break
+
+        batch = queryset.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            finished = True
+            break
+
+        with transaction.atomic():
+            # Filter by the queryset again -> rows changed since they were selected are kept
+            _, deleted = queryset.filter(pk__in=pks).delete()
+
+        cascaded.update(deleted)
+        batches += 1
+        last_pk = pks[-1]
+        logger.debug(
+            f"[PURGE] {queryset.model._meta.label} batch {batches}: deleted {dict(deleted)}"
+        )
+
+        if len(pks) < batch_size:
+            finished = True
+            break
+        if sleep_sec:
+            time.sleep(sleep_sec)
+
+    return PurgeResult(
+        deleted=cascaded.get(queryset.model._meta.label, 0),
+        cascaded=dict(cascaded),
+        batches=batches,
+        elapsed_sec=time.monotonic() - started,
+        finished=finished,
+    )
@@ -0,0 +1,126 @@
+import time
+import logging
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, UpdateError
+from django.contrib.sessions.backends.cache import SessionStore as CacheSessionStore
+
+
+logger = logging.getLogger("auth_app")
+
+# Internal key stored alongside the session data (stripped when loading) recording when it was last written
+SAVED_AT_KEY = "_saved_at"
+
+
+class SessionStore(CacheSessionStore):
+    """
+    Redis (django_redis) session engine stored in the `SESSION_CACHE_ALIAS` cache, which coalesces writes.
+    Sessions are only written when their data changes or when the last write is older than
+    `SESSION_SAVE_THRESHOLD_SEC` (i.e. to push the expiry back). This means the server side expiry can
+    be up to `SESSION_SAVE_THRESHOLD_SEC` earlier than the cookie's expiry.
+
+    Each user's session keys are also indexed in a Redis set to allow logging a user out of every session.
+    Use by setting `SESSION_ENGINE = "auth_app.redis_sessions"`.
+    """
+
+    cache_key_prefix = "auth_app.redis_sessions"
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._saved_at = None
+
+    @classmethod
+    def _user_index_key(cls, user_id) -> str:
+        return f"{cls.cache_key_prefix}.user:{int(user_id)}"
+
+    def _get_redis_client(self):
+        return self._cache.client.get_client(write=True)
+
+    def load(self):
+        try:
+            session_data = self._cache.get(self.cache_key)
+        except Exception:
+            # Some backends (e.g. memcache) raise an exception on invalid cache keys
+            session_data = None
+
+        if session_data is not None:
+            self._saved_at = session_data.pop(SAVED_AT_KEY, None)
+            return session_data
+
+        self._session_key = None
+        return {}
+
+    def _needs_write(self) -> bool:
+        if self.modified:
+            return True
+
+        # Load the session (if not yet accessed) to know when it was last written
+        self._get_session()
+        if self._session_key is None:
+            return False  # Session expired or was flushed -> nothing to persist
+        elif self._saved_at is None:
+            return True
+
+        return (time.time() - self._saved_at) >= settings.SESSION_SAVE_THRESHOLD_SEC
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+
+        # Coalesce writes -> nothing changed and the expiry was recently pushed back
+        if not must_create and not self._needs_write():
+            return
+
+        data = {
+            **self._get_session(no_load=must_create),
+            SAVED_AT_KEY: int(time.time()),
+        }
+
+        # Only create new keys (`nx`) or update existing keys (`xx`) -> a flushed session is never recreated
+        written = self._cache.set(
+            self.cache_key,
+            data,
+            self.get_expiry_age(),
+            nx=must_create,
+            xx=not must_create,
+        )
+        if not written:
+            raise CreateError if must_create else UpdateError
+
+        self._saved_at = data[SAVED_AT_KEY]
+        self._index_user_session(data.get("user_id"))
+
+    def _index_user_session(self, user_id):
+        if user_id is None:
+            return
+
+        try:
+            index_key = self._cache.make_key(self._user_index_key(user_id))
+            pipe = self._get_redis_client().pipeline()
+            pipe.sadd(index_key, self.session_key)
+            pipe.expire(index_key, settings.SESSION_COOKIE_AGE)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(
+                f"Failed to index session for user ID {user_id}, producing error: {str(e)}"
+            )
+
+    @classmethod
+    def delete_user_sessions(cls, user_id: int) -> int:
+        """
+        Delete every session belonging to the user. Returns the number of sessions deleted.
+        """
+        store = cls()
+        index_key = store._cache.make_key(cls._user_index_key(user_id))
+        client = store._get_redis_client()
+
+        session_keys = [key.decode() for key in client.smembers(index_key)]
+        if not session_keys:
+            return 0
+
+        pipe = client.pipeline()
+        for session_key in session_keys:
+            pipe.delete(store._cache.make_key(cls.cache_key_prefix + session_key))
+        pipe.delete(index_key)
+        results = pipe.execute()
+
+        return sum(results[:-1])
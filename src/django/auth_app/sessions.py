@@ -0,0 +1,35 @@
+import logging
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+
+
+logger = logging.getLogger("auth_app")
+
+
+class SessionStore(DBSessionStore):
+    """
+    Database session engine which indexes each session by the logged in user's ID (`user_id` session key).
+    Use by setting `SESSION_ENGINE = "auth_app.sessions"`.
+    """
+
+    @classmethod
+    def get_model_class(cls):
+        # Avoids a circular import with the models module
+        from auth_app.models import UserSession
+
+        return UserSession
+
+    def create_model_instance(self, data):
+        obj = super().create_model_instance(data)
+        try:
+            obj.user_id = int(data.get("user_id"))
+        except (ValueError, TypeError):
+            obj.user_id = None
+        return obj
+
+    @classmethod
+    def delete_user_sessions(cls, user_id: int) -> int:
+        """
+        Delete every session belonging to the user. Returns the number of sessions deleted.
+        """
+        deleted, _ = cls.get_model_class().objects.filter(user_id=int(user_id)).delete()
+        return deleted
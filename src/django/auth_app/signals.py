@@ -1,48 +1,72 @@
-import logging
+from django.db import transaction
 from django.dispatch import receiver
-from django.db.models.signals import pre_delete
-from auth_app.models import ShiftException, Shift, Activity
+from django.db.models.signals import pre_delete, post_save, post_delete
+from api.holiday_calendar import invalidate_holiday_overrides
+from auth_app.user_stats import invalidate_user_stats
+from auth_app.models import (
+    User,
+    Store,
+    StoreUserAccess,
+    ShiftException,
+    Shift,
+    Activity,
+    PublicHolidayOverride,
+)
 
 
-logger = logging.getLogger("auth_app")
+# UPON DELETING A USER OR STORE, HANDLE THE EXCEPTIONS OF ITS CASCADED SHIFTS (ROSTER) AND ACTIVITIES (ACTUAL SHIFTS) IN BULK #
+# (Deleting shifts/activities directly is handled by their `delete()`, exceptions losing both links are deleted)
+@receiver(pre_delete, sender=User)
+def cleanup_user_shift_exceptions(sender, instance, **kwargs):
+    ShiftException.detach_shifts(
+        Shift.objects.filter(employee_id=instance.id).values("pk")
+    )
+    ShiftException.detach_activities(
+        Activity.objects.filter(employee_id=instance.id).values("pk")
+    )
 
 
-# UPON DELETING BOTH RELATED SHIFT (ROSTER) AND ACTIVITY (ACTUAL SHIFT) IT WILL DELETE THE RELATED EXCEPTION #
-@receiver(pre_delete, sender=Shift)
-def cleanup_shift_exceptions(sender, instance, **kwargs):
-    try:
-        exc = ShiftException.objects.get(shift=instance)
-        if not exc.activity:
-            logger.debug(
-                f"[DELETE: SHIFTEXCEPTION (ID: {exc.id})] [SIGNAL-SHIFT-DEL] Shift ID: {instance.id} -- Reason: {exc.reason.upper()} -- Approved: {'Yes' if exc.is_approved else 'No'}"
-            )
-            exc.delete()
-        else:
-            exc.shift = None
-            exc.save()
-    except ShiftException.DoesNotExist:
-        pass
-    except Exception as e:
-        logger.warning(
-            f"Failed to cleanup the related ShiftException after deleting a shift, producing error: {str(e)}"
-        )
+@receiver(pre_delete, sender=Store)
+def cleanup_store_shift_exceptions(sender, instance, **kwargs):
+    ShiftException.detach_shifts(
+        Shift.objects.filter(store_id=instance.id).values("pk")
+    )
+    ShiftException.detach_activities(
+        Activity.objects.filter(store_id=instance.id).values("pk")
+    )
+
+
+# UPON CHANGING A PUBLIC HOLIDAY OVERRIDE, CLEAR THE CACHED OVERRIDES FOR ITS YEAR #
+@receiver(post_save, sender=PublicHolidayOverride)
+@receiver(post_delete, sender=PublicHolidayOverride)
+def invalidate_public_holiday_overrides(sender, instance, **kwargs):
+    invalidate_holiday_overrides(instance.date.year)
+
+
+# UPON CHANGING A USER'S STORE ACCESS (OR THE STORE/USER ITSELF), CLEAR THE CACHED STORE ACCESS & PAGE CONTEXT OF THE AFFECTED USERS #
+@receiver(post_save, sender=StoreUserAccess)
+@receiver(post_delete, sender=StoreUserAccess)
+def invalidate_user_store_access(sender, instance, **kwargs):
+    User.invalidate_cached_store_access([instance.user_id])
+    # The shift requests the user sees depend on their stores/manager status
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_user_stats([user_id]))
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_page_context(sender, instance, created, **kwargs):
+    # The user's cached page context (name etc) shares the store access version
+    if not created:
+        User.invalidate_cached_store_access([instance.id])
 
 
-@receiver(pre_delete, sender=Activity)
-def cleanup_activity_exceptions(sender, instance, **kwargs):
-    try:
-        exc = ShiftException.objects.get(activity=instance)
-        if not exc.shift:
-            logger.debug(
-                f"[DELETE: SHIFTEXCEPTION (ID: {exc.id})] [SIGNAL-ACTIVITY-DEL] Activity ID: {instance.id} -- Reason: {exc.reason.upper()} -- Approved: {'Yes' if exc.is_approved else 'No'}"
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def invalidate_store_users_store_access(sender, instance, **kwargs):
+    User.invalidate_cached_store_access(
+        list(
+            StoreUserAccess.objects.filter(store_id=instance.id).values_list(
+                "user_id", flat=True
             )
-            exc.delete()
-        else:
-            exc.activity = None
-            exc.save()
-    except ShiftException.DoesNotExist:
-        pass
-    except Exception as e:
-        logger.warning(
-            f"Failed to cleanup the related ShiftException after deleting an activity, producing error: {str(e)}"
         )
+    )
@@ -2,6 +2,9 @@ $(document).ready(function () {
   // Handle button(s) to mark a notification as read (dismiss it)
   handleNotificationMarkAsRead();
 
+  // Handle loading more read/sent notifications (they are loaded lazily in pages)
+  handleLoadMoreNotifications();
+
   // Function to handle switching between the multiple pages on the notification page (i.e. seeing notifications to sending notifications)
   handleNotificationPageSwitching();
 
@@ -57,6 +60,13 @@ function handleNotificationPageSwitching() {
     panels[tabName].removeClass("d-none");
     buttons[tabName].addClass("active");
 
+    // Load the first page of the tab's notifications if not loaded yet
+    const list = panels[tabName].find('.lazy-notification-list[data-loaded="false"]');
+    if (list.length) {
+      list.attr("data-loaded", "true");
+      loadNotificationListPage(list, 1);
+    }
+
     try {
       localStorage.setItem("notificationTab", tabName);
     } catch (e) {}
@@ -154,4 +164,39 @@ function markNotificationRead(id) {
       showNotification(errorMessage, "danger");
     }
   });
-}
\ No newline at end of file
+}
+
+function handleLoadMoreNotifications() {
+  $(document).on('click', '.load-more-notifications', function () {
+    const list = $(this).closest('.lazy-notification-list');
+    const page = ensureSafeInt($(this).data('page'), 1, null);
+    $(this).remove();
+    loadNotificationListPage(list, page);
+  });
+}
+
+
+function loadNotificationListPage(list, page) {
+  showSpinner();
+
+  $.ajax({
+    url: `${window.djangoURLs.notificationList}${list.data('type')}?page=${page}`,
+    type: "GET",
+    xhrFields: {
+      withCredentials: true
+    },
+
+    success: function(html) {
+      hideSpinner();
+      list.append(html);
+    },
+
+    error: function(jqXHR, textStatus, errorThrown) {
+      hideSpinner();
+      if (page === 1) {
+        list.attr("data-loaded", "false"); // Retry when the tab is next opened
+      }
+      showNotification("Failed to load notifications. Please try again.", "danger");
+    }
+  });
+}
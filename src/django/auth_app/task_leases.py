@@ -0,0 +1,212 @@
+import uuid
+import logging
+
+from functools import wraps
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger("celery_beat")
+
+# Leases and the run ledger are kept in the `task_leases` cache (Redis in production -> shared by every
+# beat/worker node). A lease is a key only its holder may delete (SET NX EX), expiring by itself if the
+# holder is killed. The ledger records the (task, scope, period) runs that COMPLETED to skip repeats.
+LEASE_PREFIX = "task_lease"
+LEDGER_PREFIX = "task_ledger"
+
+
+def _get_redis_client(cache):
+    """
+    Get the raw Redis client of a django_redis cache (None for other backends, i.e. local memory).
+    """
+    client = getattr(cache, "client", None)
+    if client is not None and hasattr(client, "get_client"):
+        return client.get_client(write=True)
+    return None
+
+
+class TaskLease:
+    """
+    An exclusive lease on a run of a task for a scope (i.e. a store) and period (i.e. a date), with an
+    optional run ledger so a run that already completed (i.e. a retry, or a second beat node) is skipped.
+
+    Usage:
+        with TaskLease("task_name", scope=store.id, period=date, use_ledger=True) as lease:
+            if not lease.acquired:
+                return  # Someone else is running it, or it already completed
+            ...
+            lease.complete()
+
+    If the cache is unreachable the lease is granted (logging a warning) -> tasks keep running without it.
+    Unless `fail_open` is False (i.e. runs with side effects that must not be repeated), in which case the run is
+    refused and the error kept in `error` so it can be reported.
+    """
+
+    def __init__(
+        self,
+        task_name: str,
+        scope="all",
+        period="",
+        ttl: int = settings.TASK_LEASE_TTL_SEC,
+        use_ledger: bool = False,
+        ledger_ttl: int = settings.TASK_LEDGER_TTL_SEC,
+        fail_open: bool = True,
+    ):
+        self.task_name, self.scope, self.period = task_name, scope, period
+        self.name = f"{task_name}:{scope}:{period}"
+        self.ttl = int(ttl)
+        self.use_ledger = use_ledger
+        self.ledger_ttl = int(ledger_ttl)
+        self.fail_open = fail_open
+        self.error = None
+        self.token = uuid.uuid4().hex
+        self.acquired = False
+        self.already_complete = False
+        self._cache = caches["task_leases"]
+        self._lease_key = f"{LEASE_PREFIX}:{self.name}"
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.release()
+        return False
+
+    def acquire(self) -> bool:
+        try:
+            redis = _get_redis_client(self._cache)
+            if redis is not None:
+                self.acquired = bool(
+                    redis.set(
+                        self._cache.make_key(self._lease_key),
+                        self.token,
+                        nx=True,
+                        ex=self.ttl,
+                    )
+                )
+            else:
+                self.acquired = self._cache.add(
+                    self._lease_key, self.token, timeout=self.ttl
+                )
+
+            # Checked while holding the lease -> a completed run always writes the ledger before releasing it
+            if (
+                self.acquired
+                and self.use_ledger
+                and is_run_complete(self.task_name, self.scope, self.period)
+            ):
+                self.already_complete = True
+                self.release()
+
+        except Exception as e:
+            self.token = None
+            if not self.fail_open:
+                logger.error(
+                    f"Failed to acquire the task lease `{self.name}`, skipping the run. Error: {str(e)}"
+                )
+                self.acquired = False
+                self.error = f"Task lease unavailable: {str(e)}"
+                return False
+
+            logger.warning(
+                f"Failed to acquire the task lease `{self.name}`, running without it. Error: {str(e)}"
+            )
+            self.acquired = True
+
+        if not self.acquired:
+            logger.info(
+                f"Skipping `{self.name}` as it {'already completed' if self.already_complete else 'is leased by another run'}."
+            )
+        return self.acquired
+
+    def release(self) -> None:
+        """
+        Release the lease, ONLY if it is still held by this run (it may have expired and been taken over).
+        """
+        if not self.acquired or self.token is None:
+            self.acquired = False
+            return
+
+        self.acquired = False
+        try:
+            redis = _get_redis_client(self._cache)
+            if redis is None:
+                if self._cache.get(self._lease_key) == self.token:
+                    self._cache.delete(self._lease_key)
+                return
+
+            # Compare and delete in a transaction (aborted if the key changes in between)
+            key = self._cache.make_key(self._lease_key)
+            with redis.pipeline() as pipe:
+                pipe.watch(key)
+                if pipe.get(key) == self.token.encode():
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+
+        except Exception as e:
+            logger.warning(
+                f"Failed to release the task lease `{self.name}` (it will expire). Error: {str(e)}"
+            )
+
+    def complete(self) -> None:
+        """
+        Record the run as completed in the ledger (while still holding the lease).
+        """
+        if self.use_ledger:
+            mark_run_complete(
+                self.task_name, self.scope, self.period, ttl=self.ledger_ttl
+            )
+
+
+def is_run_complete(task_name: str, scope="all", period="") -> bool:
+    """
+    Check whether a run of a task for the scope and period is recorded as completed in the ledger.
+    """
+    cache = caches["task_leases"]
+    key = f"{LEDGER_PREFIX}:{task_name}:{scope}:{period}"
+    redis = _get_redis_client(cache)
+    if redis is not None:
+        return bool(redis.exists(cache.make_key(key)))
+    return cache.get(key) is not None
+
+
+def mark_run_complete(
+    task_name: str, scope="all", period="", ttl: int = settings.TASK_LEDGER_TTL_SEC
+) -> None:
+    """
+    Record a run of a task for the scope and period as completed in the ledger.
+    """
+    cache = caches["task_leases"]
+    key = f"{LEDGER_PREFIX}:{task_name}:{scope}:{period}"
+    try:
+        redis = _get_redis_client(cache)
+        if redis is not None:
+            redis.set(cache.make_key(key), 1, ex=int(ttl))
+        else:
+            cache.set(key, 1, timeout=int(ttl))
+    except Exception as e:
+        logger.warning(
+            f"Failed to record the completed run `{key}` in the task ledger. Error: {str(e)}"
+        )
+
+
+def exclusive_task(ttl: int = settings.CELERY_TASK_TIME_LIMIT + 60):
+    """
+    Decorator (placed BELOW `@shared_task`) skipping a run of the task while another run of it (on any node)
+    is in progress. The lease outlives the task's hard time limit, so a killed run can't block it for long.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with TaskLease(func.__name__, ttl=ttl) as lease:
+                if not lease.acquired:
+                    return None
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -2,125 +2,103 @@ import logging
 import calendar
 import traceback
 import api.utils as api_util
+import api.holiday_calendar as holiday_calendar
 import auth_app.utils as util
 
 from datetime import datetime, timedelta
-from celery import shared_task
-from django.db import transaction
+from collections import defaultdict
+from celery import shared_task, chord
+from celery.exceptions import SoftTimeLimitExceeded
+from django.db import transaction, connection, OperationalError, InterfaceError
 from django.db.models import Q
 from django.conf import settings
 from django.utils.timezone import now, localtime
-from api.controllers import handle_clock_out, link_activity_to_shift
+from api.controllers import (
+    handle_store_forced_clock_out,
+    reconcile_store_shift_exceptions,
+)
 from auth_app.models import (
     User,
     Store,
     Notification,
+    NotificationReceipt,
     StoreUserAccess,
     Activity,
+    ActivityDailySummary,
     Shift,
     ShiftRequest,
     RepeatingShift,
     notification_default_expires_on,
 )
+from auth_app.user_stats import (
+    update_shift_requests_user_stats,
+    invalidate_user_stats,
+)
+from auth_app.purge import purge_in_batches
+from auth_app.task_leases import (
+    TaskLease,
+    exclusive_task,
+    is_run_complete,
+    mark_run_complete,
+)
 
 
 # Get the loggers
 logger_celery = logging.getLogger("celery")  # For the tasks themselves
 logger_beat = logging.getLogger("celery_beat")  # For the schedules (starting/stopping)
 
+# Time limits of each kind of task (each kind is routed to its own queue, see `CELERY_TASK_ROUTES`)
+SCHEDULED_TASK_OPTIONS = dict(
+    time_limit=settings.CELERY_TASK_TIME_LIMIT,
+    soft_time_limit=settings.CELERY_TASK_SOFT_TIME_LIMIT,
+)
+NOTIFICATION_TASK_OPTIONS = dict(
+    time_limit=settings.NOTIFICATION_TASK_TIME_LIMIT,
+    soft_time_limit=settings.NOTIFICATION_TASK_SOFT_TIME_LIMIT,
+)
+REPORT_TASK_OPTIONS = dict(
+    time_limit=settings.REPORT_TASK_TIME_LIMIT,
+    soft_time_limit=settings.REPORT_TASK_SOFT_TIME_LIMIT,
+)
+
+# Options of the per store subtasks of the scheduled jobs (see `dispatch_store_job`)
+STORE_TASK_OPTIONS = dict(
+    time_limit=settings.STORE_TASK_TIME_LIMIT,
+    soft_time_limit=settings.STORE_TASK_SOFT_TIME_LIMIT,
+    max_retries=settings.STORE_TASK_MAX_RETRIES,
+    default_retry_delay=settings.CELERY_TASK_DEFAULT_RETRY_DELAY,
+)
+
 
 ################################### SCHEDULED AUTOMATED TASKS ##############################################
 
 
-@shared_task
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
 def check_clocked_in_users():
     logger_beat.info(f"[AUTOMATED] Running task `check_clocked_in_users`.")
 
     try:
-        total_count = 0
-        usr_err_msg = ""
-
-        for store in Store.objects.filter(is_active=True).all():
-            clocked_in_employees = store.get_clocked_in_employees(include_inactive=True)
-
-            if not clocked_in_employees:
-                continue  # Skip stores with no clocked-in employees
-
-            # Count for logging
-            total_count += len(clocked_in_employees)
-
-            # Notify each employee individually
-            for emp in clocked_in_employees:
-                # Forcefully clock out user
-                try:
-                    handle_clock_out(
-                        employee_id=emp.id,
-                        deliveries=0,
-                        store_id=store.id,
-                        allow_inactive_edits=True,
-                    )
-                except Exception as e:
-                    usr_err_msg += f"- User ID {emp.id} ({emp.first_name} {emp.last_name}) from store [{store.code}] with error: {str(e)[:75]}"
-                    logger_beat.critical(
-                        f"Tried to forcefully clock employee ID {emp.id} ({emp.first_name} {emp.last_name}) from store [{store.code}] and it resulted in error: {str(e)}\n"
-                    )
-                    pass
-
-                emp_title = util.sanitise_markdown_title_text(
-                    f"You forgot to clock out of store `{store.code}`"
-                )
-                emp_msg = util.sanitise_markdown_message_text(
-                    f"Our system showed you were still clocked in under the store `{store.code}`. We have forcefully clocked you out to ensure your shift doesn't run into the next day.\nPlease note that we also had to set your delivery count to *zero*.\n\nYour respective manager(s) have been notified.\nYour manager should fix your clocking times."
-                )
-                Notification.send_to_users(
-                    users=[emp],
-                    title=emp_title,
-                    message=emp_msg,
-                    notification_type=Notification.Type.AUTOMATIC_ALERT,
-                    recipient_group=Notification.RecipientType.INDIVIDUAL,
-                    expires_on=notification_default_expires_on(7),
-                )
-                logger_beat.debug(
-                    f"[LATE-CLOCK-OUT] Sent notification to employee ID {emp.id} ({emp.first_name} {emp.last_name}) for Store {store.code}."
-                )
-
-            # Notify store managers with summary
-            employee_names = "\n".join(
-                f"<li>{emp.first_name} {emp.last_name} ({emp.email}){' [INACTIVE ACCOUNT]' if not emp.is_active else ''}</li>"
-                for emp in clocked_in_employees
-            )
-            str_title = util.sanitise_markdown_title_text(
-                f"[`{store.code}`] Clock-out Alert: Employees Still Clocked In"
-            )
-            str_msg = util.sanitise_markdown_message_text(
-                f"The following employees were still clocked in for the store `{store.code}`:\n<ul>{employee_names}</ul>\n\nThey have been forcefully clocked out to ensure their shifts doesn't run into the next day. Their delivery count was also set to *zero*.\nPlease view the related exception(s).\n\nThe respective employees have also been notified of their mistake."
-            )
-            Notification.send_to_users(
-                users=store.get_store_managers(),
-                title=str_title,
-                message=str_msg,
-                store=store,
-                notification_type=Notification.Type.AUTOMATIC_ALERT,
-                recipient_group=Notification.RecipientType.STORE_MANAGERS,
-                expires_on=notification_default_expires_on(7),
-            )
-            logger_beat.debug(
-                f"[LATE-CLOCK-OUT] Sent manager notification for store {store.code}."
-            )
-
-        if usr_err_msg:
-            raise Exception(
-                "Ran into error(s) when force logging users out, notification sent to admins."
-            )
+        # Only visit the stores with someone still clocked in
+        store_ids = list(
+            Store.objects.filter(is_active=True, activity__logout_time__isnull=True)
+            .distinct()
+            .values_list("id", flat=True)
+        )
 
-        logger_beat.info(
-            f"Finished running task `check_clocked_in_users` and found {total_count} users still clocked in. Sent message(s) to respective managers."
+        dispatch_store_job(
+            task_name="check_clocked_in_users",
+            store_task=force_clock_out_store_users,
+            store_ids=store_ids,
+            args=(localtime(now()).date().isoformat(),),
+            error_title="**ERROR** running task `check_clocked_in_users`",
+            error_message="Failed to forcefully log the employees of the following stores out:",
         )
 
     except Exception as e:
         notify_admins_error_generated(
             "**ERROR** running task `check_clocked_in_users`",
-            "Failed to forcefully log the following employees out:\n\n" + usr_err_msg,
+            f"Failed to forcefully log employees out, generating the error:\n\n{str(e)}",
         )
         logger_beat.critical(
             f"[FAILURE] Failed to complete task `check_clocked_in_users` due to the error: {str(e)}\n{traceback.format_exc()}"
@@ -128,7 +106,73 @@ def check_clocked_in_users():
         return
 
 
-@shared_task
+@shared_task(bind=True, **STORE_TASK_OPTIONS)
+def force_clock_out_store_users(self, store_id: int, day: str) -> dict:
+    # Only once per store per day -> a retry (or second node) never notifies everyone twice
+    return run_store_task(
+        self, store_id, _force_clock_out_store_users, period=day, use_ledger=True
+    )
+
+
+def _force_clock_out_store_users(store: Store) -> dict:
+    # Clock out & notify in one transaction -> a database error (retried) never leaves employees clocked out
+    # without their notifications, as the retry would find no one to clock out
+    with transaction.atomic():
+        # Forcefully clock out everyone at once
+        activities = handle_store_forced_clock_out(store=store, deliveries=0)
+        if not activities:
+            return {"clocked_out": 0}  # Skip stores with no clocked-in employees
+
+        clocked_in_employees = [activity.employee for activity in activities]
+
+        # Notify the employees with a single notification
+        emp_title = util.sanitise_markdown_title_text(
+            f"You forgot to clock out of store `{store.code}`"
+        )
+        emp_msg = util.sanitise_markdown_message_text(
+            f"Our system showed you were still clocked in under the store `{store.code}`. We have forcefully clocked you out to ensure your shift doesn't run into the next day.\nPlease note that we also had to set your delivery count to *zero*.\n\nYour respective manager(s) have been notified.\nYour manager should fix your clocking times."
+        )
+        Notification.send_to_users(
+            users=clocked_in_employees,
+            title=emp_title,
+            message=emp_msg,
+            notification_type=Notification.Type.AUTOMATIC_ALERT,
+            recipient_group=Notification.RecipientType.INDIVIDUAL,
+            expires_on=notification_default_expires_on(7),
+        )
+        logger_beat.debug(
+            f"[LATE-CLOCK-OUT] Sent notification to {len(clocked_in_employees)} employees for Store {store.code}."
+        )
+
+        # Notify store managers with summary
+        employee_names = "\n".join(
+            f"<li>{emp.first_name} {emp.last_name} ({emp.email}){' [INACTIVE ACCOUNT]' if not emp.is_active else ''}</li>"
+            for emp in clocked_in_employees
+        )
+        str_title = util.sanitise_markdown_title_text(
+            f"[`{store.code}`] Clock-out Alert: Employees Still Clocked In"
+        )
+        str_msg = util.sanitise_markdown_message_text(
+            f"The following employees were still clocked in for the store `{store.code}`:\n<ul>{employee_names}</ul>\n\nThey have been forcefully clocked out to ensure their shifts doesn't run into the next day. Their delivery count was also set to *zero*.\nPlease view the related exception(s).\n\nThe respective employees have also been notified of their mistake."
+        )
+        Notification.send_to_users(
+            users=store.get_store_managers(),
+            title=str_title,
+            message=str_msg,
+            store=store,
+            notification_type=Notification.Type.AUTOMATIC_ALERT,
+            recipient_group=Notification.RecipientType.STORE_MANAGERS,
+            expires_on=notification_default_expires_on(7),
+        )
+        logger_beat.debug(
+            f"[LATE-CLOCK-OUT] Sent manager notification for store {store.code}."
+        )
+
+        return {"clocked_out": len(clocked_in_employees)}
+
+
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
 def delete_old_notifications():
     logger_beat.info(f"[AUTOMATED] Running task `delete_old_notifications`.")
 
@@ -142,13 +186,21 @@ def delete_old_notifications():
             Q(expires_on__lte=today) | Q(created_at__date__lte=max_age_date)
         )
 
-        total_count = expired_notifications.count()
+        # Their unread receipts may still be counted by the recipients' cached stats (i.e. expiring today)
+        recipient_ids = set(
+            NotificationReceipt.objects.filter(
+                notification__in=expired_notifications, read_at__isnull=True
+            )
+            .values_list("user_id", flat=True)
+            .distinct()
+        )
 
-        # Delete notifications (receipts will be deleted via CASCADE)
-        expired_notifications.delete()
+        # Delete notifications in batches (receipts will be deleted via CASCADE)
+        result = purge_in_batches(expired_notifications)
+        invalidate_user_stats(recipient_ids)
 
         logger_beat.info(
-            f"Finished running task `delete_old_notifications` and deleted {total_count} expired notifications."
+            f"Finished running task `delete_old_notifications` and deleted {result.deleted} expired notifications: {result}."
         )
 
     except Exception as e:
@@ -162,7 +214,8 @@ def delete_old_notifications():
         return
 
 
-@shared_task
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
 def deactivate_unassigned_users():
     logger_beat.info(f"[AUTOMATED] Running task `deactivate_unassigned_users`.")
 
@@ -199,7 +252,8 @@ def deactivate_unassigned_users():
         return
 
 
-@shared_task
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
 def delete_old_unused_shifts():
     logger_beat.info("[AUTOMATED] Running task `delete_old_unused_shifts`.")
 
@@ -211,13 +265,11 @@ def delete_old_unused_shifts():
 
         old_shifts = Shift.objects.filter(is_deleted=True, date__lt=threshold_date)
 
-        total_count = old_shifts.count()
-
-        # Delete the old soft-deleted shifts
-        old_shifts.delete()
+        # Delete the old soft-deleted shifts in batches (each batch's exceptions are handled in bulk)
+        result = purge_in_batches(old_shifts)
 
         logger_beat.info(
-            f"Finished task `delete_old_unused_shifts`: deleted {total_count} old soft-deleted shifts."
+            f"Finished task `delete_old_unused_shifts`: deleted {result.deleted} old soft-deleted shifts: {result}."
         )
 
     except Exception as e:
@@ -230,55 +282,39 @@ def delete_old_unused_shifts():
         )
 
 
-@shared_task
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
 def check_shifts_for_exceptions(
     age_cutoff_days: int = (settings.MAX_SHIFT_ACTIVITY_AGE_MODIFIABLE_DAYS + 1),
 ):
     logger_beat.info(
         f"[AUTOMATED] Running task `check_shifts_for_exceptions` with cutoff={age_cutoff_days} days."
     )
-    err_msg = ""
 
     try:
-        total_created = 0
-        total_exceptions = 0
         cutoff = localtime(now()).date() - timedelta(days=int(age_cutoff_days))
-        for store in Store.objects.filter(
-            is_active=True, is_scheduling_enabled=True
-        ).all():
-            # Get all shifts to try an link them to their respective shifts (check for missed shifts)
-            for shift in Shift.objects.select_related("store").filter(
-                store_id=store.id,
-                date__range=(
-                    cutoff,
-                    localtime(now()).date() - timedelta(days=1),
-                ),  # IGNORE CURRENT DAY, AS AUTOMATED TASK RUNS AT 12:05AM -> will mark everyone as missed_shift
-                is_deleted=False,
-            ):
-                try:
-                    reason, created = link_activity_to_shift(shift=shift)
-                    if created:
-                        total_created += 1
-                    if reason:
-                        total_exceptions += 1
-
-                except Exception as e:
-                    err_msg += f"- Shift ID: {shift.id} (Date: {shift.date}) for User ID {shift.employee_id} [{store.code}], error: {str(e)[:75]}\n"
-                    pass
-
-        if err_msg:
-            raise Exception(
-                "Ran into error(s) when linking shift to their activity, notification sent to admins."
-            )
+        # IGNORE CURRENT DAY, AS AUTOMATED TASK RUNS AT 12:05AM -> will mark everyone as missed_shift
+        yesterday = localtime(now()).date() - timedelta(days=1)
 
-        logger_beat.info(
-            f"Finished running task `check_shifts_for_exceptions` and created {total_created} new exceptions while linking shifts to their activity. There exist {total_exceptions} unresolved exceptions."
+        store_ids = list(
+            Store.objects.filter(
+                is_active=True, is_scheduling_enabled=True
+            ).values_list("id", flat=True)
+        )
+
+        dispatch_store_job(
+            task_name="check_shifts_for_exceptions",
+            store_task=check_store_shifts_for_exceptions,
+            store_ids=store_ids,
+            args=(cutoff.isoformat(), yesterday.isoformat()),
+            error_title="**ERROR** running task `check_shifts_for_exceptions`",
+            error_message=f"Could not link the shifts from {cutoff} to {yesterday} for the following stores:",
         )
 
     except Exception as e:
         notify_admins_error_generated(
             "**ERROR** running task `check_shifts_for_exceptions`",
-            "Could not link the following shifts:\n\n" + err_msg,
+            f"Could not link any shifts, generating the error:\n\n{str(e)}",
         )
         logger_beat.critical(
             f"[FAILURE] Failed to complete task `check_shifts_for_exceptions` due to the error: {str(e)}\n{traceback.format_exc()}"
@@ -286,33 +322,90 @@ def check_shifts_for_exceptions(
         return
 
 
-@shared_task
+@shared_task(bind=True, **STORE_TASK_OPTIONS)
+def check_store_shifts_for_exceptions(
+    self, store_id: int, start_date: str, end_date: str
+) -> dict:
+    def check_store(store: Store) -> dict:
+        # Link all shifts to their respective activities at once (check for missed shifts)
+        results = reconcile_store_shift_exceptions(
+            store=store,
+            start_date=datetime.strptime(start_date, "%Y-%m-%d").date(),
+            end_date=datetime.strptime(end_date, "%Y-%m-%d").date(),
+        )
+        return {
+            "created": sum(1 for _, created in results.values() if created),
+            "exceptions": sum(1 for reason, _ in results.values() if reason),
+        }
+
+    return run_store_task(
+        self, store_id, check_store, period=f"{start_date}:{end_date}"
+    )
+
+
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
 def cancel_expired_shift_requests():
     logger_beat.info(f"[AUTOMATED] Running task `cancel_old_shift_requests`.")
 
     try:
         today = localtime(now()).date()
-        expired_requests = ShiftRequest.objects.select_related("shift").filter(
-            status__in=[ShiftRequest.Status.PENDING, ShiftRequest.Status.ACCEPTED],
-            shift__date__lte=today,
-        )
-        total_count = expired_requests.count()
-
-        if total_count > 0:
-            updated_count = expired_requests.update(
-                status=ShiftRequest.Status.CANCELLED
+        cancelled_status = ShiftRequest.Status.CANCELLED
+
+        # Cancel them in ONE statement, returning the cancelled requests with their OLD status
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH expired AS (
+                    SELECT req.id, req.status
+                    FROM {ShiftRequest._meta.db_table} AS req
+                    JOIN {Shift._meta.db_table} AS shift ON shift.id = req.shift_id
+                    WHERE req.status IN (%s, %s) AND shift.date <= %s
+                    FOR UPDATE OF req
+                )
+                UPDATE {ShiftRequest._meta.db_table} AS req
+                SET status = %s, updated_at = %s
+                FROM expired
+                WHERE req.id = expired.id
+                RETURNING req.id, expired.status, req.type, req.store_id, req.target_user_id
+                """,
+                [
+                    ShiftRequest.Status.PENDING,
+                    ShiftRequest.Status.ACCEPTED,
+                    today,
+                    cancelled_status,
+                    now(),
+                ],
             )
+            rows = cursor.fetchall()
+
+        if rows:
             logger_beat.info(
-                f"Successfully cancelled {updated_count} expired shift requests."
+                f"Successfully cancelled {len(rows)} expired shift requests."
             )
 
-            for req in expired_requests:
-                notify_shift_request_status_change.delay(
-                    request_id=req.id, acting_user_id=None
+            # Update the users' cached active shift request counts
+            update_shift_requests_user_stats(
+                (
+                    ShiftRequest(
+                        id=req_id,
+                        status=cancelled_status,
+                        type=req_type,
+                        store_id=store_id,
+                        target_user_id=target_user_id,
+                    ),
+                    old_status,
                 )
+                for req_id, old_status, req_type, store_id, target_user_id in rows
+            )
+
+            # Notify everyone in a single task
+            notify_shift_requests_status_change.delay(
+                request_ids=[row[0] for row in rows], acting_user_id=None
+            )
 
         logger_beat.info(
-            f"Finished running task `cancel_old_shift_requests` and cancelled {total_count} expired shift requests."
+            f"Finished running task `cancel_old_shift_requests` and cancelled {len(rows)} expired shift requests."
         )
 
     except Exception as e:
@@ -326,7 +419,8 @@ def cancel_expired_shift_requests():
         return
 
 
-@shared_task
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
 def delete_old_shift_requests():
     logger_beat.info(f"[AUTOMATED] Running task `delete_old_shift_requests`.")
 
@@ -336,12 +430,11 @@ def delete_old_shift_requests():
             days=settings.SHIFT_REQUEST_MAX_HISTORY_AGE_DAYS
         )
         old_requests = ShiftRequest.objects.filter(shift__date__lte=max_age_date)
-        total_count = old_requests.count()
 
-        old_requests.delete()
+        result = purge_in_batches(old_requests)
 
         logger_beat.info(
-            f"Finished running task `delete_old_shift_requests` and deleted {total_count} old shift requests."
+            f"Finished running task `delete_old_shift_requests` and deleted {result.deleted} old shift requests: {result}."
         )
 
     except Exception as e:
@@ -355,16 +448,151 @@ def delete_old_shift_requests():
         return
 
 
-@shared_task
+@shared_task(**REPORT_TASK_OPTIONS)
+@exclusive_task(ttl=settings.REPORT_TASK_TIME_LIMIT + 60)
+def rebuild_activity_daily_summaries(
+    age_cutoff_days: int = (settings.MAX_SHIFT_ACTIVITY_AGE_MODIFIABLE_DAYS + 1),
+):
+    logger_beat.info(
+        f"[AUTOMATED] Running task `rebuild_activity_daily_summaries` with cutoff={age_cutoff_days} days."
+    )
+
+    try:
+        today = localtime(now()).date()
+        cutoff = today - timedelta(days=int(age_cutoff_days))
+
+        # Rollups are updated as activities change -- this recalculates the modifiable window to catch any drift
+        total_count = ActivityDailySummary.rebuild(start_date=cutoff, end_date=today)
+
+        logger_beat.info(
+            f"Finished running task `rebuild_activity_daily_summaries` and rebuilt {total_count} daily rollups from {cutoff} to {today}."
+        )
+
+    except Exception as e:
+        notify_admins_error_generated(
+            "**ERROR** running task `rebuild_activity_daily_summaries`",
+            f"Failed to rebuild the daily activity rollups, generating the error:\n\n{str(e)}",
+        )
+        logger_beat.critical(
+            f"[FAILURE] Failed to complete task `rebuild_activity_daily_summaries` due to the error: {str(e)}\n{traceback.format_exc()}"
+        )
+        return
+
+
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
+def refresh_public_holiday_overrides(years: list = None):
+    logger_beat.info(f"[AUTOMATED] Running task `refresh_public_holiday_overrides`.")
+
+    try:
+        # Default to the current and next year
+        if not years:
+            current_year = localtime(now()).year
+            years = [current_year, current_year + 1]
+
+        total_created = total_deleted = 0
+        for year in years:
+            created, deleted = holiday_calendar.sync_holiday_overrides_from_api(
+                year=int(year)
+            )
+            total_created += created
+            total_deleted += deleted
+
+        logger_beat.info(
+            f"Finished running task `refresh_public_holiday_overrides` for years {years}, creating {total_created} and deleting {total_deleted} public holiday overrides."
+        )
+
+    except Exception as e:
+        notify_admins_error_generated(
+            "**ERROR** running task `refresh_public_holiday_overrides`",
+            f"Failed to refresh the public holiday overrides from the remote API, generating the error:\n\n{str(e)}",
+        )
+        logger_beat.critical(
+            f"[FAILURE] Failed to complete task `refresh_public_holiday_overrides` due to the error: {str(e)}\n{traceback.format_exc()}"
+        )
+        return
+
+
+@shared_task(**REPORT_TASK_OPTIONS)
+@exclusive_task(ttl=settings.REPORT_TASK_TIME_LIMIT + 60)
+def reconcile_public_holiday_flags(age_cutoff_days: int = 2):
+    logger_beat.info(
+        f"[AUTOMATED] Running task `reconcile_public_holiday_flags` with cutoff={age_cutoff_days} days."
+    )
+
+    try:
+        today = localtime(now()).date()
+        cutoff = today - timedelta(days=int(age_cutoff_days))
+
+        # Holiday status of every day in the window (offline calendar -> no network calls)
+        holiday_dates = {
+            cutoff + timedelta(days=i)
+            for i in range((today - cutoff).days + 1)
+            if holiday_calendar.is_public_holiday_date(cutoff + timedelta(days=i))
+        }
+
+        set_ids, unset_ids = [], []
+        for act in Activity.objects.filter(
+            work_date__gte=cutoff, work_date__lte=today
+        ).only(
+            "id",
+            "login_time",
+            "login_timestamp",
+            "logout_timestamp",
+            "last_updated_at",
+            "is_public_holiday",
+        ):
+            # Keep the flag of activities modified by a manager after clocking
+            if api_util.is_activity_modified(act):
+                continue
+
+            is_holiday = localtime(act.login_time).date() in holiday_dates
+            if is_holiday and not act.is_public_holiday:
+                set_ids.append(act.id)
+            elif not is_holiday and act.is_public_holiday:
+                unset_ids.append(act.id)
+
+        # Use `update()` so the activities are not marked as modified (`last_updated_at` is kept)
+        with transaction.atomic():
+            Activity.objects.filter(id__in=set_ids).update(is_public_holiday=True)
+            Activity.objects.filter(id__in=unset_ids).update(is_public_holiday=False)
+
+            if set_ids or unset_ids:
+                ActivityDailySummary.rebuild(start_date=cutoff, end_date=today)
+
+        logger_beat.info(
+            f"Finished running task `reconcile_public_holiday_flags` and fixed the public holiday flag of {len(set_ids) + len(unset_ids)} activities from {cutoff} to {today}."
+        )
+
+    except Exception as e:
+        notify_admins_error_generated(
+            "**ERROR** running task `reconcile_public_holiday_flags`",
+            f"Failed to reconcile the public holiday flag of recent activities, generating the error:\n\n{str(e)}",
+        )
+        logger_beat.critical(
+            f"[FAILURE] Failed to complete task `reconcile_public_holiday_flags` due to the error: {str(e)}\n{traceback.format_exc()}"
+        )
+        return
+
+
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+@exclusive_task()
 def write_out_repeating_shifts_for_week(
     week_start_date: str = None,  # optional date string "YYYY-MM-DD"
     store_id: int = None,  # optional specific store
+    weeks: int = 1,  # number of consecutive weeks to write out
+    force: bool = False,  # write out weeks that were already written out
 ):
     """
     Generate weekly repeating shifts for all stores (cron) or for a specific date/store (ad-hoc).
+    Each store is written out by its own subtask, which loads the store's existing shifts and user access
+    once for the whole range of weeks and bulk creates its new shifts together.
+    Weeks already written out for a store are skipped unless forced (i.e. re-run by an admin).
 
     :param week_start_date: Optional date to generate shifts for (format "YYYY-MM-DD")
     :param store_id: Optional specific store ID to generate shifts for
+    :param weeks: Optional number of consecutive weeks (starting from the week start) to generate shifts for
+    :param force: Optionally write out the weeks that were already written out for a store
     """
     logger_beat.info(f"[AUTOMATED] Running task `write_out_repeating_shifts_for_week`.")
 
@@ -378,104 +606,134 @@ def write_out_repeating_shifts_for_week(
                 days=14
             )  # Only allow 7/14/21 day offsets (1st or 2nd or 3rd week in advance)
 
-        cycle_week = util.get_repeating_shift_cycle_week(week_start)
-        total_count = 0
-
+        stores = Store.objects.filter(
+            is_active=True,
+            is_scheduling_enabled=True,
+            is_repeating_shifts_enabled=True,
+        )
         if store_id:
-            stores = Store.objects.filter(
-                id=store_id,
-                is_active=True,
-                is_scheduling_enabled=True,
-                is_repeating_shifts_enabled=True,
-            )
-        else:
-            stores = Store.objects.filter(
-                is_active=True,
-                is_scheduling_enabled=True,
-                is_repeating_shifts_enabled=True,
-            )
+            stores = stores.filter(id=store_id)
 
-        for store in stores:
-            repeating_shifts = RepeatingShift.objects.select_related(
-                "employee", "role"
-            ).filter(store_id=store.id, active_weeks__contains=[cycle_week])
-            shifts_to_create = []
-            shifts_not_created = []
-
-            for shift in repeating_shifts:
-                shift_date = util.get_real_date_from_repeating_shift_cycle(
-                    start_weekday=shift.start_weekday,
-                    target_cycle_week=cycle_week,
-                    today=week_start,
-                )
+        dispatch_store_job(
+            task_name="write_out_repeating_shifts_for_week",
+            store_task=write_out_store_repeating_shifts,
+            store_ids=list(stores.values_list("id", flat=True)),
+            args=(week_start.isoformat(), max(1, weeks), force),
+            error_title="**ERROR** running task `write_out_repeating_shifts_for_week`",
+            error_message=f"Failed to write out the repeating shifts of the week(s) starting {week_start} for the following stores:",
+        )
 
-                if api_util.employee_has_conflicting_shifts(
-                    employee_id=shift.employee_id,
-                    store_id=shift.store_id,
-                    date=shift_date,
-                    login=shift.start_time,
-                    logout=shift.end_time,
-                ):
-                    shifts_not_created.append((shift, "Conflicting Shift"))
-                    continue
-                elif not shift.employee.is_active:
-                    shifts_not_created.append((shift, "Employee Deactivated"))
-                    continue
-                elif not shift.employee.is_associated_with_store(shift.store_id):
-                    shifts_not_created.append((shift, "Employee Resigned"))
-                    continue
-
-                shifts_to_create.append(
-                    Shift(
-                        employee_id=shift.employee_id,
-                        store_id=shift.store_id,
-                        date=shift_date,
-                        start_time=shift.start_time,
-                        end_time=shift.end_time,
-                        role=shift.role,
-                        comment=shift.comment,
-                    )
-                )
+    except Exception as e:
+        notify_admins_error_generated(
+            "**ERROR** running task `write_out_repeating_shifts_for_week`",
+            f"Failed to write out any shift using repeated shifts, generating the error:\n\n{str(e)}",
+        )
+        logger_beat.critical(
+            f"[FAILURE] Failed to complete task `write_out_repeating_shifts_for_week` due to the error: {str(e)}\n{traceback.format_exc()}"
+        )
+        return
 
-            if shifts_to_create:
-                try:
-                    with transaction.atomic():  # nested atomic per store
-                        Shift.objects.bulk_create(shifts_to_create)
-                        total_count += len(shifts_to_create)
-
-                except Exception as e:
-                    str_title = util.sanitise_markdown_title_text(
-                        f"[`{store.code}`] Repeating Shifts Failure"
-                    )
-                    str_msg = util.sanitise_markdown_message_text(
-                        f"The system failed to generate shifts for the store `{store.code}` using the store's repeating shits for the week starting **{week_start}**. There was expected to be **{len(shifts_to_create)} shift(s)** generated.\n\nPlease contact a ++**Site Administrator**++ to resolve this."
-                    )
-                    Notification.send_to_users(
-                        users=store.get_store_managers(),
-                        title=str_title,
-                        message=str_msg,
-                        store=store,
-                        notification_type=Notification.Type.AUTOMATIC_ALERT,
-                        recipient_group=Notification.RecipientType.STORE_MANAGERS,
-                        expires_on=notification_default_expires_on(7),
-                    )
-
-                    notify_admins_error_generated(
-                        "[`{store.code}`] **ERROR** - Repeating Shifts Copy",
-                        f"Failed to write out **{len(shifts_to_create)} shifts** for the store `{store.code}` in the week starting **{week_start}**. The error encountered:\n\n{str(e)}",
-                    )
-                    pass
 
-            str_title = util.sanitise_markdown_title_text(
-                f"[`{store.code}`] Repeating Shift Results"
+@shared_task(bind=True, **STORE_TASK_OPTIONS)
+def write_out_store_repeating_shifts(
+    self, store_id: int, week_start_date: str, weeks: int = 1, force: bool = False
+) -> dict:
+    week_start = datetime.strptime(week_start_date, "%Y-%m-%d").date()
+    week_starts = [week_start + timedelta(weeks=i) for i in range(weeks)]
+
+    def write_out(store: Store) -> dict:
+        # Skip the weeks already written out for the store (i.e. by an overlapping run, or before a retry)
+        pending = [
+            start
+            for start in week_starts
+            if force or not is_run_complete(self.name, store.id, start.isoformat())
+        ]
+        if not pending:
+            return {"created": 0, "skipped": 0}
+
+        counts = _write_out_store_repeating_shifts(store, pending)
+        if not counts.pop("failed"):
+            for start in pending:
+                mark_run_complete(self.name, store.id, start.isoformat())
+        return counts
+
+    # The lease covers the whole store -> overlapping runs can't write the same week twice
+    return run_store_task(self, store_id, write_out)
+
+
+def _write_out_store_repeating_shifts(store: Store, week_starts: list) -> dict:
+    cycle_weeks = {
+        start: util.get_repeating_shift_cycle_week(start) for start in week_starts
+    }
+    str_weeks = ", ".join(f"**{start}**" for start in week_starts)
+
+    repeating_shifts = list(
+        RepeatingShift.objects.select_related("employee", "role").filter(
+            store_id=store.id,
+            active_weeks__overlap=list(set(cycle_weeks.values())),
+        )
+    )
+
+    # Preload everything the checks need ONCE for the whole range
+    associated_user_ids = set(
+        StoreUserAccess.objects.filter(store_id=store.id).values_list(
+            "user_id", flat=True
+        )
+    )
+    shifts_to_create = []
+    shifts_not_created = []
+    sources = {}  # id(shift to create) -> (repeating shift, date)
+
+    for start, cycle_week in cycle_weeks.items():
+        for shift in repeating_shifts:
+            if cycle_week not in shift.active_weeks:
+                continue
+
+            shift_date = util.get_real_date_from_repeating_shift_cycle(
+                start_weekday=shift.start_weekday,
+                target_cycle_week=cycle_week,
+                today=start,
             )
-            str_conflicting_shifts = "\n\n".join(
-                f"- {shift.employee.first_name} {shift.employee.last_name}: {calendar.day_abbr[shift.start_weekday - 1].upper()} - {shift.start_time.strftime('%H:%M')} to {shift.end_time.strftime('%H:%M')} (Role: {shift.role.name if shift.role else 'N/A'}) [Reason: {reason}]"
-                for shift, reason in shifts_not_created
+
+            if not shift.employee.is_active:
+                shifts_not_created.append((shift, shift_date, "Employee Deactivated"))
+                continue
+            elif shift.employee_id not in associated_user_ids:
+                shifts_not_created.append((shift, shift_date, "Employee Resigned"))
+                continue
+
+            new_shift = Shift(
+                employee_id=shift.employee_id,
+                store_id=shift.store_id,
+                date=shift_date,
+                start_time=shift.start_time,
+                end_time=shift.end_time,
+                role=shift.role,
+                comment=shift.comment,
+            )
+            sources[id(new_shift)] = (shift, shift_date)
+            shifts_to_create.append(new_shift)
+
+    created = 0
+    failed = 0
+    if shifts_to_create:
+        try:
+            with transaction.atomic():  # nested atomic per store
+                # The database rejects the shifts conflicting with existing shifts or shifts written earlier in
+                # the run (i.e. overlapping repeating shifts)
+                conflicting = Shift.objects.bulk_create_skip_conflicts(shifts_to_create)
+            created = len(shifts_to_create) - len(conflicting)
+            shifts_not_created.extend(
+                (*sources[id(shift)], "Conflicting Shift") for shift in conflicting
+            )
+
+        except Exception as e:
+            failed = len(shifts_to_create)
+            str_title = util.sanitise_markdown_title_text(
+                f"[`{store.code}`] Repeating Shifts Failure"
             )
-            str_conflicting_msg = f"\n\nThe system failed to create **{len(shifts_not_created)} shift(s)** due to conflicts with existing shifts, they are as follow:\n\n{str_conflicting_shifts}"
             str_msg = util.sanitise_markdown_message_text(
-                f"The system has written out repeating shifts as actual shifts for the store `{store.code}` in the week starting **{week_start}**. There were **{len(shifts_to_create)} shift(s)** generated from this process.{str_conflicting_msg if shifts_not_created else ''}\n\nIf there are any issues with this process please contact a *Site Administrator* to resolve it."
+                f"The system failed to generate shifts for the store `{store.code}` using the store's repeating shits for the week(s) starting {str_weeks}. There was expected to be **{len(shifts_to_create)} shift(s)** generated.\n\nPlease contact a ++**Site Administrator**++ to resolve this."
             )
             Notification.send_to_users(
                 users=store.get_store_managers(),
@@ -487,25 +745,74 @@ def write_out_repeating_shifts_for_week(
                 expires_on=notification_default_expires_on(7),
             )
 
-        logger_beat.info(
-            f"Finished running task `write_out_repeating_shifts_for_week` and wrote out {total_count} new shifts from their corresponding repeating shift."
-        )
+            notify_admins_error_generated(
+                f"[`{store.code}`] **ERROR** - Repeating Shifts Copy",
+                f"Failed to write out **{len(shifts_to_create)} shifts** for the store `{store.code}` in the week(s) starting {str_weeks}. The error encountered:\n\n{str(e)}",
+            )
 
-    except Exception as e:
-        notify_admins_error_generated(
-            "**ERROR** running task `write_out_repeating_shifts_for_week`",
-            f"Failed to write out any shift using repeated shifts, generating the error:\n\n{str(e)}",
-        )
-        logger_beat.critical(
-            f"[FAILURE] Failed to complete task `write_out_repeating_shifts_for_week` due to the error: {str(e)}\n{traceback.format_exc()}"
-        )
-        return
+    str_title = util.sanitise_markdown_title_text(
+        f"[`{store.code}`] Repeating Shift Results"
+    )
+    str_conflicting_shifts = "\n\n".join(
+        f"- {shift.employee.first_name} {shift.employee.last_name}: {calendar.day_abbr[shift_date.weekday()].upper()} {shift_date} - {shift.start_time.strftime('%H:%M')} to {shift.end_time.strftime('%H:%M')} (Role: {shift.role.name if shift.role else 'N/A'}) [Reason: {reason}]"
+        for shift, shift_date, reason in shifts_not_created
+    )
+    str_conflicting_msg = f"\n\nThe system failed to create **{len(shifts_not_created)} shift(s)** due to conflicts with existing shifts, they are as follow:\n\n{str_conflicting_shifts}"
+    str_msg = util.sanitise_markdown_message_text(
+        f"The system has written out repeating shifts as actual shifts for the store `{store.code}` in the week(s) starting {str_weeks}. There were **{created} shift(s)** generated from this process.{str_conflicting_msg if shifts_not_created else ''}\n\nIf there are any issues with this process please contact a *Site Administrator* to resolve it."
+    )
+    Notification.send_to_users(
+        users=store.get_store_managers(),
+        title=str_title,
+        message=str_msg,
+        store=store,
+        notification_type=Notification.Type.AUTOMATIC_ALERT,
+        recipient_group=Notification.RecipientType.STORE_MANAGERS,
+        expires_on=notification_default_expires_on(7),
+    )
+
+    return {
+        "created": created,
+        "skipped": len(shifts_not_created),
+        "failed": failed,
+    }
 
 
 ############################################ NON-SCHEDULED AUTOMATED TASKS ########################################################################
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
+def update_activity_public_holiday(activity_id: int):
+    try:
+        activity = Activity.objects.get(pk=activity_id)
+        is_holiday = api_util.is_public_holiday(activity.login_time)
+
+        if activity.is_public_holiday != is_holiday:
+            # Only update if the activity wasn't edited in the meantime (i.e. manager manually set the flag).
+            # Use `update()` so the activity is not marked as modified (`last_updated_at` is kept)
+            updated = Activity.objects.filter(
+                pk=activity_id, last_updated_at=activity.last_updated_at
+            ).update(is_public_holiday=is_holiday)
+
+            # Update the rollup if the activity was already finished
+            if updated and activity.logout_time:
+                ActivityDailySummary.rebuild_for_activity(activity)
+
+        logger_celery.debug(
+            f"[UPDATE: ACTIVITY (ID: {activity_id})] [HOLIDAY-CHECK] PUBLIC HOLIDAY: {is_holiday}"
+        )
+
+    except Activity.DoesNotExist:
+        logger_celery.info(
+            f"Skipped public holiday check for activity ID {activity_id} as it no longer exists."
+        )
+    except Exception as e:
+        logger_celery.error(
+            f"Failed to set the public holiday flag for activity ID {activity_id} (left for nightly reconciliation), resulting in the error: {str(e)}\n{traceback.format_exc()}"
+        )
+
+
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_managers_account_deactivated(user_id: int, manager_id: int):
     logger_beat.info(
         f"[AUTOMATED] Running task `notify_managers_account_deactivated` due to an account being deactivated by manager ID '{manager_id}'."
@@ -576,7 +883,7 @@ def notify_managers_account_deactivated(user_id: int, manager_id: int):
         return
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_managers_account_activated(user_id: int, manager_id: int):
     logger_beat.info(
         f"[AUTOMATED] Running task `notify_managers_account_activated` due to an account being activated by manager ID '{manager_id}'."
@@ -647,7 +954,7 @@ def notify_managers_account_activated(user_id: int, manager_id: int):
         return
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_managers_and_employee_account_resigned(
     user_id: int, store_id: int, manager_id: int
 ):
@@ -745,7 +1052,7 @@ def notify_managers_and_employee_account_resigned(
         return
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_managers_and_employee_account_assigned(
     user_id: int, store_id: int, manager_id: int
 ):
@@ -843,7 +1150,7 @@ def notify_managers_and_employee_account_assigned(
         return
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_employee_account_reset_pin(user_id: int, manager_id: int):
     logger_beat.info(
         f"[AUTOMATED] Running task `notify_employee_account_reset_pin` due to pin reset being initiated by manager ID '{manager_id}'."
@@ -905,7 +1212,7 @@ def notify_employee_account_reset_pin(user_id: int, manager_id: int):
         return
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_employee_account_reset_password(user_id: int, manager_id: int):
     logger_beat.info(
         f"[AUTOMATED] Running task `notify_employee_account_reset_password` due to pass reset being initiated by manager ID '{manager_id}'."
@@ -965,7 +1272,7 @@ def notify_employee_account_reset_password(user_id: int, manager_id: int):
         )
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_managers_store_information_updated(store_id: int, manager_id: int):
     logger_beat.info(
         f"[AUTOMATED] Running task `notify_managers_store_information_updated` due to store ID '{store_id}' being updated by manager ID '{manager_id}'."
@@ -1022,7 +1329,7 @@ def notify_managers_store_information_updated(store_id: int, manager_id: int):
         return
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_managers_and_user_elevated_permission(
     store_id: int, user_id: int, authorising_manager_id: int
 ):
@@ -1112,7 +1419,7 @@ def notify_managers_and_user_elevated_permission(
         return
 
 
-@shared_task
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_managers_and_user_removed_permission(
     store_id: int, user_id: int, authorising_manager_id: int
 ):
@@ -1202,7 +1509,24 @@ def notify_managers_and_user_removed_permission(
         return
 
 
-@shared_task
+def get_shift_request_status_message(
+    shift_request: ShiftRequest, acting_user=None
+) -> str:
+    """
+    Get the (unsanitised) notification message of a shift request's status change.
+    Requires the request's shift (with its store and role) to be selected.
+    """
+    if acting_user:
+        acting_name = f"*{'manager' if acting_user.is_manager(store=shift_request.store_id) else 'user'}* ++{acting_user.first_name} {acting_user.last_name}++"
+    else:
+        acting_name = "++System++ (AUTOMATED)"
+
+    message_text = f"One of your associated shift requests have been **{shift_request.status.upper()}** by the {acting_name}."
+    message_text += f"\n\n**Shift Information:**\n<ul><li><b>Store:</b> {shift_request.shift.store.code}</li>\n<li><b>Date:</b> {shift_request.shift.date}</li>\n<li><b>Time:</b> {shift_request.shift.start_time.strftime('%H:%M')} - {shift_request.shift.end_time.strftime('%H:%M')}</li>\n<li><b>Role:</b> {shift_request.shift.role.name if shift_request.shift.role else 'N/A'}</li></ul>"
+    return message_text
+
+
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
 def notify_shift_request_status_change(request_id: int, acting_user_id: int = None):
     logger_beat.info(
         f"[AUTOMATED] Running task `notify_shift_request_status_change` for ShiftRequest ID '{request_id}'."
@@ -1220,21 +1544,17 @@ def notify_shift_request_status_change(request_id: int, acting_user_id: int = No
             return
 
         # Determine acting user
+        acting_user = None
         if acting_user_id:
             try:
                 acting_user = User.objects.get(id=acting_user_id)
-                acting_name = f"*{'manager' if acting_user.is_manager(store=shift_request.store_id) else 'user'}* ++{acting_user.first_name} {acting_user.last_name}++"
             except User.DoesNotExist:
                 logger_beat.critical(
                     f"[FAILURE] Acting user ID {acting_user_id} not found."
                 )
                 return
-        else:
-            acting_name = "++System++ (AUTOMATED)"
-
-        message_text = f"One of your associated shift requests have been **{shift_request.status.upper()}** by the {acting_name}."
-        message_text += f"\n\n**Shift Information:**\n<ul><li><b>Store:</b> {shift_request.shift.store.code}</li>\n<li><b>Date:</b> {shift_request.shift.date}</li>\n<li><b>Time:</b> {shift_request.shift.start_time.strftime('%H:%M')} - {shift_request.shift.end_time.strftime('%H:%M')}</li>\n<li><b>Role:</b> {shift_request.shift.role.name if shift_request.shift.role else 'N/A'}</li></ul>"
 
+        message_text = get_shift_request_status_message(shift_request, acting_user)
         str_title = util.sanitise_markdown_title_text(f"Shift Request Status Update")
 
         # Collect recipients
@@ -1263,6 +1583,63 @@ def notify_shift_request_status_change(request_id: int, acting_user_id: int = No
         return
 
 
+@shared_task(**NOTIFICATION_TASK_OPTIONS)
+def notify_shift_requests_status_change(request_ids: list, acting_user_id: int = None):
+    logger_beat.info(
+        f"[AUTOMATED] Running task `notify_shift_requests_status_change` for {len(request_ids)} ShiftRequests."
+    )
+
+    try:
+        # Determine acting user
+        acting_user = None
+        if acting_user_id:
+            try:
+                acting_user = User.objects.get(id=acting_user_id)
+            except User.DoesNotExist:
+                logger_beat.critical(
+                    f"[FAILURE] Acting user ID {acting_user_id} not found."
+                )
+                return
+
+        shift_requests = ShiftRequest.objects.select_related(
+            "shift", "shift__store", "shift__role"
+        ).filter(id__in=request_ids)
+
+        str_title = util.sanitise_markdown_title_text(f"Shift Request Status Update")
+        notifications = [
+            (
+                (
+                    [req.requester_id, req.target_user_id]
+                    if req.target_user_id
+                    else [req.requester_id]
+                ),
+                str_title,
+                util.sanitise_markdown_message_text(
+                    get_shift_request_status_message(req, acting_user)
+                ),
+            )
+            for req in shift_requests
+        ]
+
+        # Send ALL the notifications (and their receipts) at once
+        Notification.send_many_to_users(
+            notifications=notifications,
+            notification_type=Notification.Type.AUTOMATIC_ALERT,
+            recipient_group=Notification.RecipientType.INDIVIDUAL,
+            expires_on=notification_default_expires_on(7),
+        )
+
+        logger_beat.info(
+            f"Finished running task `notify_shift_requests_status_change`. Sent {len(notifications)} notifications about ShiftRequest status changes."
+        )
+
+    except Exception as e:
+        logger_beat.critical(
+            f"[FAILURE] Failed to complete task `notify_shift_requests_status_change` due to error: {str(e)}\n{traceback.format_exc()}"
+        )
+        return
+
+
 ############################################ HELPER TASKS ########################################################################
 
 
@@ -1275,3 +1652,138 @@ def notify_admins_error_generated(title: str, message: str):
         recipient_group=Notification.RecipientType.SITE_ADMINS,
         expires_on=notification_default_expires_on(90),
     )
+
+
+def dispatch_store_job(
+    task_name: str,
+    store_task,
+    store_ids: list,
+    error_title: str,
+    error_message: str,
+    args: tuple = (),
+):
+    """
+    Fan out a scheduled job as a chord of one subtask per store, so the stores are processed in parallel
+    (each with its own time limit and retries) and a slow store can't hold up or kill the others.
+    The results are aggregated by `report_store_job_results` once every store is done. If a store's subtask fails
+    outright instead (i.e. killed at its hard time limit) the callback never runs, so `report_store_job_failure`
+    reports that to the admins.
+
+    Args:
+        task_name (str): The name of the job (for logging).
+        store_task (Task): The per store task, called as `store_task(store_id, *args)` and returning `run_store_task`'s result.
+        store_ids (list): The IDs of the stores to run the job for.
+        error_title (str): The title of the admin notification if any store fails.
+        error_message (str): The message of the admin notification, followed by the list of failed stores.
+        args (tuple, optional): Extra (JSON serialisable) arguments passed to every store's task. Defaults to ().
+    """
+    if not store_ids:
+        logger_beat.info(f"Finished running task `{task_name}`, no stores to run.")
+        return
+
+    report_kwargs = dict(
+        task_name=task_name, error_title=error_title, error_message=error_message
+    )
+    chord(store_task.s(store_id, *args) for store_id in store_ids)(
+        report_store_job_results.s(**report_kwargs).on_error(
+            report_store_job_failure.s(**report_kwargs)
+        )
+    )
+    logger_beat.info(
+        f"Task `{task_name}` dispatched a subtask for each of {len(store_ids)} stores."
+    )
+
+
+def run_store_task(
+    task, store_id: int, func, period: str = "", use_ledger: bool = False
+) -> dict:
+    """
+    Run a store's part of a fanned out job (`func(store)`, returning a dict of counts) from its bound task.
+    It holds a lease on the (task, store, period) run, so an overlapping run is skipped, as is a run that already
+    completed if `use_ledger` (i.e. a retry, or the same job started by another beat node).
+    Database connection errors are retried, any other error (or running out of time) is RETURNED so a single
+    store can never stop the chord's callback from reporting on the whole job.
+    The run is refused (and reported as an error) if the lease can't be checked, so its side effects (i.e.
+    notifications, written shifts) are never repeated.
+    """
+    result = {"store": str(store_id), "counts": {}, "error": None, "skipped": False}
+
+    with TaskLease(
+        task.name,
+        scope=store_id,
+        period=period,
+        use_ledger=use_ledger,
+        fail_open=False,
+    ) as lease:
+        if lease.error:
+            result["error"] = lease.error
+            return result
+        elif not lease.acquired:
+            result["skipped"] = True
+            return result
+
+        try:
+            store = Store.objects.get(id=store_id)
+            result["store"] = store.code
+            result["counts"] = func(store)
+            lease.complete()
+
+        except Exception as e:
+            if (
+                isinstance(e, (OperationalError, InterfaceError))
+                and task.request.retries < task.max_retries
+            ):
+                lease.release()  # Let the retry take it
+                raise task.retry(exc=e)
+
+            result["error"] = (
+                "Ran out of time" if isinstance(e, SoftTimeLimitExceeded) else str(e)
+            )
+            logger_beat.critical(
+                f"Tried to run task `{task.name}` for store [{result['store']}] and it resulted in error: {str(e)}\n{traceback.format_exc()}"
+            )
+
+    return result
+
+
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+def report_store_job_results(
+    results: list, task_name: str, error_title: str, error_message: str
+):
+    totals = defaultdict(int)
+    for result in results:
+        for key, count in result["counts"].items():
+            totals[key] += count
+
+    failed = [result for result in results if result["error"]]
+    skipped = [result for result in results if result.get("skipped")]
+    if failed:
+        notify_admins_error_generated(
+            error_title,
+            f"{error_message}\n\n"
+            + "\n".join(
+                f"- Store [{result['store']}] with error: {result['error'][:75]}"
+                for result in failed
+            ),
+        )
+        logger_beat.critical(
+            f"[FAILURE] Task `{task_name}` failed for {len(failed)} of {len(results)} stores, notification sent to admins."
+        )
+
+    logger_beat.info(
+        f"Finished running task `{task_name}` for {len(results) - len(failed) - len(skipped)} of {len(results)} stores ({len(skipped)} skipped as already running/completed) with the totals: {dict(totals)}."
+    )
+
+
+@shared_task(**SCHEDULED_TASK_OPTIONS)
+def report_store_job_failure(
+    request, exc, tb, task_name: str, error_title: str, error_message: str
+):
+    # Errback of the chord -> a store's subtask failed without returning its result (the other stores still ran)
+    notify_admins_error_generated(
+        error_title,
+        f"{error_message}\n\n- A store's subtask failed outright (no results were reported for the job) with error: {str(exc)[:75]}",
+    )
+    logger_beat.critical(
+        f"[FAILURE] Task `{task_name}` had a store subtask fail outright (task ID {getattr(request, 'id', None)}), notification sent to admins. Error: {str(exc)}"
+    )
@@ -163,29 +163,35 @@ def notification_all(employee, inactive_employee, clocked_in_employee, manager):
 
 
 @pytest.fixture
-def store_associate_employee(db, store, employee):
+def store_associate_employee(db, store, employee, django_capture_on_commit_callbacks):
     """
     Creates an association link between store and the employee.
     """
-    StoreUserAccess.objects.create(user=employee, store=store, is_manager=False)
+    # Committed like the other setup data -> invalidates any store access already cached (i.e. by a login)
+    with django_capture_on_commit_callbacks(execute=True):
+        StoreUserAccess.objects.create(user=employee, store=store, is_manager=False)
 
 
 @pytest.fixture
-def store_associate_manager(db, store, manager):
+def store_associate_manager(db, store, manager, django_capture_on_commit_callbacks):
     """
     Creates an association link between store and the manager.
     """
-    StoreUserAccess.objects.create(user=manager, store=store, is_manager=True)
+    with django_capture_on_commit_callbacks(execute=True):
+        StoreUserAccess.objects.create(user=manager, store=store, is_manager=True)
 
 
 @pytest.fixture
-def store_associate_inactive_employee(db, store, inactive_employee):
+def store_associate_inactive_employee(
+    db, store, inactive_employee, django_capture_on_commit_callbacks
+):
     """
     Creates an association link between store and the inactive employee.
     """
-    StoreUserAccess.objects.create(
-        user=inactive_employee, store=store, is_manager=False
-    )
+    with django_capture_on_commit_callbacks(execute=True):
+        StoreUserAccess.objects.create(
+            user=inactive_employee, store=store, is_manager=False
+        )
 
 
 @pytest.fixture
@@ -1,5 +1,7 @@
 import pytest
 from django.urls import reverse
+from auth_app.models import Notification
+from auth_app.utils import get_cached_user_page_context
 
 
 @pytest.mark.django_db
@@ -86,6 +88,72 @@ def test_notification_page_success(logged_in_employee, employee, notification_al
     assert "Send Messages" in content
 
 
+@pytest.mark.django_db
+def test_notification_list_pages(logged_in_employee, employee, manager, settings):
+    """
+    Test that read/sent notifications are not rendered with the notification page and are instead loaded in pages.
+    """
+    settings.NOTIFICATION_PAGE_SIZE = 2
+    for i in range(3):
+        notif = Notification.send_to_users(
+            users=[employee],
+            title=f"Read Notification {i}",
+            message="Message",
+            recipient_group=Notification.RecipientType.INDIVIDUAL,
+            sender=manager,
+        )
+        notif.mark_notification_as_read(user=employee)
+
+    response = logged_in_employee.get(reverse("notification_page"))
+    content = response.content.decode()
+    assert response.status_code == 200
+    assert '<span id="read-notification-page-count">3</span>' in content
+    assert "Read Notification 0" not in content
+
+    url = reverse("notification_list", args=["read"])
+    content = logged_in_employee.get(url, {"page": 1}).content.decode()
+    assert "Read Notification 2" in content and "Read Notification 1" in content
+    assert "Read Notification 0" not in content
+    assert 'data-page="2"' in content
+
+    content = logged_in_employee.get(url, {"page": 2}).content.decode()
+    assert "Read Notification 0" in content
+    assert "load-more-notifications" not in content
+
+    response = logged_in_employee.get(reverse("notification_list", args=["other"]))
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_user_page_context_cached(
+    employee,
+    store,
+    store_associate_employee,
+    django_assert_num_queries,
+    django_capture_on_commit_callbacks,
+):
+    """
+    Test that the user's page context is cached until their stores/account change.
+    """
+    context = get_cached_user_page_context(employee)
+    assert context["associated_stores"][store.id]["code"] == store.code
+    assert context["associated_stores_as_manager"] == {}
+
+    with django_assert_num_queries(0):
+        assert get_cached_user_page_context(employee) == context
+
+    store.code = "NEWCODE1"
+    with django_capture_on_commit_callbacks(execute=True):
+        store.save()
+    context = get_cached_user_page_context(employee)
+    assert context["associated_stores"][store.id]["code"] == "NEWCODE1"
+
+    employee.first_name = "Renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        employee.save()
+    assert get_cached_user_page_context(employee)["user_name"] == "Renamed"
+
+
 @pytest.mark.django_db
 def test_shift_requests_page_success(logged_in_employee):
     """
@@ -27,6 +27,11 @@ urlpatterns = [
     path("manager_dashboard", views.manager_dashboard, name="manager_dashboard"),
     path("dashboard", views.employee_dashboard, name="dashboard"),
     path("notifications", views.notification_page, name="notification_page"),
+    path(
+        "notifications/<str:list_type>",
+        views.notification_list,
+        name="notification_list",
+    ),
     path(
         "manage_employee_details",
         views.manage_employee_details,
@@ -0,0 +1,275 @@
+import logging
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, Iterable, Tuple
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.timezone import now, localtime, make_aware
+
+logger = logging.getLogger("auth_app")
+
+# User stats are stored as a hash per user (in the `user_stats` cache) holding both counts.
+# Counts are changed atomically (HINCRBY) by whatever changes them, so they rarely need recounting.
+# Changes that can't be followed by a delta drop the hash instead (store access changes, purged notifications),
+# and it always expires by the next local midnight, when notifications expire (`expires_on`).
+UNREAD_NOTIF_FIELD = "unread_notif_count"
+SHIFT_REQ_FIELD = "active_shift_req_count"
+# Only set when the hash is (re)built from the database -> HINCRBY on an expired hash creates a partial one without it
+COMPLETE_FIELD = "complete"
+
+
+def _stats_key(user_id: int) -> str:
+    return f"user_stats:{int(user_id)}"
+
+
+def _get_stats_ttl() -> int:
+    """
+    Seconds the stats can be cached for: the max TTL, cut short at the next local midnight.
+    """
+    current = localtime(now())
+    midnight = make_aware(
+        datetime.combine(current.date() + timedelta(days=1), time.min),
+        current.tzinfo,
+    )
+    return max(
+        1,
+        min(
+            settings.USER_STATS_CACHE_MAX_TTL_SEC,
+            int((midnight - current).total_seconds()),
+        ),
+    )
+
+
+def _get_redis_client(cache):
+    """
+    Get the raw Redis client of a django_redis cache (None for other backends, i.e. local memory).
+    """
+    client = getattr(cache, "client", None)
+    if client is not None and hasattr(client, "get_client"):
+        return client.get_client(write=True)
+    return None
+
+
+def get_user_stats(user) -> Tuple[int, int]:
+    """
+    Get the user's stats including unread notifications and active shift requests.
+
+    Args:
+      - user (User): The user to fetch stats for.
+
+    Returns:
+      - tuple:
+        - int: The count of unread notifications.
+        - int: The count of active shift requests.
+    """
+    cache = caches["user_stats"]
+    redis = _get_redis_client(cache) if settings.USER_STATS_USE_CACHE else None
+
+    if settings.USER_STATS_USE_CACHE:
+        try:
+            if redis is not None:
+                cached_data = {
+                    key.decode(): int(value)
+                    for key, value in redis.hgetall(
+                        cache.make_key(_stats_key(user.id))
+                    ).items()
+                }
+            else:
+                cached_data = cache.get(_stats_key(user.id))
+
+            if cached_data and cached_data.get(COMPLETE_FIELD):
+                return (
+                    max(0, cached_data[UNREAD_NOTIF_FIELD]),
+                    max(0, cached_data[SHIFT_REQ_FIELD]),
+                )
+        except Exception as e:
+            logger.warning(
+                f"Failed to read the cached stats for user ID {user.id}, producing error: {str(e)}"
+            )
+
+    unread_count = user.get_unread_notifications().count()
+    active_shift_requests_count = user.get_active_shift_requests().count()
+
+    if settings.USER_STATS_USE_CACHE:
+        data = {
+            UNREAD_NOTIF_FIELD: unread_count,
+            SHIFT_REQ_FIELD: active_shift_requests_count,
+            COMPLETE_FIELD: 1,
+        }
+        try:
+            if redis is not None:
+                key = cache.make_key(_stats_key(user.id))
+                pipe = redis.pipeline(transaction=True)
+                pipe.delete(key)
+                pipe.hset(key, mapping=data)
+                pipe.expire(key, _get_stats_ttl())
+                pipe.execute()
+            else:
+                cache.set(_stats_key(user.id), data, timeout=_get_stats_ttl())
+        except Exception as e:
+            logger.warning(
+                f"Failed to cache the stats for user ID {user.id}, producing error: {str(e)}"
+            )
+
+    return (unread_count, active_shift_requests_count)
+
+
+def adjust_user_stats(changes: Dict[int, Tuple[int, int]]) -> None:
+    """
+    Atomically change the cached stats of many users at once (using a single Redis pipeline).
+    Users without cached stats are left alone (they get counted when next requested).
+
+    Args:
+      - changes (dict): {user_id: (unread notifications change, active shift requests change)}
+    """
+    changes = {
+        int(user_id): (notif_change, shift_req_change)
+        for user_id, (notif_change, shift_req_change) in changes.items()
+        if notif_change or shift_req_change
+    }
+    if not settings.USER_STATS_USE_CACHE or not changes:
+        return
+
+    cache = caches["user_stats"]
+    try:
+        redis = _get_redis_client(cache)
+
+        # Local memory cache (development/testing) -> not atomic across processes
+        if redis is None:
+            for user_id, (notif_change, shift_req_change) in changes.items():
+                cached_data = cache.get(_stats_key(user_id))
+                if cached_data:
+                    cached_data[UNREAD_NOTIF_FIELD] += notif_change
+                    cached_data[SHIFT_REQ_FIELD] += shift_req_change
+                    cache.set(
+                        _stats_key(user_id), cached_data, timeout=_get_stats_ttl()
+                    )
+            return
+
+        pipe = redis.pipeline(transaction=False)
+        for user_id, (notif_change, shift_req_change) in changes.items():
+            key = cache.make_key(_stats_key(user_id))
+            if notif_change:
+                pipe.hincrby(key, UNREAD_NOTIF_FIELD, notif_change)
+            if shift_req_change:
+                pipe.hincrby(key, SHIFT_REQ_FIELD, shift_req_change)
+            # Ensure a partial hash (created as the key expired) doesnt live forever
+            pipe.expire(key, _get_stats_ttl(), nx=True)
+        pipe.execute()
+
+    except Exception as e:
+        logger.warning(
+            f"Failed to update the cached stats of {len(changes)} users, producing error: {str(e)}"
+        )
+
+
+def invalidate_user_stats(user_ids: Iterable[int]) -> None:
+    """
+    Drop the cached stats of the users (recounted when next requested), for changes that can't be followed
+    by adjusting the counts.
+    """
+    user_ids = set(user_ids)
+    if not settings.USER_STATS_USE_CACHE or not user_ids:
+        return
+
+    try:
+        caches["user_stats"].delete_many([_stats_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.warning(
+            f"Failed to invalidate the cached stats of {len(user_ids)} users, producing error: {str(e)}"
+        )
+
+
+def increment_user_stats(
+    user_ids: Iterable[int], notif_change: int = 0, shift_req_change: int = 0
+) -> None:
+    """
+    Apply the same change to the cached stats of every given user (i.e. a notification fan-out).
+    """
+    adjust_user_stats(
+        {user_id: (notif_change, shift_req_change) for user_id in set(user_ids)}
+    )
+
+
+def _get_shift_request_active_user_ids(
+    shift_request, status: str, store_users: dict, store_managers: dict
+) -> set:
+    """
+    Get the IDs of the users that count the shift request as ACTIVE when it has the given status
+    (mirrors `User.get_active_shift_requests`).
+    """
+    from auth_app.models import ShiftRequest
+
+    if status == ShiftRequest.Status.PENDING:
+        if shift_request.type == ShiftRequest.Type.SWAP:
+            return {shift_request.target_user_id} - {None}
+        return store_users[shift_request.store_id]
+
+    elif status == ShiftRequest.Status.ACCEPTED:
+        return store_managers[shift_request.store_id]
+
+    return set()
+
+
+def update_shift_requests_user_stats(changes: Iterable[Tuple[object, str]]) -> None:
+    """
+    Update the cached active shift request counts of every user affected by many shift requests being
+    created (`old_status=None`) or changing status, loading the stores' users in a single query.
+
+    Args:
+      - changes (iterable): (shift request (with its NEW status), old status) pairs.
+    """
+    from auth_app.models import ShiftRequest, StoreUserAccess
+
+    changes = list(changes)
+    if not settings.USER_STATS_USE_CACHE or not changes:
+        return
+
+    # Only SWAP requests pending on a single user dont need the store's users
+    store_ids = {
+        shift_request.store_id
+        for shift_request, old_status in changes
+        for status in [old_status, shift_request.status]
+        if status == ShiftRequest.Status.ACCEPTED
+        or (
+            status == ShiftRequest.Status.PENDING
+            and shift_request.type != ShiftRequest.Type.SWAP
+        )
+    }
+    store_users = defaultdict(set)
+    store_managers = defaultdict(set)
+    if store_ids:
+        for user_id, store_id, is_manager in StoreUserAccess.objects.filter(
+            store_id__in=store_ids
+        ).values_list("user_id", "store_id", "is_manager"):
+            store_users[store_id].add(user_id)
+            if is_manager:
+                store_managers[store_id].add(user_id)
+
+    totals = defaultdict(int)
+    for shift_request, old_status in changes:
+        before = (
+            _get_shift_request_active_user_ids(
+                shift_request, old_status, store_users, store_managers
+            )
+            if old_status
+            else set()
+        )
+        after = _get_shift_request_active_user_ids(
+            shift_request, shift_request.status, store_users, store_managers
+        )
+        for user_id in before - after:
+            totals[user_id] -= 1
+        for user_id in after - before:
+            totals[user_id] += 1
+
+    adjust_user_stats({user_id: (0, change) for user_id, change in totals.items()})
+
+
+def update_shift_request_user_stats(shift_request, old_status: str = None) -> None:
+    """
+    Update the cached active shift request counts of every affected user after a shift request
+    was created (`old_status=None`) or changed status.
+    """
+    update_shift_requests_user_stats([(shift_request, old_status)])
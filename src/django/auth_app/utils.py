@@ -16,6 +16,42 @@ from django.core.cache import caches
 from django.utils.http import urlencode
 from django.utils.timezone import now, localtime, is_aware
 from auth_app.models import User, Notification, Store, RepeatingShift
+from auth_app.user_stats import get_user_stats
+
+
+def set_request_principal(request, user: User) -> None:
+    """
+    Attach the authenticated user to the request (`request.principal`) with their store access kept on it,
+    allowing the view (and model helpers) to check store access without further queries/cache reads.
+    """
+    user.cache_store_access()
+    request.principal = user
+    sync_session_manager_flag(request, user.id)
+
+
+def sync_session_manager_flag(request, user_id: int) -> bool:
+    """
+    Check if the user is a manager of some store (using their cached store access) and keep the
+    session's `is_some_store_manager` flag (used by the templates) in sync with it.
+    Returns whether the user is a manager of some store.
+    """
+    is_some_manager = any(
+        is_manager for is_manager, _ in User.get_cached_store_access(user_id).values()
+    )
+    if request.session.get("is_some_store_manager") != is_some_manager:
+        request.session["is_some_store_manager"] = is_some_manager
+    return is_some_manager
+
+
+def get_request_principal(request) -> Union[User, None]:
+    """
+    Get the authenticated user attached to the request by the auth decorators (if any, and if the
+    session still belongs to that user).
+    """
+    principal = getattr(request, "principal", None)
+    if principal is not None and principal.id == request.session.get("user_id"):
+        return principal
+    return None
 
 
 def manager_required(view_func):
@@ -26,7 +62,6 @@ def manager_required(view_func):
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
         user_id = request.session.get("user_id")
-        is_some_manager = request.session.get("is_some_store_manager", False)
         referer = request.META.get("HTTP_REFERER")  # Previous page user was on
 
         # Redirect to login if they havent already
@@ -35,8 +70,8 @@ def manager_required(view_func):
             messages.error(request, "Please login to access this page.")
             return redirect(url)
 
-        # EFFICIENCY: IF USER ALREADY MARKED AS NOT MANAGER, DONT BOTH RE-CHECKING -> only a problem when changing user to manager, which happens very little
-        elif not is_some_manager:
+        # EFFICIENCY: CHECK THE (CACHED) STORE ACCESS BEFORE LOADING THE USER -> reflects promotions/demotions immediately
+        elif not sync_session_manager_flag(request, user_id):
             messages.error(request, "You do not have permission to access this page.")
             if referer:
                 return redirect(referer)
@@ -45,7 +80,7 @@ def manager_required(view_func):
 
         # Get employee data to check state
         try:
-            employee = User.objects.get(id=user_id)
+            employee = User.get_with_store_access(user_id)
 
             if not employee.is_active:
                 request.session.flush()
@@ -72,6 +107,9 @@ def manager_required(view_func):
             url = create_redirection_url_for_login_including_return(request)
             return redirect(url)
 
+        # Share the user (with their store access) with the view -> avoids reloading it
+        set_request_principal(request, employee)
+
         if not employee.is_manager():
             messages.error(request, "You do not have permission to access this page.")
 
@@ -95,7 +133,6 @@ def api_manager_required(view_func):
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
         user_id = request.session.get("user_id")
-        is_some_manager = request.session.get("is_some_store_manager", False)
 
         # Redirect to login if they havent already
         if not user_id:
@@ -104,8 +141,8 @@ def api_manager_required(view_func):
                 status=status.HTTP_401_UNAUTHORIZED,
             )
 
-        # EFFICIENCY: IF USER ALREADY MARKED AS NOT MANAGER, DONT BOTH RE-CHECKING -> only a problem when changing user to manager, which happens very little
-        elif not is_some_manager:
+        # EFFICIENCY: CHECK THE (CACHED) STORE ACCESS BEFORE LOADING THE USER -> reflects promotions/demotions immediately
+        elif not sync_session_manager_flag(request, user_id):
             return JsonResponse(
                 {"Error": "You do not have permission to access this resource."},
                 status=status.HTTP_403_FORBIDDEN,
@@ -113,7 +150,7 @@ def api_manager_required(view_func):
 
         # Get employee data to check state
         try:
-            employee = User.objects.get(id=user_id)
+            employee = User.get_with_store_access(user_id)
 
             if not employee.is_active:
                 request.session.flush()
@@ -139,6 +176,9 @@ def api_manager_required(view_func):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        # Share the user (with their store access) with the view -> avoids reloading it
+        set_request_principal(request, employee)
+
         if not employee.is_manager():
             return JsonResponse(
                 {"Error": "You do not have permission to access this resource."},
@@ -167,7 +207,7 @@ def employee_required(view_func):
 
         # Get employee data to check state
         try:
-            employee = User.objects.get(id=user_id)
+            employee = User.get_with_store_access(user_id)
 
             if not employee.is_active:
                 request.session.flush()
@@ -194,6 +234,9 @@ def employee_required(view_func):
             url = create_redirection_url_for_login_including_return(request)
             return redirect(url)
 
+        # Share the user (with their store access) with the view -> avoids reloading it
+        set_request_principal(request, employee)
+
         return view_func(request, *args, **kwargs)
 
     return _wrapped_view
@@ -218,7 +261,7 @@ def api_employee_required(view_func):
 
         # Get employee data to check state
         try:
-            employee = User.objects.get(id=user_id)
+            employee = User.get_with_store_access(user_id)
 
             if not employee.is_active:
                 request.session.flush()
@@ -244,6 +287,9 @@ def api_employee_required(view_func):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
+        # Share the user (with their store access) with the view -> avoids reloading it
+        set_request_principal(request, employee)
+
         return view_func(request, *args, **kwargs)
 
     return _wrapped_view
@@ -335,95 +381,16 @@ def get_manager_associated_stores_full_info(user: User) -> dict:
     return store_data
 
 
-def get_user_stats(user: User) -> Tuple[int, int]:
-    """
-    Get the user's stats including unread notifications and active shift requests.
-
-    Args:
-      - user (User): The user to fetch stats for.
-
-    Returns:
-      - tuple:
-        - int: The count of unread notifications.
-        - int: The count of active shift requests.
-    """
-    cache_key = f"user_stats:{user.id}"
-    cache = caches["user_stats"]
-
-    if settings.USER_STATS_USE_CACHE:
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return (
-                cached_data["unread_notif_count"],
-                cached_data["active_shift_req_count"],
-            )
-
-    unread_notifications_qs = user.get_unread_notifications()
-    unread_count = unread_notifications_qs.count()
-    active_shift_requests_count = user.get_active_shift_requests().count()
-
-    if settings.USER_STATS_USE_CACHE:
-        cache.set(
-            cache_key,
-            {
-                "unread_notif_count": unread_count,
-                "active_shift_req_count": active_shift_requests_count,
-            },
-            timeout=settings.USER_STATS_CACHE_MAX_TTL_SEC,
-        )
-
-    return (unread_count, active_shift_requests_count)
-
-
-def update_user_stats_cache(
-    user_id: int, increase_notif_count: int = 0, increase_shift_req_count: int = 0
-) -> None:
-    """
-    Manually update user stats cache if its in user
-
-    Args:
-      - user_id (int): The user's id to update stats for.
-      - increase_notif_count (int): The amount to increase/decrease the unread notifications stat by manually.
-      - increase_shift_req_count (int): The amount to increase/decrease the active shift requests stat by manually.
-    """
-    if not settings.USER_STATS_USE_CACHE or (
-        increase_notif_count == 0 and increase_shift_req_count == 0
-    ):
-        return
-
-    cache = caches["user_stats"]
-    cache_key = f"user_stats:{user_id}"
-    cached_data = cache.get(cache_key)
-
-    if cached_data:
-        try:
-            ttl = cache.ttl(cache_key)
-            if ttl is None or ttl < 0:
-                ttl = settings.USER_STATS_CACHE_MAX_TTL_SEC
-        except AttributeError:
-            ttl = (
-                settings.USER_STATS_CACHE_MAX_TTL_SEC
-            )  # Fallback if cache backend doesnt support ttl()
-
-        new_data = {
-            "unread_notif_count": max(
-                0, cached_data["unread_notif_count"] + increase_notif_count
-            ),
-            "active_shift_req_count": max(
-                0, cached_data["active_shift_req_count"] + increase_shift_req_count
-            ),
-        }
-        cache.set(cache_key, new_data, timeout=ttl)
-
-
 def get_default_page_context(request, include_notifications: bool = False):
     """
     Get the user's context and User object from their user_id stored in their session information.
     If the user is NOT LOGGED IN, it returns an empty context dict and None for the User object.
+    The user's name and associated stores are cached (see `get_cached_user_page_context`).
 
     Args:
       - request: The request made to the endpoint by the user.
-      - include_notifications (bool) = False: Whether to include all the physical notifications instead of just the count.
+      - include_notifications (bool) = False: Whether to include the unread notifications (and the read/sent counts)
+        instead of just the count. Read/sent notifications are loaded lazily in pages (see `get_notifications_page`).
     """
     # Get user's id
     employee_id = request.session.get("user_id", None)
@@ -432,121 +399,144 @@ def get_default_page_context(request, include_notifications: bool = False):
     if employee_id is None:
         return {}, None
 
-    # Get employee data to check state
-    try:
-        employee = User.objects.get(id=employee_id)
+    # Get employee data to check state (reusing the user loaded by the auth decorators if possible)
+    employee = get_request_principal(request)
+    if employee is None:
+        try:
+            employee = User.objects.get(id=employee_id)
 
-    except User.DoesNotExist as e:
-        request.session.flush()
-        raise e
+        except User.DoesNotExist as e:
+            request.session.flush()
+            raise e
 
-    # Get associated stores
-    stores = employee.get_associated_stores()
-    if len(stores) < 1 or not stores:
+    # Get the user's name and associated stores
+    page_context = get_cached_user_page_context(employee)
+    if not page_context["associated_stores"]:
         messages.error(
             request,
             "Your account has no associated stores. Please contact a store manager.",
         )
-    store_data = {store.id: get_context_store_info_object(store) for store in stores}
-    store_as_manager_data = {
-        store.id: get_context_store_info_object(store)
-        for store in employee.get_associated_stores(get_only_stores_as_manager=True)
-    }
 
     # Get user stats
     unread_notifs_count, active_shift_req_count = get_user_stats(user=employee)
 
-    # Get user's notifications
+    context = {
+        "user_id": employee_id,
+        **page_context,
+        "notification_count": unread_notifs_count,
+        "shift_request_count": active_shift_req_count,
+        "total_alert_count": unread_notifs_count + active_shift_req_count,
+    }
+
+    # Get user's unread notifications (read/sent notifications are loaded on demand)
     if include_notifications:
-        unread_notifs = employee.get_unread_notifications().select_related("sender")
-        unread_notifications = []
-        for notif in unread_notifs:
-            unread_notifications.append(
-                {
-                    "id": notif.id,
-                    "title": notif.title,
-                    "message": add_placeholder_text(
-                        string=notif.message, user_obj=employee
-                    ),
-                    "type": notif.notification_type,
-                    "sender": get_notification_sender_name(notif=notif),
-                    "receiver": get_notification_receiver_name(
-                        notif=notif, is_received=True
-                    ),
-                    "created_at": localtime(notif.created_at),
-                    "expires_on": notif.expires_on,
-                    "store": notif.store.code if notif.store else None,
-                }
-            )
+        unread_notifs = employee.get_unread_notifications().select_related(
+            "sender", "store"
+        )
+        context["notifications"] = {
+            "unread": [
+                get_notification_context_info(notif, user=employee, is_received=True)
+                for notif in unread_notifs
+            ],
+            "read_count": employee.get_read_notifications().count(),
+            "sent_count": employee.get_sent_notifications().count(),
+        }
 
-        read_notifications = []
-        read_notifs = employee.get_read_notifications().select_related("sender")
-        for notif in read_notifs:
-            read_notifications.append(
-                {
-                    "id": notif.id,
-                    "title": notif.title,
-                    "message": add_placeholder_text(
-                        string=notif.message, user_obj=employee
-                    ),
-                    "type": notif.notification_type,
-                    "sender": get_notification_sender_name(notif=notif),
-                    "receiver": get_notification_receiver_name(
-                        notif=notif, is_received=True
-                    ),
-                    "created_at": localtime(notif.created_at),
-                    "expires_on": notif.expires_on,
-                    "store": notif.store.code if notif.store else None,
-                }
-            )
+    return context, employee
 
-        sent_notifications = []
-        sent_notifs = employee.get_sent_notifications()
-        for notif in sent_notifs:
-            sent_notifications.append(
-                {
-                    "id": notif.id,
-                    "title": notif.title,
-                    "message": add_placeholder_text(
-                        string=notif.message, user_obj=employee
-                    ),
-                    "type": notif.notification_type,
-                    "receiver": get_notification_receiver_name(
-                        notif=notif, is_received=False
-                    ),
-                    "created_at": localtime(notif.created_at),
-                    "expires_on": notif.expires_on,
-                    "store": notif.store.code if notif.store else None,
-                }
-            )
 
-        return {
-            "user_id": employee_id,
-            "user_name": employee.first_name,
-            "associated_stores": store_data,
-            "associated_stores_as_manager": store_as_manager_data,
-            "notifications": {
-                "unread": unread_notifications,
-                "read": read_notifications,
-                "read_count": read_notifs.count(),
-                "sent": sent_notifications,
-                "sent_count": sent_notifs.count(),
+def get_cached_user_page_context(user: User) -> dict:
+    """
+    Get the cached part of the user's default page context (name and associated stores).
+    It is versioned together with the user's store access, hence invalidated by the same signals
+    (store access, store and user changes).
+    """
+    cache = caches["default"]
+    key = f"page_context_{user.id}"
+    version = User.get_store_access_cache_version(user.id)
+
+    page_context = cache.get(key, version=version)
+    if page_context is None:
+        page_context = {
+            "user_name": user.first_name,
+            "associated_stores": {
+                store.id: get_context_store_info_object(store)
+                for store in user.get_associated_stores()
+            },
+            "associated_stores_as_manager": {
+                store.id: get_context_store_info_object(store)
+                for store in user.get_associated_stores(get_only_stores_as_manager=True)
             },
-            "notification_count": unread_notifs_count,
-            "shift_request_count": active_shift_req_count,
-            "total_alert_count": unread_notifs_count + active_shift_req_count,
-        }, employee
+        }
+        cache.set(
+            key,
+            page_context,
+            timeout=settings.STORE_ACCESS_CACHE_TIMEOUT_SEC,
+            version=version,
+        )
+
+    return page_context
+
+
+def get_notification_context_info(
+    notif: Notification, user: User, is_received: bool = True
+) -> dict:
+    """
+    Get the information object of a notification used in the page context (received or sent by the user).
+    """
+    info = {
+        "id": notif.id,
+        "title": notif.title,
+        "message": add_placeholder_text(string=notif.message, user_obj=user),
+        "type": notif.notification_type,
+        "receiver": get_notification_receiver_name(
+            notif=notif, is_received=is_received
+        ),
+        "created_at": localtime(notif.created_at),
+        "expires_on": notif.expires_on,
+        "store": notif.store.code if notif.store else None,
+    }
+    if is_received:
+        info["sender"] = get_notification_sender_name(notif=notif)
+    return info
+
+
+def get_notifications_page(user: User, list_type: str, page: int = 1) -> dict:
+    """
+    Get a single page of the user's READ or SENT notifications (newest first).
+
+    Args:
+      - user (User): The user to get the notifications of.
+      - list_type (str): Either "read" or "sent".
+      - page (int) = 1: The page number (starting at 1).
+
+    Returns:
+      - dict: {"notifications": [...], "page": int, "next_page": int or None}
+    """
+    if list_type == "read":
+        qs = user.get_read_notifications()
+    elif list_type == "sent":
+        qs = user.get_sent_notifications()
+    else:
+        raise ValueError(f"Invalid notification list type '{list_type}'.")
+
+    page_size = settings.NOTIFICATION_PAGE_SIZE
+    page = max(1, int(page))
+    offset = (page - 1) * page_size
+
+    # Fetch one extra to know if there is a next page (avoids counting)
+    notifs = list(qs.select_related("sender", "store")[offset : offset + page_size + 1])
 
-    # Else, dont include notifications (SAVES WORK)
     return {
-        "user_id": employee_id,
-        "user_name": employee.first_name,
-        "associated_stores": store_data,
-        "associated_stores_as_manager": store_as_manager_data,
-        "notification_count": unread_notifs_count,
-        "shift_request_count": active_shift_req_count,
-        "total_alert_count": unread_notifs_count + active_shift_req_count,
-    }, employee
+        "notifications": [
+            get_notification_context_info(
+                notif, user=user, is_received=(list_type == "read")
+            )
+            for notif in notifs[:page_size]
+        ],
+        "page": page,
+        "next_page": page + 1 if len(notifs) > page_size else None,
+    }
 
 
 def get_context_store_info_object(store: Store) -> dict[str:Any]:
@@ -18,6 +18,8 @@ from auth_app.utils import (
     manager_required,
     employee_required,
     get_default_page_context,
+    get_request_principal,
+    get_notifications_page,
     get_manager_associated_stores_full_info,
 )
 from auth_app.forms import (
@@ -623,6 +625,34 @@ def notification_page(request):
     return render(request, "auth_app/notification_page.html", context)
 
 
+@employee_required
+@require_GET
+def notification_list(request, list_type):
+    """
+    Render a single page of the user's READ or SENT notifications (loaded lazily by the notification page).
+    """
+    if list_type not in ["read", "sent"]:
+        return render(
+            request,
+            "components/notification_list_page.html",
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        page = 1
+
+    context = get_notifications_page(
+        user=get_request_principal(request), list_type=list_type, page=page
+    )
+    return render(
+        request,
+        "components/notification_list_page.html",
+        {**context, "list_type": list_type},
+    )
+
+
 @ensure_csrf_cookie
 @require_GET
 def home_directory(request):
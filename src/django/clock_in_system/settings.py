@@ -25,7 +25,7 @@ def str_to_bool(value):
 #!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!#
 ######################################################
 #          PLEASE CHANGE THIS EVERY VERSION          #
-STATIC_CACHE_VER = "v1.3.3"  #
+STATIC_CACHE_VER = "v1.3.4"  #
 #  Must be increased for any change to static files  #
 ######################################################
 #!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!#
@@ -195,7 +195,18 @@ if DEBUG and str_to_bool(os.getenv("DJANGO_USE_MEMORY_CACHE", "false")):
             "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
             "LOCATION": "user_report_limits_cache",
         },
+        "task_leases": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "task_leases_cache",
+        },
+        "clocked_state": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "clocked_state_cache",
+        },
     }
+
+    # Database sessions (indexed by user -> allows logging a user out of every session at once)
+    SESSION_ENGINE = "auth_app.sessions"
 else:
     CACHES = {
         "default": {
@@ -225,8 +236,38 @@ else:
                 "redis://:securepassword@redis:6379/5",
             ),
         },
+        "sessions": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": os.getenv(
+                "REDIS_SESSIONS_CACHE_URL",
+                "redis://:securepassword@redis:6379/6",
+            ),
+        },
+        "task_leases": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": os.getenv(
+                "REDIS_TASK_LEASES_CACHE_URL",
+                "redis://:securepassword@redis:6379/7",
+            ),
+        },
+        "clocked_state": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": os.getenv(
+                "REDIS_CLOCKED_STATE_CACHE_URL",
+                "redis://:securepassword@redis:6379/8",
+            ),
+        },
     }
 
+    # Redis sessions in their own DB (indexed by user -> allows logging a user out of every session at once)
+    # Run `python manage.py copy_sessions_to_redis` once after switching from the database sessions
+    SESSION_ENGINE = "auth_app.redis_sessions"
+    SESSION_CACHE_ALIAS = "sessions"
+
+# Only re-save an unmodified session (pushing back its expiry) if its last save is older than this.
+# Avoids a session write on every request even though `SESSION_SAVE_EVERY_REQUEST` is set.
+SESSION_SAVE_THRESHOLD_SEC = 600
+
 
 ############################### STATIC FILE CONFIGURATION ############################################
 # Static files (CSS, JavaScript, Images)
@@ -241,8 +282,8 @@ CELERY_BROKER_URL = os.getenv(
     "CELERY_BROKER_URL", "redis://:securepassword@redis:6379/0"
 )  # Redis broker URL (with password if required)
 CELERY_RESULT_BACKEND = os.getenv(
-    "CELERY_RESULTS_BACKEND", "redis://:securepassword@redis:6379/1"
-)  # Use Django's database to store task results
+    "CELERY_RESULT_BACKEND", "redis://:securepassword@redis:6379/1"
+)  # Redis result backend (the per store jobs aggregate their results through it, see `dispatch_store_job`)
 CELERY_CACHE_BACKEND = "redis"  # Cache backend for storing temporary task states
 CELERY_ACCEPT_CONTENT = ["json"]  # Data format for tasks
 CELERY_TASK_SERIALIZER = "json"  # Serialize task data as JSON
@@ -266,6 +307,36 @@ CELERY_TASK_SOFT_TIME_LIMIT = (
     240  # Soft limit (will raise SoftTimeLimitExceeded exception)
 )
 
+# Per task time limits of the quick notification tasks and the long running report rebuilds (the others use the defaults above)
+NOTIFICATION_TASK_TIME_LIMIT = 60
+NOTIFICATION_TASK_SOFT_TIME_LIMIT = 45
+REPORT_TASK_TIME_LIMIT = 900
+REPORT_TASK_SOFT_TIME_LIMIT = 840
+
+# Tasks are routed to a queue per workload, each consumed by its own worker (see `docker-compose.yml.production`)
+# so a burst of notifications can't delay the nightly jobs (i.e. the 23:55 forced clock out) and vice versa:
+#   - notifications (+ default `celery` queue): short tasks triggered by requests -> high concurrency/prefetch
+#   - maintenance: the scheduled jobs and their per store subtasks -> prefetch 1 (long tasks aren't held back)
+#   - reports: the heavy rebuilds of the labour rollups -> a single process
+# Exact task names take precedence over the patterns, which are matched in order.
+CELERY_TASK_ROUTES = {
+    "auth_app.tasks.notify_*": {"queue": "notifications"},
+    "auth_app.tasks.update_activity_public_holiday": {"queue": "notifications"},
+    "auth_app.tasks.rebuild_activity_daily_summaries": {"queue": "reports"},
+    "auth_app.tasks.reconcile_public_holiday_flags": {"queue": "reports"},
+    "auth_app.tasks.*": {"queue": "maintenance"},
+}
+
+# Scheduled jobs that visit every store run as one subtask per store (see `auth_app.tasks.dispatch_store_job`)
+STORE_TASK_TIME_LIMIT = 180  # Max time in seconds for a single store's part of a job
+STORE_TASK_SOFT_TIME_LIMIT = 150  # Soft limit (the store is reported as failed)
+# Max number of retries of a store's part on a database connection error
+STORE_TASK_MAX_RETRIES = 3
+
+# Scheduled tasks hold a lease (in the `task_leases` cache) while running so overlapping runs are skipped (see `auth_app.task_leases`)
+TASK_LEASE_TTL_SEC = STORE_TASK_TIME_LIMIT + 60  # Outlives a task's hard time limit
+TASK_LEDGER_TTL_SEC = 2678400  # How long completed runs are remembered (31 days)
+
 # Celery Beat Configuration for Periodic Tasks (Cron-like jobs)
 ### !! TO ENSURE TASKS ARE CORRECTLY SET ON TIME, THE DOCKER COMPOSE MUST BE REBUILT WITH `--build` !!
 #### PROD NOTE: A AUTO SCRIPT RESTARTS __ALL__ CONTAINERS ~4AM EVERY DAY, SCHEDULE TASKS AROUND THIS.
@@ -301,6 +372,18 @@ CELERY_BEAT_SCHEDULE = {
             hour=0, minute=5
         ),  # DO NOT CHANGE FROM 12:05AM - UNLESS YOU'VE CONSULTED TASK FUNCTION
     },
+    "rebuild_activity_daily_summaries": {
+        "task": "auth_app.tasks.rebuild_activity_daily_summaries",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    "reconcile_public_holiday_flags": {
+        "task": "auth_app.tasks.reconcile_public_holiday_flags",
+        "schedule": crontab(hour=0, minute=15),
+    },
+    "refresh_public_holiday_overrides": {
+        "task": "auth_app.tasks.refresh_public_holiday_overrides",
+        "schedule": crontab(hour=3, minute=0, day_of_week=1),  # Mon
+    },
     "write_out_repeating_shifts_for_week": {
         "task": "auth_app.tasks.write_out_repeating_shifts_for_week",
         "schedule": crontab(hour=0, minute=30, day_of_week=1),  # DONT CHANGE THIS
@@ -339,24 +422,43 @@ USE_I18N = True
 USE_TZ = True
 
 
-# This is used for public holiday information: (https://date.nager.at/)
+# This is used for public holiday information (offline calendar + overrides synced from https://date.nager.at/)
 COUNTRY_CODE = "AU"
 COUNTRY_SUBDIV_CODE = "WA"
-UTC_OFFSET = "8"  # For UTC+8
+# Remote API used ONLY by the background task syncing the holiday overrides (never during clocking)
+PUBLIC_HOLIDAY_API_URL = os.getenv(
+    "PUBLIC_HOLIDAY_API_URL", "https://date.nager.at/api/v3"
+)
+PUBLIC_HOLIDAY_API_TIMEOUT_SEC = 10
 
 
 # Whether to cache user stats (i.e. active notifications or shift requests)
 USER_STATS_USE_CACHE = True
-# Max TTL age of cached user stats (after max, info is refetched) -- this is a smart cache that gets updated on notification reads etc.
-USER_STATS_CACHE_MAX_TTL_SEC = 180
+# Max TTL age of cached user stats (after max, info is recounted) -- the counts are atomically updated by every notification/shift request change,
+# dropped on store access changes/notification purges and always expire by the next local midnight (notification expiry)
+USER_STATS_CACHE_MAX_TTL_SEC = 86400
+
+# Max TTL age of a user's cached store access (managed/associated stores) -- invalidated whenever their access or the store changes
+STORE_ACCESS_CACHE_TIMEOUT_SEC = 86400
+
+# Max TTL age of an employee's cached clocked state for a store (polled by the clocking dashboard) -- written through by every clocking event/edit
+CLOCKED_STATE_CACHE_TIMEOUT_SEC = 3600
 
 # Default notification expiration date
 NOTIFICATION_DEFAULT_EXPIRY_LENGTH_DAYS = 21
 NOTIFICATION_MAX_EXPIRY_LENGTH_DAYS = 90
+# Number of read/sent notifications loaded at once on the notification page
+NOTIFICATION_PAGE_SIZE = 20
 
 # Default shift request history TTL
 SHIFT_REQUEST_MAX_HISTORY_AGE_DAYS = 120
 
+# Purge jobs (old notifications/shifts/shift requests) delete in batches of primary keys, each in its own transaction
+PURGE_BATCH_SIZE = 1000
+PURGE_BATCH_SLEEP_SEC = 0.05  # Pause between batches (lets others take the locks)
+# Stop starting batches after this long (the rest is left for the next run), before the task's soft time limit
+PURGE_MAX_DURATION_SEC = 180
+
 # Rounding amount for calculating true shift length
 SHIFT_ROUNDING_MINS = 15  # Default is 15min
 